@@ -0,0 +1,191 @@
+"""
+Deterministic stand-in for the OpenAI model used by the benchmarks.
+
+FakeModelProvider plugs into agents.RunConfig.model_provider, so the real
+Runner, tools, sessions and repositories run unchanged while the model itself
+streams canned text at a fixed token rate. No network access is needed.
+"""
+
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agents import FunctionTool, ModelProvider, ModelResponse, Usage
+from agents.models.interface import Model
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+_OWNER_PATTERN = re.compile(r"Owner ID: (?P<owner_id>[^,]*), Owner Agent ID: (?P<owner_agent_id>[^,]*),")
+
+
+@dataclass
+class FakeModelConfig:
+    # tokens streamed per second after the first token (0 = as fast as possible)
+    tokens_per_second: float = 200.0
+    # delay before the first token, i.e. the simulated model TTFT
+    first_token_latency: float = 0.05
+    # number of delta events in a text answer
+    response_tokens: int = 50
+    # tool calls issued (in order) on the first turn when the agent exposes the tool;
+    # e.g. ["run_agent_tool"] makes the owner agent spawn one child agent per chat
+    tool_script: List[str] = field(default_factory=list)
+    # tool used by child agents spawned through run_agent_tool
+    child_tool: str = "WebSearch"
+
+
+class FakeModel(Model):
+    def __init__(self, config: FakeModelConfig) -> None:
+        self.config = config
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id, prompt=None) -> ModelResponse:
+        response = None
+        async for event in self.stream_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+            previous_response_id=previous_response_id, prompt=prompt,
+        ):
+            if isinstance(event, ResponseCompletedEvent):
+                response = event.response
+        assert response is not None and response.usage is not None
+        return ModelResponse(
+            output=response.output,
+            usage=Usage(
+                requests=1,
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+                total_tokens=response.usage.total_tokens,
+            ),
+            response_id=response.id,
+        )
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id, prompt=None) -> AsyncIterator[Any]:
+        items = [{"role": "user", "content": input}] if isinstance(input, str) else list(input)
+        input_tokens = sum(len(str(_item_get(item, "content") or "")) // 4 for item in items)
+        await asyncio.sleep(self.config.first_token_latency)
+
+        calls = self._planned_tool_calls(items, tools)
+        if calls:
+            output: List[Any] = calls
+            output_tokens = sum(len(c.arguments) // 4 for c in calls)
+            sequence = 0
+        else:
+            text_parts: List[str] = []
+            sequence = 0
+            async for delta in self._stream_text():
+                text_parts.append(delta)
+                yield ResponseTextDeltaEvent(
+                    content_index=0,
+                    delta=delta,
+                    item_id="msg_fake",
+                    logprobs=[],
+                    output_index=0,
+                    sequence_number=sequence,
+                    type="response.output_text.delta",
+                )
+                sequence += 1
+            output = [
+                ResponseOutputMessage(
+                    id="msg_fake",
+                    content=[ResponseOutputText(annotations=[], text="".join(text_parts), type="output_text")],
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                )
+            ]
+            output_tokens = len(text_parts)
+
+        yield ResponseCompletedEvent(
+            response=Response(
+                id=f"resp_fake_{time.time_ns()}",
+                created_at=time.time(),
+                model="fake",
+                object="response",
+                output=output,
+                parallel_tool_calls=False,
+                tool_choice="auto",
+                tools=[],
+                usage=ResponseUsage(
+                    input_tokens=input_tokens,
+                    input_tokens_details=InputTokensDetails(cached_tokens=0),
+                    output_tokens=output_tokens,
+                    output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+                    total_tokens=input_tokens + output_tokens,
+                ),
+            ),
+            sequence_number=sequence,
+            type="response.completed",
+        )
+
+    async def _stream_text(self) -> AsyncIterator[str]:
+        interval = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+        started = time.perf_counter()
+        for i in range(self.config.response_tokens):
+            # 累積スケジュールで待つことで sleep の誤差がトークン数分積み上がらないようにする
+            delay = started + i * interval - time.perf_counter()
+            await asyncio.sleep(delay if delay > 0 else 0)
+            yield f"tok{i} "
+
+    def _planned_tool_calls(self, items: List[Any], tools: List[Any]) -> List[ResponseFunctionToolCall]:
+        # ツール結果が返ってきた後のターンでは必ずテキストで応答する
+        if any(_item_get(item, "type") == "function_call_output" for item in items):
+            return []
+        available = {t.name for t in tools if isinstance(t, FunctionTool)}
+        calls = []
+        for index, name in enumerate(self.config.tool_script):
+            if name not in available:
+                continue
+            calls.append(
+                ResponseFunctionToolCall(
+                    arguments=json.dumps(self._tool_arguments(name, items), ensure_ascii=False),
+                    call_id=f"call_fake_{time.time_ns()}_{index}",
+                    name=name,
+                    type="function_call",
+                    id=f"fc_fake_{index}",
+                    status="completed",
+                )
+            )
+        return calls
+
+    def _tool_arguments(self, name: str, items: List[Any]) -> Dict[str, Any]:
+        user_text = " ".join(
+            str(_item_get(item, "content") or "") for item in items if _item_get(item, "role") == "user"
+        )
+        if name == "run_agent_tool":
+            match = _OWNER_PATTERN.search(user_text)
+            return {
+                "config": {
+                    "name": "BenchChildAgent",
+                    "instruction": "Answer the benchmark request briefly.",
+                    "tool": self.config.child_tool,
+                    "user_input": user_text[-200:],
+                    "owner_id": match.group("owner_id") if match else "",
+                    "owner_agent_id": match.group("owner_agent_id") if match else "",
+                }
+            }
+        if name == "task_split_judge_tool":
+            return {"user_request": user_text[-200:]}
+        return {}
+
+
+class FakeModelProvider(ModelProvider):
+    def __init__(self, config: Optional[FakeModelConfig] = None) -> None:
+        self.model = FakeModel(config or FakeModelConfig())
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
+
+
+def _item_get(item: Any, key: str) -> Any:
+    if isinstance(item, dict):
+        return item.get(key)
+    return getattr(item, key, None)
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# API プロセスの起動（import）時間を `python -X importtime` で計測するベンチマークです
+#
+#   uv run python benchmarks/import_bench.py
+#   uv run python benchmarks/import_bench.py --module src.worker --runs 3
+#   uv run python benchmarks/import_bench.py --max-seconds 0.8 --forbid agents,openai
+#
+# 毎回新しいプロセスで import するため、.pyc の生成を除いたコールドスタートに近い値になります。
+# --forbid に指定したパッケージが起動時に読み込まれた場合や、中央値が --max-seconds を超えた場合は終了コード 1 を返します
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) of each `import time:` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(module: str, env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return float(proc.stdout.strip().splitlines()[-1]), parse_importtime(proc.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="top-level packages to list by cumulative time")
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="fail when the median import time exceeds this (0 = no limit)")
+    parser.add_argument("--forbid", default="", help="comma-separated packages that must not be imported at startup")
+    parser.add_argument("--json", help="write the result to this file")
+    args = parser.parse_args()
+
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    # リポジトリ実装・外部接続の設定で import 結果が変わらないよう、インメモリ構成で計測する
+    env.setdefault("USE_IN_MEMORY", "1")
+    env.setdefault("OPENAI_API_KEY", "")
+    env.setdefault("EMBEDDING_PROVIDER", "hash")
+
+    # 1 回目は .pyc の生成を含むため捨てる
+    run_once(args.module, env)
+    durations = []
+    rows: List[Tuple[str, int, int]] = []
+    for _ in range(args.runs):
+        duration, rows = run_once(args.module, env)
+        durations.append(duration)
+    median = statistics.median(durations)
+
+    packages: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        top = name.split(".", 1)[0]
+        packages[top] = packages.get(top, 0) + self_us
+    imported = {name for name, _, _ in rows}
+    forbidden = [name for name in filter(None, args.forbid.split(",")) if name in imported]
+
+    print(f"import {args.module}: median {median * 1000:.0f} ms, min {min(durations) * 1000:.0f} ms over {args.runs} runs, {len(rows)} modules")
+    print(f"{'package':<32}{'self ms':>10}")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{name:<32}{self_us / 1000:>10.1f}")
+
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(
+                {
+                    "module": args.module,
+                    "median_seconds": median,
+                    "durations": durations,
+                    "packages_self_ms": {name: us / 1000 for name, us in packages.items()},
+                },
+                indent=2,
+            )
+        )
+
+    failed = False
+    if forbidden:
+        print(f"FAIL: imported at startup: {', '.join(forbidden)}")
+        failed = True
+    if args.max_seconds and median > args.max_seconds:
+        print(f"FAIL: median import time {median:.3f}s exceeds {args.max_seconds:.3f}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict
+
+from src.infra.metrics.app_metrics import (
+    admission_in_flight,
+    admission_queue_wait_seconds,
+    admission_queued,
+    admission_rejections_total,
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a run cannot be admitted; retry_after is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(f"admission rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionSlot:
+    """A granted run slot. release() is idempotent so it can be called from several cleanup paths."""
+
+    __slots__ = ("_controller", "owner_id", "_granted_at", "_released")
+
+    def __init__(self, controller: "AdmissionController", owner_id: str) -> None:
+        self._controller = controller
+        self.owner_id = owner_id
+        self._granted_at = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self.owner_id, time.perf_counter() - self._granted_at)
+
+    async def __aenter__(self) -> "AdmissionSlot":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Bounds concurrent runs globally and per owner.
+
+    Runs over the limits wait in a bounded queue. Waiters are kept per owner
+    and slots are handed out round-robin across owners, so an owner with a
+    long backlog cannot starve the others; each owner's own waiters stay FIFO.
+    When the queue (global or the owner's share) is full, or a waiter times
+    out, AdmissionRejected is raised with a Retry-After estimate.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_concurrency: int,
+        max_concurrency_per_owner: int,
+        max_queue: int,
+        max_queue_per_owner: int,
+        queue_timeout: float,
+    ) -> None:
+        self.name = name
+        self._max_concurrency = max_concurrency
+        self._max_concurrency_per_owner = max_concurrency_per_owner
+        self._max_queue = max_queue
+        self._max_queue_per_owner = max_queue_per_owner
+        self._queue_timeout = queue_timeout
+        self._active_total = 0
+        self._active: Dict[str, int] = {}
+        # owner_id -> FIFO of waiters; dict order is the round-robin order
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued_total = 0
+        # exponentially weighted average of how long a slot is held (Retry-After estimate)
+        self._hold_seconds = 5.0
+        self._wait_admitted = admission_queue_wait_seconds.labels(name, "admitted")
+        self._wait_rejected = admission_queue_wait_seconds.labels(name, "rejected")
+        admission_in_flight.labels(name).set_function(lambda: self._active_total)
+        admission_queued.labels(name).set_function(lambda: self._queued_total)
+
+    @property
+    def in_flight(self) -> int:
+        return self._active_total
+
+    @property
+    def queued(self) -> int:
+        return self._queued_total
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    @property
+    def max_queue(self) -> int:
+        return self._max_queue
+
+    def _has_capacity(self, owner_id: str) -> bool:
+        return (
+            self._active_total < self._max_concurrency
+            and self._active.get(owner_id, 0) < self._max_concurrency_per_owner
+        )
+
+    def _grant(self, owner_id: str) -> None:
+        self._active_total += 1
+        self._active[owner_id] = self._active.get(owner_id, 0) + 1
+
+    def _reject(self, reason: str, waited: float) -> AdmissionRejected:
+        admission_rejections_total.labels(self.name, reason).inc()
+        self._wait_rejected.observe(waited)
+        backlog = (self._queued_total + 1) / max(1, self._max_concurrency)
+        retry_after = min(60, max(1, math.ceil(self._hold_seconds * backlog)))
+        return AdmissionRejected(reason, retry_after)
+
+    async def acquire(self, owner_id: str) -> AdmissionSlot:
+        # 自分の待ち行列が空で枠が空いていれば待たずに実行する（同一オーナー内の順序は保つ）
+        if owner_id not in self._waiters and self._has_capacity(owner_id):
+            self._grant(owner_id)
+            self._wait_admitted.observe(0.0)
+            return AdmissionSlot(self, owner_id)
+
+        waiters = self._waiters.get(owner_id)
+        if self._queued_total >= self._max_queue:
+            raise self._reject("queue_full", 0.0)
+        if waiters is not None and len(waiters) >= self._max_queue_per_owner:
+            raise self._reject("owner_queue_full", 0.0)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        if waiters is None:
+            waiters = self._waiters[owner_id] = deque()
+        waiters.append(future)
+        self._queued_total += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self._queue_timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._remove_waiter(owner_id, future)
+                raise self._reject("timeout", time.perf_counter() - started) from None
+        except asyncio.CancelledError:
+            # 割り当て済みなら枠を返し、未割り当てなら待ち行列から外す
+            if future.done() and not future.cancelled():
+                self._release(owner_id, 0.0)
+            else:
+                self._remove_waiter(owner_id, future)
+            raise
+        self._wait_admitted.observe(time.perf_counter() - started)
+        return AdmissionSlot(self, owner_id)
+
+    def _remove_waiter(self, owner_id: str, future: asyncio.Future) -> None:
+        future.cancel()
+        waiters = self._waiters.get(owner_id)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+            self._queued_total -= 1
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiters[owner_id]
+
+    def _release(self, owner_id: str, held_seconds: float) -> None:
+        self._active_total -= 1
+        remaining = self._active.get(owner_id, 1) - 1
+        if remaining > 0:
+            self._active[owner_id] = remaining
+        else:
+            self._active.pop(owner_id, None)
+        if held_seconds > 0:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held_seconds
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._active_total < self._max_concurrency:
+            owner_id = next(
+                (o for o in self._waiters if self._active.get(o, 0) < self._max_concurrency_per_owner),
+                None,
+            )
+            if owner_id is None:
+                return
+            waiters = self._waiters.pop(owner_id)
+            future = waiters.popleft()
+            self._queued_total -= 1
+            if waiters:
+                # 割り当てたオーナーを末尾に回してラウンドロビンにする
+                self._waiters[owner_id] = waiters
+            self._grant(owner_id)
+            future.set_result(None)
+
@@ -0,0 +1,30 @@
+from src.config import get_env_variable
+
+from .controller import AdmissionController
+
+
+def get_chat_admission() -> AdmissionController:
+    return AdmissionController(
+        "chat",
+        max_concurrency=int(get_env_variable("CHAT_MAX_CONCURRENCY", "32")),
+        max_concurrency_per_owner=int(get_env_variable("CHAT_MAX_CONCURRENCY_PER_OWNER", "2")),
+        max_queue=int(get_env_variable("CHAT_MAX_QUEUE", "64")),
+        max_queue_per_owner=int(get_env_variable("CHAT_MAX_QUEUE_PER_OWNER", "4")),
+        queue_timeout=float(get_env_variable("CHAT_QUEUE_TIMEOUT_SECONDS", "10")),
+    )
+
+
+def get_child_run_admission() -> AdmissionController:
+    # 子エージェントは親のチャット枠の中で動くため、親とは別の枠で数を制限する（同じ枠だと親子でデッドロックする）
+    return AdmissionController(
+        "child_run",
+        max_concurrency=int(get_env_variable("CHILD_RUN_MAX_CONCURRENCY", "64")),
+        max_concurrency_per_owner=int(get_env_variable("CHILD_RUN_MAX_CONCURRENCY_PER_OWNER", "4")),
+        max_queue=int(get_env_variable("CHILD_RUN_MAX_QUEUE", "128")),
+        max_queue_per_owner=int(get_env_variable("CHILD_RUN_MAX_QUEUE_PER_OWNER", "8")),
+        queue_timeout=float(get_env_variable("CHILD_RUN_QUEUE_TIMEOUT_SECONDS", "30")),
+    )
+
+
+chat_admission = get_chat_admission()
+child_run_admission = get_child_run_admission()
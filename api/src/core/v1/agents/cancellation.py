@@ -0,0 +1,54 @@
+"""
+Cancellation of a chat run together with the child runs it started.
+
+The chat route sets a RunCancellationScope in a ContextVar before starting the
+owner run. The Runner task (and the run_agent_tool calls inside it) inherit
+the ContextVar, so child runs register themselves in the same scope and are
+cancelled with the owner when the SSE client goes away.
+"""
+
+import contextvars
+from typing import Any, Dict, Optional
+
+from agents import RunResultStreaming
+
+
+class RunCancellationScope:
+    def __init__(self) -> None:
+        # RunResultStreaming is an unhashable dataclass, so key by identity
+        self._results: Dict[int, RunResultStreaming] = {}
+        self.cancelled = False
+
+    def register(self, result: RunResultStreaming) -> None:
+        if self.cancelled:
+            result.cancel()
+            return
+        self._results[id(result)] = result
+
+    def unregister(self, result: RunResultStreaming) -> None:
+        self._results.pop(id(result), None)
+
+    def cancel(self) -> None:
+        """Cancel every registered run. Safe to call more than once."""
+        self.cancelled = True
+        for result in list(self._results.values()):
+            if not result.is_complete:
+                result.cancel()
+        self._results.clear()
+
+
+run_cancellation_scope: contextvars.ContextVar[Optional[RunCancellationScope]] = contextvars.ContextVar(
+    "run_cancellation_scope", default=None
+)
+
+
+def current_cancellation_scope() -> Optional[RunCancellationScope]:
+    return run_cancellation_scope.get()
+
+
+def reset_cancellation_scope(token: "contextvars.Token[Any]") -> None:
+    try:
+        run_cancellation_scope.reset(token)
+    except ValueError:
+        # async generator が生成時と別のコンテキストで閉じられた場合は戻す対象がない
+        pass
@@ -0,0 +1,227 @@
+"""
+Owner-agent chat run, shared by the chat route (inline execution) and the
+run worker (RUN_EXECUTION_MODE=worker). events() yields SSE chunks.
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, List, Optional
+
+from agents import Agent, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from src.config import get_env_variable
+from src.core.v1.agents.cancellation import (
+    RunCancellationScope,
+    reset_cancellation_scope,
+    run_cancellation_scope,
+)
+from src.core.v1.agents.owner_agent import OwnerAgent
+from src.core.v1.agents.run_config import agent_run_config
+from src.core.v1.models.owner_agent_request_model import OwnerAgentRequest
+from src.core.v1.tools import task_split_judge_tool
+from src.core.v1.tools.agent_spec_tools import (
+    _fetch_tool,
+    clear_agent_execution_stream,
+    run_agent_tool,
+    set_agent_execution_stream,
+)
+from src.infra.logging import bind_agent_id
+from src.infra.metrics.app_metrics import (
+    agent_run_duration_seconds,
+    agent_time_to_first_token_seconds,
+    agent_tool_invocations_total,
+    tool_event_queue_depth,
+)
+from src.infra.repositories.generated_agent.di import (
+    generated_agent_repository,
+)
+from src.infra.session.sqlite_session import SQLiteSessionStore
+from src.infra.sse import TextDeltaBatcher, sse_event, text_delta_event
+from src.infra.tracing import tracer
+
+session_store = SQLiteSessionStore()  # TODO: DIで注入するようにする
+
+# この時間内に届いたテキスト差分は 1 つのイベントにまとめて送る（0 でトークン毎に送る）
+_TEXT_BATCH_SECONDS = float(get_env_variable("SSE_TEXT_BATCH_SECONDS", "0.02"))
+
+
+def _tool_call_name(raw_item) -> str:
+    if isinstance(raw_item, dict):
+        return str(raw_item.get("name") or raw_item.get("type") or "unknown")
+    return str(getattr(raw_item, "name", None) or getattr(raw_item, "type", "unknown"))
+
+
+def _drain_tool_events(queue: asyncio.Queue) -> List[str]:
+    """キューに溜まったツールイベントを SSE に変換する（同じ子エージェントの連続した差分は 1 つにまとめる）"""
+    chunks: List[str] = []
+    thinking: Optional[dict] = None
+    while not queue.empty():
+        tool_event = queue.get_nowait()
+        if tool_event.get("type") == "agent_thinking":
+            if thinking is not None and thinking["data"]["id"] == tool_event["data"]["id"]:
+                thinking["data"]["delta"] += tool_event["data"]["delta"]
+                continue
+            if thinking is not None:
+                chunks.append(sse_event(thinking))
+            thinking = {"type": "agent_thinking", "data": dict(tool_event["data"])}
+            continue
+        if thinking is not None:
+            chunks.append(sse_event(thinking))
+            thinking = None
+        chunks.append(sse_event(tool_event))
+    if thinking is not None:
+        chunks.append(sse_event(thinking))
+    return chunks
+
+
+class ChatRun:
+    def __init__(self, agent_id: str, req: OwnerAgentRequest, agent: Agent, tool_label: str) -> None:
+        self.agent_id = agent_id
+        self.req = req
+        self.agent = agent
+        self.tool_label = tool_label
+
+    async def events(self) -> AsyncIterator[str]:
+        # オーナー実行・子エージェント・ツール・DB のスパンをこのスパン配下にまとめる
+        with tracer.start_as_current_span(
+            "chat",
+            {
+                "agent.id": self.agent_id,
+                "agent.name": self.agent.name,
+                "owner.id": self.req.owner_id,
+                "session.id": self.req.session_id,
+            },
+        ):
+            async for chunk in self._chat_events():
+                yield chunk
+
+    async def _chat_events(self) -> AsyncIterator[str]:
+        agent = self.agent
+        tool_label = self.tool_label
+        session = session_store.get_or_create(self.req.session_id)
+        prompt = (
+            f"Owner ID: {self.req.owner_id}, Owner Agent ID: {self.req.owner_agent_id}, "
+            f"User Input: {self.req.user_input}"
+        )
+        # ツール実行からのイベントを受け取るためのキュー
+        tool_event_queue = asyncio.Queue()
+        set_agent_execution_stream(tool_event_queue)
+        # ログ・ループ停止の検出でどのエージェントの実行中かを分かるようにする
+        bind_agent_id(self.agent_id)
+        started = time.perf_counter()
+        first_token = True
+        run_status = "failed"
+        # 子エージェントの実行もこのスコープに登録され、切断時にまとめてキャンセルされる
+        cancellation = RunCancellationScope()
+        cancellation_token = run_cancellation_scope.set(cancellation)
+        text_batcher = TextDeltaBatcher(_TEXT_BATCH_SECONDS)
+
+        try:
+            result = Runner.run_streamed(
+                agent, prompt, max_turns=10, session=session, run_config=agent_run_config
+            )
+            cancellation.register(result)
+
+            # メインのエージェントイベント処理
+            async for event in result.stream_events():
+                # ツールイベントをチェック
+                tool_event_queue_depth.observe(tool_event_queue.qsize())
+                if not tool_event_queue.empty():
+                    # 先に届いているテキストを送ってからツールイベントを送る
+                    pending_text = text_batcher.flush()
+                    if pending_text is not None:
+                        yield text_delta_event(pending_text)
+                    for chunk in _drain_tool_events(tool_event_queue):
+                        yield chunk
+
+                # テキスト差分（既存のチャンク配信）
+                if (
+                    event.type == "raw_response_event"
+                    and isinstance(event.data, ResponseTextDeltaEvent)
+                ):
+                    if first_token:
+                        first_token = False
+                        agent_time_to_first_token_seconds.labels("owner", tool_label).observe(
+                            time.perf_counter() - started
+                        )
+                    # テキストイベントをJSONフォーマットで送信
+                    text = text_batcher.add(event.data.delta)
+                    if text is not None:
+                        yield text_delta_event(text)
+                    continue
+
+                # テキスト以外のイベントが来たら溜めている差分を送る
+                pending_text = text_batcher.flush()
+                if pending_text is not None:
+                    yield text_delta_event(pending_text)
+
+                # エージェント内部の更新通知（既存）
+                if event.type == "agent_updated_stream_event":
+                    update_event = {
+                        "type": "agent_updated",
+                        "data": {"message": f"{agent.name} の応答を待っています..."}
+                    }
+                    yield sse_event(update_event)
+
+                # ツール呼び出しイベントの処理
+                elif event.type == "run_item_stream_event":
+                    if event.item.type == "tool_call_item":
+                        agent_tool_invocations_total.labels(_tool_call_name(event.item.raw_item)).inc()
+                        tool_event = {
+                            "type": "tool_called",
+                            "data": {"message": "ツールを実行中..."}
+                        }
+                        yield sse_event(tool_event)
+
+            # クライアント切断で Starlette にキャンセルされると stream_events はキャンセルを
+            # 握りつぶして終了するため、実行が完了していないことで切断を判定する
+            if not result.is_complete:
+                run_status = "cancelled"
+                return
+
+            # 残りのテキストとツールイベントを処理
+            pending_text = text_batcher.flush()
+            if pending_text is not None:
+                yield text_delta_event(pending_text)
+            for chunk in _drain_tool_events(tool_event_queue):
+                yield chunk
+            run_status = "completed"
+
+        except (asyncio.CancelledError, GeneratorExit):
+            run_status = "cancelled"
+            raise
+        finally:
+            # クリーンアップ（完了以外ではオーナー・子エージェントの実行を止める）
+            if run_status != "completed":
+                cancellation.cancel()
+            reset_cancellation_scope(cancellation_token)
+            clear_agent_execution_stream()
+            agent_run_duration_seconds.labels("owner", tool_label, run_status).observe(
+                time.perf_counter() - started
+            )
+
+
+async def prepare_chat_run(agent_id: str, req: OwnerAgentRequest) -> ChatRun:
+    # 既存エージェントを取得
+    entity = await generated_agent_repository.get_by_id(agent_id)
+    if entity is None:
+        agent = OwnerAgent()
+    else:
+        # Agent を初期化（ツール解決は存在する場合のみ）
+        tool = None
+        if entity.tool:
+            try:
+                tool = _fetch_tool(entity.tool)
+            except Exception:
+                # 不明なツール指定は無視（ツール無しで実行）
+                tool = None
+
+        agent = Agent(
+            name=entity.name,
+            instructions=entity.instruction,
+            tools=[tool, run_agent_tool, task_split_judge_tool] if tool else [run_agent_tool, task_split_judge_tool],
+        )
+
+    tool_label = (entity.tool if entity is not None else None) or "none"
+    return ChatRun(agent_id, req, agent, tool_label)
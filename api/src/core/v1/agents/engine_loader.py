@@ -0,0 +1,71 @@
+"""
+Deferred loading of the chat engine (Agents SDK, OpenAI client, tools).
+
+Importing the Agents SDK is most of the API's import time, so the chat route
+and the run worker reach chat_run through this module instead of importing
+it at startup. The app lifespan preloads it on a background thread once the
+server is up; a chat arriving before that finishes waits for the import off
+the event loop.
+"""
+
+import asyncio
+import logging
+import threading
+from types import ModuleType
+from typing import TYPE_CHECKING, Optional
+
+from src.core.v1.models.owner_agent_request_model import OwnerAgentRequest
+
+if TYPE_CHECKING:
+    from src.core.v1.agents.chat_run import ChatRun
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_chat_run_module: Optional[ModuleType] = None
+
+
+def load_chat_engine() -> ModuleType:
+    """Import chat_run and its dependencies (blocking, thread-safe, once)."""
+    global _chat_run_module
+    if _chat_run_module is not None:
+        return _chat_run_module
+    with _lock:
+        if _chat_run_module is None:
+            from agents import add_trace_processor
+
+            from src.core.v1.agents import chat_run
+            from src.infra.tracing import tracer
+            from src.infra.tracing.agents_bridge import AgentsSdkSpanBridge
+
+            if tracer.enabled:
+                # Agents SDK のモデル呼び出し・ツール実行スパンを自前のトレースへ転送する
+                add_trace_processor(AgentsSdkSpanBridge(tracer))
+            _chat_run_module = chat_run
+    return _chat_run_module
+
+
+def loaded_chat_engine() -> Optional[ModuleType]:
+    """chat_run if the chat engine has been loaded, without loading it."""
+    return _chat_run_module
+
+
+def preload_chat_engine() -> None:
+    """Start loading the chat engine on a daemon thread."""
+
+    def preload() -> None:
+        try:
+            load_chat_engine()
+        except Exception:
+            # 失敗した場合は最初のチャットで再度読み込み、そこでエラーを返す
+            logger.exception("failed to preload the chat engine")
+
+    threading.Thread(target=preload, name="chat-engine-preload", daemon=True).start()
+
+
+async def prepare_chat_run(agent_id: str, req: OwnerAgentRequest) -> "ChatRun":
+    """chat_run.prepare_chat_run, loading the chat engine first if needed."""
+    module = _chat_run_module
+    if module is None:
+        module = await asyncio.to_thread(load_chat_engine)
+    return await module.prepare_chat_run(agent_id, req)
@@ -0,0 +1,301 @@
+"""
+Retry, rate limiting and circuit breaking around model calls.
+
+ResilientModelProvider wraps another ModelProvider (OpenAI by default) and is
+plugged into agent_run_config, so the owner run in the chat route and the
+child runs started by run_agent_tool share the same limits per model.
+Non-chat calls such as embeddings go through ResilientModelProvider.call().
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+from agents import ModelProvider, ModelResponse
+from agents.models.interface import Model
+from agents.models.openai_provider import OpenAIProvider, shared_http_client
+
+from src.infra.metrics.app_metrics import (
+    model_call_retries_total,
+    model_circuit_state,
+    model_rate_limit_wait_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,  # includes APITimeoutError
+)
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised without calling the model while its circuit breaker is open."""
+
+
+@dataclass
+class ResiliencePolicy:
+    # 0 disables rate limiting
+    requests_per_second: float = 0.0
+    burst: int = 10
+    max_retries: int = 4
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 20.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+
+
+class TokenBucket:
+    """Request-rate token bucket. pause() blocks every caller, e.g. for a 429 retry-after."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the time spent waiting."""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._rate <= 0:
+                    break
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+        return time.monotonic() - started
+
+
+class CircuitBreaker:
+    """Opens after consecutive retryable failures; lets one probe through after the reset time."""
+
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, model: str, failure_threshold: int, reset_seconds: float) -> None:
+        self._model = model
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.state = self.CLOSED
+        model_circuit_state.labels(model).set_function(lambda: self.state)
+
+    def before_call(self) -> Optional[float]:
+        """Raise while open; in half-open, return a token identifying this call as the probe."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self._reset_seconds:
+                raise ModelUnavailableError(f"model {self._model} is temporarily unavailable (circuit open)")
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        if self.state == self.HALF_OPEN:
+            now = time.monotonic()
+            # 試行は終わり方によらず release_probe で解放されるが、念のため reset 時間後は次の試行を許す
+            if self._probe_started is not None and now - self._probe_started < self._reset_seconds:
+                raise ModelUnavailableError(f"model {self._model} is temporarily unavailable (circuit half-open)")
+            self._probe_started = now
+            return now
+        return None
+
+    def release_probe(self, token: Optional[float]) -> None:
+        """Let the next call probe when this probe ended without recording a success or failure."""
+        if token is not None and self._probe_started == token:
+            self._probe_started = None
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_started = None
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_started = None
+        if self.state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("circuit opened for model %s after %d failures", self._model, self._failures)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            # HTTP-date 形式は扱わずバックオフに任せる
+            return None
+    return None
+
+
+class ResilientCalls:
+    """Rate limiting, retries and circuit breaking for the calls to one model."""
+
+    def __init__(
+        self,
+        model_name: str,
+        policy: ResiliencePolicy,
+        bucket: TokenBucket,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self._model_name = model_name
+        self._policy = policy
+        self._bucket = bucket
+        self._breaker = breaker
+
+    async def _acquire(self) -> None:
+        waited = await self._bucket.acquire()
+        model_rate_limit_wait_seconds.labels(self._model_name).observe(waited)
+
+    def _retry_delay(self, exc: Exception, attempt: int, *, can_retry: bool) -> Optional[float]:
+        """Record the failure and return how long to wait before retrying, or None to give up."""
+        if not isinstance(exc, _RETRYABLE_ERRORS):
+            # 4xx などリトライしても変わらないエラーはブレーカーに数えない
+            return None
+        self._breaker.record_failure()
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            # 他の呼び出しも含めて待たせ、同時に再送が集中しないようにする
+            # （待つ間も同時実行の枠を占有するため backoff_max_seconds までにする）
+            self._bucket.pause(min(retry_after, self._policy.backoff_max_seconds))
+        if not can_retry or attempt >= self._policy.max_retries or self._breaker.is_open:
+            return None
+        if retry_after is not None and retry_after > self._policy.backoff_max_seconds:
+            # 枠を占有したまま長く待つより、すぐに失敗を返す
+            logger.warning(
+                "model %s asked to retry after %.1fs (more than %.1fs), giving up",
+                self._model_name,
+                retry_after,
+                self._policy.backoff_max_seconds,
+            )
+            return None
+        reason = "rate_limit" if isinstance(exc, openai.RateLimitError) else "server_error"
+        model_call_retries_total.labels(self._model_name, reason).inc()
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self._policy.backoff_base_seconds)
+        ceiling = min(self._policy.backoff_max_seconds, self._policy.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            probe = self._breaker.before_call()
+            try:
+                await self._acquire()
+                result = await fn()
+                self._breaker.record_success()
+                return result
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt, can_retry=True)
+                if delay is None:
+                    raise
+            finally:
+                # リトライしないエラーやキャンセル（CancelledError）で終わった試行は、次の呼び出しに試行を譲る
+                self._breaker.release_probe(probe)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+class ResilientModel(ResilientCalls, Model):
+    def __init__(
+        self,
+        inner: Model,
+        model_name: str,
+        policy: ResiliencePolicy,
+        bucket: TokenBucket,
+        breaker: CircuitBreaker,
+    ) -> None:
+        super().__init__(model_name, policy, bucket, breaker)
+        self._inner = inner
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        return await self.call(lambda: self._inner.get_response(*args, **kwargs))
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        attempt = 0
+        while True:
+            probe = self._breaker.before_call()
+            yielded = False
+            try:
+                await self._acquire()
+                async for event in self._inner.stream_response(*args, **kwargs):
+                    yielded = True
+                    yield event
+                self._breaker.record_success()
+                return
+            except Exception as exc:
+                # 既にイベントを流した後の失敗は、再送すると出力が重複するためリトライしない
+                delay = self._retry_delay(exc, attempt, can_retry=not yielded)
+                if delay is None:
+                    raise
+            finally:
+                # 途中で読むのをやめられた（aclose）場合も含め、結果を記録せずに終わった試行を解放する
+                self._breaker.release_probe(probe)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+class ResilientModelProvider(ModelProvider):
+    def __init__(self, policy: ResiliencePolicy, inner: Optional[ModelProvider] = None) -> None:
+        self._policy = policy
+        self._inner = inner
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def _get_inner(self) -> ModelProvider:
+        if self._inner is None:
+            # リトライはこの層で行うため OpenAI クライアント自身のリトライは無効にする
+            # （クライアントは API キーが必要なので最初のモデル呼び出しまで作らない）
+            self._inner = OpenAIProvider(
+                openai_client=openai.AsyncOpenAI(max_retries=0, http_client=shared_http_client()),
+            )
+        return self._inner
+
+    def _ensure_limits(self, key: str) -> None:
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self._policy.requests_per_second, self._policy.burst)
+            self._breakers[key] = CircuitBreaker(
+                key, self._policy.circuit_failure_threshold, self._policy.circuit_reset_seconds
+            )
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        inner = self._get_inner().get_model(model_name)
+        key = model_name or getattr(inner, "model", None) or "default"
+        self._ensure_limits(key)
+        return ResilientModel(inner, key, self._policy, self._buckets[key], self._breakers[key])
+
+    async def call(self, model_name: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run an API call other than a chat completion (e.g. embeddings) under the model's limits."""
+        self._ensure_limits(model_name)
+        calls = ResilientCalls(model_name, self._policy, self._buckets[model_name], self._breakers[model_name])
+        return await calls.call(fn)
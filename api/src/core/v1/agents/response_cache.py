@@ -0,0 +1,105 @@
+"""
+Response cache for child-agent runs started by run_agent_tool.
+
+Scheduled reports ask the same child agent the same question over and over.
+When enabled, a completed run's streamed deltas are kept in a TTL-bound LRU
+keyed on the owner, the child's instruction, tool and user input and the
+model settings, and an identical request replays them instead of calling
+the model. Tools with side effects (SendMailTool) are never cached.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from src.infra.metrics.app_metrics import child_response_cache_requests_total, child_response_cache_size
+
+# 実行すること自体が目的のツール（キャッシュから返すと処理が行われない）
+ALWAYS_UNCACHEABLE_TOOLS = frozenset({"SendMailTool"})
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    deltas: List[str]
+    final_text: str
+    created_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.final_text) + sum(len(d) for d in self.deltas)
+
+
+class ChildResponseCache:
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        max_chars: int,
+        uncacheable_tools: Iterable[str] = (),
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._max_chars = max_chars
+        self._uncacheable_tools = ALWAYS_UNCACHEABLE_TOOLS | frozenset(uncacheable_tools)
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._chars = 0
+        child_response_cache_size.labels("entries").set_function(lambda: len(self._entries))
+        child_response_cache_size.labels("chars").set_function(lambda: self._chars)
+
+    def key_for(
+        self,
+        *,
+        owner_id: str,
+        instruction: str,
+        tool_name: Optional[str],
+        user_input: str,
+        model_settings: dict,
+    ) -> Optional[str]:
+        """Cache key for the request, or None when the tool must not be served from cache."""
+        if (tool_name or "") in self._uncacheable_tools:
+            child_response_cache_requests_total.labels("bypass").inc()
+            return None
+        # オーナーの過去メッセージ（セマンティック記憶）を含む指示から作られた応答のため、オーナー毎に分ける
+        payload = json.dumps(
+            [owner_id, instruction, tool_name or "", user_input, model_settings],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            child_response_cache_requests_total.labels("miss").inc()
+            return None
+        if time.time() - entry.created_at > self._ttl_seconds:
+            self._remove(key)
+            child_response_cache_requests_total.labels("expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        child_response_cache_requests_total.labels("hit").inc()
+        return entry
+
+    def put(self, key: str, deltas: List[str], final_text: str) -> None:
+        entry = CachedResponse(list(deltas), final_text, time.time())
+        if entry.size > self._max_chars:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._chars += entry.size
+        while len(self._entries) > self._max_entries or self._chars > self._max_chars:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._chars -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._chars = 0
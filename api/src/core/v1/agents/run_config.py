@@ -0,0 +1,45 @@
+from typing import Optional
+
+from agents import RunConfig
+
+from src.config import get_env_variable
+
+from .model_resilience import ResiliencePolicy, ResilientModelProvider
+from .response_cache import ChildResponseCache
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    return ResiliencePolicy(
+        requests_per_second=float(get_env_variable("MODEL_RATE_LIMIT_RPS", "0")),
+        burst=int(get_env_variable("MODEL_RATE_LIMIT_BURST", "10")),
+        max_retries=int(get_env_variable("MODEL_MAX_RETRIES", "4")),
+        backoff_base_seconds=float(get_env_variable("MODEL_BACKOFF_BASE_SECONDS", "0.5")),
+        backoff_max_seconds=float(get_env_variable("MODEL_BACKOFF_MAX_SECONDS", "20")),
+        circuit_failure_threshold=int(get_env_variable("MODEL_CIRCUIT_FAILURE_THRESHOLD", "5")),
+        circuit_reset_seconds=float(get_env_variable("MODEL_CIRCUIT_RESET_SECONDS", "30")),
+    )
+
+
+# Runner 実行時の共通設定（オーナー・子エージェント共通）
+# モデル呼び出しはモデル毎のレート制限・リトライ・サーキットブレーカーを通す
+# ベンチマークではここの model_provider を決定的なフェイクモデルに差し替える
+# 埋め込みなどチャット以外の API 呼び出しも model_provider.call() で同じ制限を通す
+model_provider = ResilientModelProvider(get_resilience_policy())
+agent_run_config = RunConfig(model_provider=model_provider)
+
+
+def get_child_response_cache() -> Optional[ChildResponseCache]:
+    # 有効化は任意（同じ質問でも最新の情報で答えてほしい用途があるため）
+    if get_env_variable("CHILD_RESPONSE_CACHE_ENABLED", "0") != "1":
+        return None
+    uncacheable = get_env_variable("CHILD_RESPONSE_CACHE_UNCACHEABLE_TOOLS", "")
+    return ChildResponseCache(
+        ttl_seconds=float(get_env_variable("CHILD_RESPONSE_CACHE_TTL_SECONDS", "900")),
+        max_entries=int(get_env_variable("CHILD_RESPONSE_CACHE_MAX_ENTRIES", "256")),
+        max_chars=int(get_env_variable("CHILD_RESPONSE_CACHE_MAX_CHARS", "4000000")),
+        uncacheable_tools=[name.strip() for name in uncacheable.split(",") if name.strip()],
+    )
+
+
+# 子エージェントの応答キャッシュ（無効時は None）
+child_response_cache = get_child_response_cache()
@@ -0,0 +1,47 @@
+from typing import Optional
+
+from src.config import get_env_variable
+from src.core.v1.admission.di import chat_admission, child_run_admission
+from src.core.v1.runs.di import run_execution_mode, run_manager
+from src.infra.metrics import EventLoopLagMonitor
+from src.infra.metrics.loop_watchdog import EventLoopWatchdog
+
+from .health_checker import HealthChecker
+
+
+def get_loop_lag_monitor() -> EventLoopLagMonitor:
+    return EventLoopLagMonitor(
+        interval_seconds=float(get_env_variable("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5")),
+        window_seconds=float(get_env_variable("EVENT_LOOP_LAG_WINDOW_SECONDS", "30")),
+    )
+
+
+loop_lag_monitor = get_loop_lag_monitor()
+
+
+def get_loop_watchdog() -> Optional[EventLoopWatchdog]:
+    # スタックの取得にスレッドを 1 つ使うため、明示的に有効にした場合のみ動かす
+    if get_env_variable("EVENT_LOOP_WATCHDOG_ENABLED", "0") != "1":
+        return None
+    return EventLoopWatchdog(
+        threshold_seconds=float(get_env_variable("EVENT_LOOP_BLOCK_THRESHOLD_SECONDS", "0.1")),
+        stack_limit=int(get_env_variable("EVENT_LOOP_WATCHDOG_STACK_LIMIT", "40")),
+    )
+
+
+loop_watchdog = get_loop_watchdog()
+
+
+def get_health_checker() -> HealthChecker:
+    return HealthChecker(
+        loop_monitor=loop_lag_monitor,
+        chat_admission=chat_admission,
+        child_run_admission=child_run_admission,
+        run_manager=run_manager,
+        run_execution_mode=run_execution_mode,
+        max_loop_lag_seconds=float(get_env_variable("READINESS_MAX_LOOP_LAG_SECONDS", "1.0")),
+        db_timeout_seconds=float(get_env_variable("HEALTH_DB_TIMEOUT_SECONDS", "2")),
+    )
+
+
+health_checker = get_health_checker()
@@ -0,0 +1,99 @@
+import time
+from typing import Any, Dict, List
+
+from src.core.v1.admission.controller import AdmissionController
+from src.core.v1.agents.engine_loader import loaded_chat_engine
+from src.core.v1.runs.run_manager import RunManager
+from src.infra.metrics import EventLoopLagMonitor
+from src.infra.metrics.app_metrics import sse_connections_open, websocket_connections_open
+from src.infra.repositories.pool_health import check_pools
+
+
+class HealthChecker:
+    """
+    Readiness and deep health of the API process.
+
+    The process is not ready when a database pool cannot serve a query, the
+    event loop lagged more than max_loop_lag_seconds within the lag monitor's
+    window, or the chat admission queue is full (new chats would get 429).
+    """
+
+    def __init__(
+        self,
+        *,
+        loop_monitor: EventLoopLagMonitor,
+        chat_admission: AdmissionController,
+        child_run_admission: AdmissionController,
+        run_manager: RunManager,
+        run_execution_mode: str,
+        max_loop_lag_seconds: float,
+        db_timeout_seconds: float,
+    ) -> None:
+        self._loop_monitor = loop_monitor
+        self._chat_admission = chat_admission
+        self._child_run_admission = child_run_admission
+        self._run_manager = run_manager
+        self._run_execution_mode = run_execution_mode
+        self._max_loop_lag = max_loop_lag_seconds
+        self._db_timeout = db_timeout_seconds
+        self._started = time.monotonic()
+
+    def liveness(self) -> Dict[str, Any]:
+        # 応答できている時点でイベントループは動いている（止まっていればプローブがタイムアウトする）
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.monotonic() - self._started, 3),
+            "event_loop_lag_seconds": round(self._loop_monitor.lag, 6),
+        }
+
+    async def readiness(self, *, deep: bool = False) -> Dict[str, Any]:
+        failures: List[str] = []
+
+        pools = await check_pools(self._db_timeout)
+        for name, pool in pools.items():
+            if not pool["ok"]:
+                failures.append(f"database:{name}")
+
+        max_lag = self._loop_monitor.max_lag
+        if self._loop_monitor.running and max_lag > self._max_loop_lag:
+            failures.append("event_loop_lag")
+
+        chat = self._chat_admission
+        if chat.queued >= chat.max_queue:
+            failures.append("chat_queue_full")
+
+        report: Dict[str, Any] = {"status": "ok" if not failures else "unavailable", "failures": failures}
+        if not deep:
+            return report
+
+        engine = loaded_chat_engine()
+        report.update(
+            {
+                "uptime_seconds": round(time.monotonic() - self._started, 3),
+                "event_loop": {
+                    "lag_seconds": round(self._loop_monitor.lag, 6),
+                    "max_lag_seconds": round(max_lag, 6),
+                    "window_seconds": self._loop_monitor.window_seconds,
+                    "monitoring": self._loop_monitor.running,
+                },
+                "database": pools,
+                "runs": {
+                    "execution_mode": self._run_execution_mode,
+                    "chat_in_flight": chat.in_flight,
+                    "chat_queued": chat.queued,
+                    "chat_max_concurrency": chat.max_concurrency,
+                    "chat_max_queue": chat.max_queue,
+                    "child_runs_in_flight": self._child_run_admission.in_flight,
+                    "child_runs_queued": self._child_run_admission.queued,
+                    "detached_running": self._run_manager.running,
+                },
+                "streams": {
+                    "sse": {key[0]: int(value) for key, value in sse_connections_open.values().items()},
+                    "websocket": {key[0]: int(value) for key, value in websocket_connections_open.values().items()},
+                },
+                "chat_engine_loaded": engine is not None,
+                # セッションはチャットの実行モジュールが持つため、読み込み前は null
+                "sessions": engine.session_store.count() if engine is not None else None,
+            }
+        )
+        return report
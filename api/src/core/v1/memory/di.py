@@ -0,0 +1,41 @@
+from typing import Optional
+
+from src.config import get_env_variable
+from src.core.v1.agents.run_config import model_provider
+from src.infra.repositories.message_embeddings.di import (
+    message_embedding_repository,
+)
+
+from .embeddings import (
+    EmbeddingProviderInterface,
+    HashingEmbeddingProvider,
+    OpenAIEmbeddingProvider,
+)
+from .semantic_memory import SemanticMemory
+
+
+def get_embedding_provider() -> EmbeddingProviderInterface:
+    dimensions = int(get_env_variable("EMBEDDING_DIMENSIONS", "1536"))
+    provider = get_env_variable("EMBEDDING_PROVIDER", "openai")
+    if provider == "hash":
+        return HashingEmbeddingProvider(dimensions=dimensions)
+    if provider == "openai":
+        return OpenAIEmbeddingProvider(
+            model_provider,
+            model=get_env_variable("EMBEDDING_MODEL", "text-embedding-3-small"),
+            dimensions=dimensions,
+        )
+    raise RuntimeError("EMBEDDING_PROVIDER must be 'openai' or 'hash'.")
+
+
+def get_semantic_memory() -> Optional[SemanticMemory]:
+    if get_env_variable("SEMANTIC_MEMORY_ENABLED", "0") != "1":
+        return None
+    return SemanticMemory(
+        get_embedding_provider(),
+        message_embedding_repository,
+        top_k=int(get_env_variable("SEMANTIC_MEMORY_TOP_K", "5")),
+    )
+
+
+semantic_memory = get_semantic_memory()
@@ -0,0 +1,87 @@
+import hashlib
+import math
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, List, Optional, Sequence
+
+from src.infra.repositories.generated_agent_messages.search import tokenize
+
+if TYPE_CHECKING:
+    from src.core.v1.agents.model_resilience import ResilientModelProvider
+
+
+class EmbeddingProviderInterface(ABC):
+    dimensions: int
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Return one embedding per input text, in the same order."""
+        raise NotImplementedError
+
+
+class HashingEmbeddingProvider(EmbeddingProviderInterface):
+    """
+    Deterministic, offline embedding based on feature hashing of tokens
+    (words and CJK bigrams). Texts sharing vocabulary end up close in cosine
+    space, which is enough for local development, tests and benchmarks.
+    """
+
+    def __init__(self, dimensions: int = 256) -> None:
+        self.dimensions = dimensions
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in tokenize(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            return vector
+        return [v / norm for v in vector]
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+class OpenAIEmbeddingProvider(EmbeddingProviderInterface):
+    """
+    OpenAI embeddings API (text-embedding-3-* supports shortened dimensions).
+
+    Calls go through the model provider's rate limit, retries and circuit
+    breaker for the embedding model, on the HTTP client shared with the
+    model calls.
+    """
+
+    def __init__(
+        self,
+        resilience: "ResilientModelProvider",
+        model: str = "text-embedding-3-small",
+        dimensions: int = 1536,
+    ) -> None:
+        self.dimensions = dimensions
+        self._model = model
+        self._resilience = resilience
+        self._client: Optional[Any] = None
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            # リトライは resilience 側で行う。クライアントは API キーが必要なので最初の呼び出しまで作らない
+            from agents.models.openai_provider import shared_http_client
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(max_retries=0, http_client=shared_http_client())
+        return self._client
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        response = await self._resilience.call(
+            self._model,
+            lambda: self._get_client().embeddings.create(
+                model=self._model,
+                input=list(texts),
+                dimensions=self.dimensions,
+            ),
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
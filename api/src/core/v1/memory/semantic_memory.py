@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from src.infra.metrics.app_metrics import queue_depth
+from src.infra.repositories.generated_agent_messages.types import MessageEntity
+from src.infra.repositories.message_embeddings.interface import (
+    MessageEmbeddingRepositoryInterface,
+)
+from src.infra.repositories.message_embeddings.types import (
+    CreateMessageEmbeddingDto,
+    SimilarMessage,
+)
+
+from .embeddings import EmbeddingProviderInterface
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticMemory:
+    """
+    Embeds stored messages in background batches and retrieves the owner's
+    most relevant past messages for a new child-agent run.
+
+    enqueue() never blocks the caller: when the queue is full the message is
+    skipped (it simply won't be recallable), which keeps agent runs unaffected
+    by a slow embedding backend.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProviderInterface,
+        repository: MessageEmbeddingRepositoryInterface,
+        *,
+        batch_size: int = 32,
+        flush_interval: float = 0.5,
+        queue_size: int = 1000,
+        top_k: int = 5,
+        min_score: float = 0.2,
+        max_context_chars: int = 500,
+    ) -> None:
+        self._provider = provider
+        self._repository = repository
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue[Tuple[MessageEntity, str]] = asyncio.Queue(maxsize=queue_size)
+        queue_depth.labels("embedding").set_function(self._queue.qsize)
+        self._top_k = top_k
+        self._min_score = min_score
+        self._max_context_chars = max_context_chars
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Embed what is still queued, then stop the background worker."""
+        if self._worker is None:
+            return
+        await self.flush()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def flush(self) -> None:
+        """Wait until every queued message has been processed."""
+        await self._queue.join()
+
+    def enqueue(self, message: MessageEntity, owner_id: str) -> bool:
+        if not message.content.strip():
+            return False
+        try:
+            self._queue.put_nowait((message, owner_id))
+        except asyncio.QueueFull:
+            logger.warning("embedding queue is full; skipping message %s", message.id)
+            return False
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._process(batch)
+            except Exception:
+                logger.exception("failed to embed %d messages", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process(self, batch: List[Tuple[MessageEntity, str]]) -> None:
+        vectors = await self._provider.embed([m.content for m, _ in batch])
+        await self._repository.upsert_many(
+            [
+                CreateMessageEmbeddingDto(
+                    message_id=m.id,
+                    owner_id=owner_id,
+                    agent_id=m.agent_id,
+                    session_id=m.session_id,
+                    role=m.role,
+                    content=m.content,
+                    created_at=m.created_at,
+                    embedding=vector,
+                )
+                for (m, owner_id), vector in zip(batch, vectors)
+            ]
+        )
+
+    async def retrieve(self, owner_id: str, query: str, *, k: Optional[int] = None) -> List[SimilarMessage]:
+        if not owner_id or not query.strip():
+            return []
+        [vector] = await self._provider.embed([query])
+        hits = await self._repository.search_similar(
+            owner_id=owner_id,
+            embedding=vector,
+            limit=k or self._top_k,
+        )
+        return [h for h in hits if h.score >= self._min_score]
+
+    def format_context(self, hits: List[SimilarMessage]) -> str:
+        """Render retrieved messages as an instruction section ('' when nothing was found)."""
+        if not hits:
+            return ""
+        lines = ["# 関連する過去のやり取り（参考情報）"]
+        for hit in sorted(hits, key=lambda h: h.created_at):
+            content = hit.content
+            if len(content) > self._max_context_chars:
+                content = content[: self._max_context_chars] + "…"
+            lines.append(f"- [{hit.created_at:%Y-%m-%d %H:%M}] {hit.role}: {content}")
+        return "\n".join(lines)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from src.infra.metrics.app_metrics import (
+    realtime_secret_mint_duration_seconds,
+    realtime_secret_pool_size,
+    realtime_secret_requests_total,
+    realtime_secrets_discarded_total,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeSecretError(Exception):
+    """The client secret endpoint answered with an error status."""
+
+    def __init__(self, status_code: int, detail: Any) -> None:
+        super().__init__(f"client secret request failed with status {status_code}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class _MintedSecret:
+    response: Dict[str, Any]
+    # unix time (seconds) reported by the endpoint
+    expires_at: float
+
+
+class ClientSecretPool:
+    """
+    Keeps pre-minted realtime client secrets per session profile (variant)
+    so a voice session can start without waiting on OpenAI.
+
+    A background task refills the pools and drops secrets that have less than
+    min_remaining_seconds left (the browser still has to connect with them).
+    Each secret is handed out once; when a pool is empty, acquire() mints one
+    on the spot. A pool size of 0 disables pre-minting for that variant.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        url: str,
+        api_key: str,
+        request_bodies: Dict[str, bytes],
+        pool_sizes: Dict[str, int],
+        min_remaining_seconds: float,
+        retry_seconds: float = 5.0,
+        max_retry_seconds: float = 300.0,
+    ) -> None:
+        self._client = client
+        self._url = url
+        self._api_key = api_key
+        self._request_bodies = request_bodies
+        self._pool_sizes = pool_sizes
+        self._min_remaining_seconds = min_remaining_seconds
+        self._retry_seconds = retry_seconds
+        self._max_retry_seconds = max_retry_seconds
+        self._pools: Dict[str, Deque[_MintedSecret]] = {variant: deque() for variant in request_bodies}
+        for variant, pool in self._pools.items():
+            realtime_secret_pool_size.labels(variant).set_function(lambda pool=pool: len(pool))
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if any(self._pool_sizes.values()) and (self._worker is None or self._worker.done()):
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def acquire(self, variant: str = "default") -> Dict[str, Any]:
+        """Return a client secret response (the endpoint's JSON) for the variant."""
+        if variant not in self._pools:
+            raise KeyError(f"Unknown realtime session variant: {variant}")
+        self._drop_expiring(variant)
+        pool = self._pools[variant]
+        # 払い出した分（または足りなかった分）を補充させる
+        self._wakeup.set()
+        if pool:
+            realtime_secret_requests_total.labels(variant, "pooled").inc()
+            return pool.popleft().response
+        realtime_secret_requests_total.labels(variant, "minted").inc()
+        return (await self._mint(variant)).response
+
+    async def _mint(self, variant: str) -> _MintedSecret:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._client.post(
+                self._url,
+                headers={
+                    "Authorization": f"Bearer {self._api_key}",
+                    "Content-Type": "application/json",
+                },
+                content=self._request_bodies[variant],
+            )
+            if response.status_code >= 400:
+                try:
+                    detail = response.json()
+                except ValueError:
+                    detail = {"message": response.text}
+                raise RealtimeSecretError(response.status_code, detail)
+            body = response.json()
+            outcome = "ok"
+        finally:
+            realtime_secret_mint_duration_seconds.labels(outcome).observe(time.perf_counter() - started)
+        # 有効期限が分からないシークレットはプールしない（すぐ期限切れとして扱う）
+        return _MintedSecret(body, float(body.get("expires_at") or 0))
+
+    def _usable(self, secret: _MintedSecret) -> bool:
+        return secret.expires_at - time.time() >= self._min_remaining_seconds
+
+    def _drop_expiring(self, variant: str) -> None:
+        pool = self._pools[variant]
+        while pool and not self._usable(pool[0]):
+            pool.popleft()
+            realtime_secrets_discarded_total.labels(variant).inc()
+
+    async def _refill(self) -> None:
+        for variant, pool in self._pools.items():
+            self._drop_expiring(variant)
+            while len(pool) < self._pool_sizes.get(variant, 0):
+                secret = await self._mint(variant)
+                if not self._usable(secret):
+                    raise RuntimeError(
+                        f"minted client secret expires too soon to pool (expires_at={secret.expires_at})"
+                    )
+                pool.append(secret)
+
+    def _seconds_until_refresh(self) -> Optional[float]:
+        """Time until the oldest pooled secret must be replaced (None when nothing is pooled)."""
+        deadlines = [pool[0].expires_at for pool in self._pools.values() if pool]
+        if not deadlines:
+            return None
+        # 期限ちょうどに起きても入れ替え対象にならず空回りするため、最低 1 秒は待つ
+        return max(1.0, min(deadlines) - self._min_remaining_seconds - time.time())
+
+    async def _run(self) -> None:
+        retry = self._retry_seconds
+        while True:
+            self._wakeup.clear()
+            try:
+                await self._refill()
+            except Exception:
+                logger.warning("failed to pre-mint realtime client secrets; retrying in %.0fs", retry, exc_info=True)
+                # 失敗中は払い出しで起こされても待つ（エンドポイントを叩き続けない）
+                await asyncio.sleep(retry)
+                retry = min(retry * 2, self._max_retry_seconds)
+                continue
+            retry = self._retry_seconds
+            # 払い出されるか、プール中のシークレットの入れ替え時刻まで待つ
+            # （wait_for はタイムアウトと同時にキャンセルされると止まらないことがあるため wait を使う）
+            waiter = asyncio.create_task(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self._seconds_until_refresh())
+            finally:
+                waiter.cancel()
@@ -0,0 +1,44 @@
+import importlib.util
+
+import httpx
+
+from src.config import get_env_variable
+
+from .client_secret_pool import ClientSecretPool
+from .session_profiles import SessionProfiles, load_session_profiles
+
+
+def get_realtime_http_client() -> httpx.AsyncClient:
+    # 接続（TCP+TLS）を使い回す。HTTP/2 は h2 がインストールされている場合のみ（httpx[http2]）
+    return httpx.AsyncClient(
+        timeout=20,
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=5, keepalive_expiry=120),
+    )
+
+
+def get_session_profiles() -> SessionProfiles:
+    # 起動時に検証してリクエストボディまで作っておく（不正な設定なら起動に失敗する）
+    return load_session_profiles(get_env_variable("REALTIME_SESSION_PROFILES_FILE", ""))
+
+
+def get_client_secret_pool(client: httpx.AsyncClient, profiles: SessionProfiles) -> ClientSecretPool:
+    api_key = get_env_variable("OPENAI_API_KEY", "")
+    default_pool_size = int(get_env_variable("REALTIME_SECRET_POOL_SIZE", "2"))
+    return ClientSecretPool(
+        client,
+        url=get_env_variable("REALTIME_CLIENT_SECRETS_URL", "https://api.openai.com/v1/realtime/client_secrets"),
+        api_key=api_key,
+        request_bodies={name: compiled.body for name, compiled in profiles.compiled.items()},
+        # API キーが無ければ事前発行しても失敗するだけなので無効にする
+        pool_sizes={
+            name: (compiled.profile.pool_size if compiled.profile.pool_size is not None else default_pool_size) if api_key else 0
+            for name, compiled in profiles.compiled.items()
+        },
+        min_remaining_seconds=float(get_env_variable("REALTIME_SECRET_MIN_REMAINING_SECONDS", "120")),
+    )
+
+
+realtime_http_client = get_realtime_http_client()
+session_profiles = get_session_profiles()
+client_secret_pool = get_client_secret_pool(realtime_http_client, session_profiles)
@@ -0,0 +1,152 @@
+"""
+Named realtime session profiles (model, voice, VAD, transcription).
+
+Profiles are validated once at startup and compiled into the JSON body of
+the client secret request, so /realtime/token does no per-request config
+building. Besides the built-in "default" profile, more profiles and the
+owner -> profile mapping can be loaded from a JSON file:
+
+    {
+      "default": "default",
+      "profiles": {"fast": {"turn_detection": {"type": "server_vad"}, "transcription": null}},
+      "owners": {"owner-123": "fast"}
+    }
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class TranscriptionSettings(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    model: str = "gpt-4o-mini-transcribe"
+    language: Optional[str] = "ja"
+
+
+class ServerVad(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["server_vad"] = "server_vad"
+    threshold: float = Field(default=0.5, ge=0.0, le=1.0)
+    prefix_padding_ms: int = Field(default=300, ge=0)
+    silence_duration_ms: int = Field(default=500, ge=0)
+    # None: the API default (true)
+    create_response: Optional[bool] = None
+    interrupt_response: Optional[bool] = None
+
+
+class SemanticVad(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    type: Literal["semantic_vad"] = "semantic_vad"
+    eagerness: Literal["low", "medium", "high", "auto"] = "auto"
+    create_response: Optional[bool] = None
+    interrupt_response: Optional[bool] = None
+
+
+class RealtimeSessionProfile(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    model: str = "gpt-realtime"
+    instructions: str = ""
+    voice: str = "marin"
+    speed: float = Field(default=1.0, ge=0.25, le=1.5)
+    # null disables input transcription / noise reduction / VAD
+    transcription: Optional[TranscriptionSettings] = TranscriptionSettings()
+    noise_reduction: Optional[Literal["near_field", "far_field"]] = "near_field"
+    turn_detection: Optional[Union[ServerVad, SemanticVad]] = Field(default=SemanticVad(), discriminator="type")
+    # pre-minted secrets kept for this profile (None: REALTIME_SECRET_POOL_SIZE)
+    pool_size: Optional[int] = Field(default=None, ge=0)
+
+    def to_request(self) -> dict:
+        """Body of POST /v1/realtime/client_secrets for this profile."""
+        audio_input: dict = {}
+        if self.transcription is not None:
+            audio_input["transcription"] = self.transcription.model_dump(exclude_none=True)
+        if self.noise_reduction is not None:
+            audio_input["noise_reduction"] = {"type": self.noise_reduction}
+        audio_input["turn_detection"] = self.turn_detection.model_dump(exclude_none=True) if self.turn_detection is not None else None
+        return {
+            "session": {
+                "type": "realtime",
+                "model": self.model,
+                "audio": {
+                    "input": audio_input,
+                    "output": {"voice": self.voice, "speed": self.speed},
+                },
+                "instructions": self.instructions,
+            }
+        }
+
+
+# ref: https://platform.openai.com/docs/api-reference/realtime-sessions/create-secret-response
+DEFAULT_PROFILE = RealtimeSessionProfile(
+    speed=0.9,
+    turn_detection=SemanticVad(eagerness="low"),
+    instructions="日本語を話すAIアシスタントです。なるべく簡潔に応答を返します。一番最初の会話で「こんにちは、何かご依頼事項はありますか？」のwelcomeメッセージをユーザーに返します。",
+)
+
+
+@dataclass(frozen=True)
+class CompiledProfile:
+    name: str
+    profile: RealtimeSessionProfile
+    # serialized request body, sent as is for every secret minted for the profile
+    body: bytes
+
+
+class UnknownSessionProfile(KeyError):
+    """The requested (or owner-assigned) profile does not exist."""
+
+
+class SessionProfiles:
+    def __init__(
+        self,
+        profiles: Dict[str, RealtimeSessionProfile],
+        *,
+        owner_profiles: Optional[Dict[str, str]] = None,
+        default: str = "default",
+    ) -> None:
+        owner_profiles = owner_profiles or {}
+        for name in [default, *owner_profiles.values()]:
+            if name not in profiles:
+                raise ValueError(f"Unknown realtime session profile: {name}")
+        self.default = default
+        self._owner_profiles = dict(owner_profiles)
+        self._compiled = {
+            name: CompiledProfile(name, profile, json.dumps(profile.to_request(), ensure_ascii=False).encode("utf-8"))
+            for name, profile in profiles.items()
+        }
+
+    @property
+    def compiled(self) -> Dict[str, CompiledProfile]:
+        return self._compiled
+
+    def resolve(self, owner_id: Optional[str] = None, requested: Optional[str] = None) -> str:
+        """Profile name for a token request: the requested one, else the owner's, else the default."""
+        if requested:
+            if requested not in self._compiled:
+                raise UnknownSessionProfile(requested)
+            return requested
+        if owner_id and owner_id in self._owner_profiles:
+            return self._owner_profiles[owner_id]
+        return self.default
+
+
+def load_session_profiles(path: Optional[str] = None) -> SessionProfiles:
+    profiles: Dict[str, RealtimeSessionProfile] = {"default": DEFAULT_PROFILE}
+    if not path:
+        return SessionProfiles(profiles)
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    for name, raw in (data.get("profiles") or {}).items():
+        profiles[name] = RealtimeSessionProfile.model_validate(raw)
+    return SessionProfiles(
+        profiles,
+        owner_profiles=data.get("owners") or {},
+        default=data.get("default") or "default",
+    )
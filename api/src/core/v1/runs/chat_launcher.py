@@ -0,0 +1,42 @@
+from typing import AsyncIterator, Tuple
+
+from src.core.v1.admission.controller import AdmissionSlot
+from src.core.v1.admission.di import chat_admission
+from src.core.v1.agents.engine_loader import prepare_chat_run
+from src.core.v1.models.owner_agent_request_model import OwnerAgentRequest
+from src.infra.logging import get_request_id
+from src.infra.repositories.run_jobs.di import run_job_repository
+from src.infra.repositories.run_jobs.types import CreateRunJobDto
+
+from .di import run_execution_mode
+from .job_relay import relay_run_job_events
+
+
+async def open_chat_events(agent_id: str, req: OwnerAgentRequest) -> Tuple[AsyncIterator[str], AdmissionSlot]:
+    """
+    Admit a chat run and return its SSE chunks together with the admission
+    slot, which the caller releases when it stops consuming the chunks.
+
+    Inline mode runs the chat in this process; worker mode enqueues a job and
+    relays the events the worker writes. Raises AdmissionRejected when the
+    owner's (or the global) queue is full.
+    """
+    # オーナー毎・全体の同時実行数を超える場合は待たせ、待ち行列も溢れたら AdmissionRejected
+    # （エージェントの読み込みや構築も枠を得てから行い、溢れたリクエストで DB を叩かない）
+    slot = await chat_admission.acquire(req.owner_id)
+    try:
+        if run_execution_mode != "worker":
+            chat_run = await prepare_chat_run(agent_id, req)
+            return chat_run.events(), slot
+        # ワーカープロセスで実行し、ワーカーが書き込むイベントを中継する
+        job = await run_job_repository.enqueue(
+            CreateRunJobDto(
+                kind="chat",
+                owner_id=req.owner_id,
+                payload={"agent_id": agent_id, "request": req.model_dump(), "request_id": get_request_id()},
+            )
+        )
+    except BaseException:
+        slot.release()
+        raise
+    return relay_run_job_events(job.id), slot
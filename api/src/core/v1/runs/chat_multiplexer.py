@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.core.v1.admission.controller import AdmissionRejected
+from src.core.v1.models.owner_agent_request_model import OwnerAgentRequest
+from src.infra.sse import dumps, sse_data
+
+from .chat_launcher import open_chat_events
+
+logger = logging.getLogger(__name__)
+
+# 1 接続で同時に動かせる実行数（それ以上の start はエラーを返す）
+MAX_RUNS_PER_CONNECTION = 8
+
+
+@dataclass
+class _SocketRun:
+    id: str
+    task: Optional[asyncio.Task] = None
+    cancel_requested: bool = False
+    state: str = "running"
+    # interrupt で次に開始する入力（このランが止まった後に開始する）
+    follow_ups: list = field(default_factory=list)
+
+
+class ChatMultiplexer:
+    """
+    Runs the chats of one WebSocket connection (one session of one agent).
+
+    Each start message becomes a run with its own id; its events are sent as
+    {"type": "event", "run_id", "event"} frames so several runs can share the
+    connection. Runs can be cancelled, or interrupted: cancelled and replaced
+    by a follow-up input once the cancelled run has stopped. Outgoing frames
+    are JSON text built from the chat's SSE chunks without re-encoding them.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        *,
+        agent_id: str,
+        owner_id: str,
+        owner_agent_id: str,
+        session_id: str,
+    ) -> None:
+        self._send = send
+        self._agent_id = agent_id
+        self._owner_id = owner_id
+        self._owner_agent_id = owner_agent_id
+        self._session_id = session_id
+        self._runs: Dict[str, _SocketRun] = {}
+
+    async def handle(self, message: dict) -> None:
+        """Apply one client message: start / cancel / interrupt."""
+        kind = message.get("type")
+        run_id = message.get("run_id")
+        if kind == "start":
+            await self._start(run_id, message.get("user_input"))
+        elif kind == "cancel":
+            if not self._cancel(run_id):
+                await self._error(run_id, "unknown_run")
+        elif kind == "interrupt":
+            run = self._runs.get(run_id) if isinstance(run_id, str) else None
+            if run is None or run.task is None or run.task.done():
+                # 止める実行が既に終わっていれば、そのまま次の入力を開始する
+                await self._start(message.get("new_run_id"), message.get("user_input"))
+                return
+            if not isinstance(message.get("user_input"), str) or not message["user_input"]:
+                await self._error(run_id, "invalid_message", "user_input is required")
+                return
+            run.follow_ups.append((message.get("new_run_id"), message["user_input"]))
+            self._cancel(run_id)
+        else:
+            await self._error(run_id if isinstance(run_id, str) else None, "invalid_message", f"unknown type: {kind}")
+
+    async def close(self) -> None:
+        """Cancel every run of the connection and wait for them to stop."""
+        tasks = []
+        for run in self._runs.values():
+            run.follow_ups.clear()
+            if run.task is not None and not run.task.done():
+                run.cancel_requested = True
+                run.task.cancel()
+                tasks.append(run.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _start(self, run_id: Optional[str], user_input) -> None:
+        if not isinstance(user_input, str) or not user_input:
+            await self._error(run_id, "invalid_message", "user_input is required")
+            return
+        run_id = run_id if isinstance(run_id, str) and run_id else uuid.uuid4().hex
+        if run_id in self._runs:
+            await self._error(run_id, "duplicate_run_id")
+            return
+        if len(self._runs) >= MAX_RUNS_PER_CONNECTION:
+            await self._error(run_id, "too_many_runs")
+            return
+        run = _SocketRun(run_id)
+        self._runs[run_id] = run
+        req = OwnerAgentRequest(
+            owner_id=self._owner_id,
+            owner_agent_id=self._owner_agent_id,
+            session_id=self._session_id,
+            user_input=user_input,
+        )
+        run.task = asyncio.create_task(self._run(run, req))
+
+    def _cancel(self, run_id) -> bool:
+        run = self._runs.get(run_id) if isinstance(run_id, str) else None
+        if run is None or run.task is None or run.task.done():
+            return False
+        run.cancel_requested = True
+        run.task.cancel()
+        return True
+
+    async def _run(self, run: _SocketRun, req: OwnerAgentRequest) -> None:
+        slot = None
+        events = None
+        try:
+            # 枠が空くまで待つ間も他の実行・メッセージの受信は止まらない
+            events, slot = await open_chat_events(self._agent_id, req)
+            await self._send(dumps({"type": "run_started", "run_id": run.id}))
+            prefix = '{"type":"event","run_id":' + dumps(run.id) + ',"event":'
+            async for chunk in events:
+                await self._send(prefix + sse_data(chunk) + "}")
+            # チャットの実行はキャンセルを握りつぶして正常終了することがあるため、要求の有無で判定する
+            run.state = "cancelled" if run.cancel_requested else "completed"
+        except AdmissionRejected as exc:
+            run.state = "rejected"
+            await self._error(run.id, "too_many_concurrent_chats", retry_after=exc.retry_after)
+        except asyncio.CancelledError:
+            run.state = "cancelled"
+        except Exception as exc:
+            logger.exception("chat run %s on websocket failed", run.id)
+            run.state = "failed"
+            await self._error(run.id, "run_failed", repr(exc))
+        finally:
+            if events is not None:
+                # ストリームを閉じて実行を止める（ワーカー実行ならジョブのキャンセルを依頼する）
+                await events.aclose()
+            if slot is not None:
+                slot.release()
+        if self._runs.get(run.id) is run:
+            del self._runs[run.id]
+        if run.state != "rejected":
+            await self._send_quietly({"type": "run_finished", "run_id": run.id, "state": run.state})
+        for new_run_id, user_input in run.follow_ups:
+            await self._start(new_run_id, user_input)
+
+    async def _error(self, run_id: Optional[str], code: str, detail: Optional[str] = None, **extra) -> None:
+        await self._send_quietly({"type": "error", "run_id": run_id, "code": code, "detail": detail, **extra})
+
+    async def _send_quietly(self, frame: dict) -> None:
+        try:
+            await self._send(dumps(frame))
+        except Exception:
+            # 接続が閉じている（close() で後始末される）
+            logger.debug("dropping websocket frame %s", frame.get("type"))
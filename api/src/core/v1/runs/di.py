@@ -0,0 +1,32 @@
+from src.config import get_env_variable
+from src.infra.repositories.run_jobs.di import run_job_repository
+
+from .run_manager import RunManager
+from .run_worker import RunWorker
+
+
+def get_run_manager() -> RunManager:
+    return RunManager(
+        max_events_per_run=int(get_env_variable("RUN_EVENT_LOG_SIZE", "2000")),
+        retention_seconds=float(get_env_variable("RUN_RETENTION_SECONDS", "600")),
+    )
+
+
+run_manager = get_run_manager()
+
+
+# inline: チャットを API プロセスで実行する / worker: ジョブキュー経由でワーカープロセスが実行する
+run_execution_mode = get_env_variable("RUN_EXECUTION_MODE", "inline")
+if run_execution_mode not in ("inline", "worker"):
+    raise RuntimeError("RUN_EXECUTION_MODE must be 'inline' or 'worker'.")
+
+
+def get_run_worker() -> RunWorker:
+    return RunWorker(
+        run_job_repository,
+        concurrency=int(get_env_variable("WORKER_CONCURRENCY", "8")),
+        lease_seconds=float(get_env_variable("RUN_JOB_LEASE_SECONDS", "30")),
+        flush_interval=float(get_env_variable("RUN_JOB_EVENT_FLUSH_SECONDS", "0.02")),
+        retention_seconds=float(get_env_variable("RUN_JOB_RETENTION_SECONDS", "3600")),
+        shutdown_grace_seconds=float(get_env_variable("WORKER_SHUTDOWN_GRACE_SECONDS", "30")),
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Set
+
+from src.infra.repositories.run_jobs.di import run_job_repository
+from src.infra.repositories.run_jobs.types import FINISHED_JOB_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# イベントが来ない間にジョブの状態を確認する間隔
+_STATUS_CHECK_SECONDS = 5.0
+# 完了前に参照が消えないよう保持する
+_pending_cancels: Set[asyncio.Task] = set()
+
+
+class RunJobFailed(RuntimeError):
+    """Raised to the SSE stream when the worker reports the job as failed."""
+
+
+async def relay_run_job_events(job_id: str) -> AsyncIterator[str]:
+    """
+    Yield the SSE chunks a worker writes for job_id until the job finishes.
+    If the consumer goes away before that, the job is cancelled.
+    """
+    after_seq = -1
+    finished = False
+    try:
+        while True:
+            events = await run_job_repository.wait_for_events(
+                job_id, after_seq=after_seq, timeout=_STATUS_CHECK_SECONDS
+            )
+            for event in events:
+                yield event.chunk
+                after_seq = event.seq
+            if events:
+                continue
+
+            job = await run_job_repository.get_by_id(job_id)
+            if job is None:
+                finished = True
+                return
+            if job.status in FINISHED_JOB_STATUSES:
+                # ワーカーはイベントを書き終えてから終了状態にするため、ここで残りを読み切る
+                events = await run_job_repository.wait_for_events(job_id, after_seq=after_seq, timeout=0)
+                if events:
+                    for event in events:
+                        yield event.chunk
+                        after_seq = event.seq
+                    continue
+                finished = True
+                if job.status == "failed":
+                    raise RunJobFailed(f"run job {job_id} failed: {job.error}")
+                return
+            if job.status == "running" and job.lease_expires_at is not None and job.lease_expires_at < datetime.utcnow():
+                # ワーカーが落ちてリースが切れている（次のループで failed として終わる）
+                await run_job_repository.fail_expired()
+    finally:
+        if not finished:
+            # 切断時は Starlette（anyio）のキャンセルがこの後の await にも届くため、別タスクで依頼する
+            task = asyncio.create_task(_request_cancel(job_id))
+            _pending_cancels.add(task)
+            task.add_done_callback(_pending_cancels.discard)
+
+
+async def _request_cancel(job_id: str) -> None:
+    try:
+        await run_job_repository.request_cancel(job_id)
+    except Exception:
+        logger.warning("Failed to cancel run job %s", job_id, exc_info=True)
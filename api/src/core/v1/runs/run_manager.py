@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, Literal, Optional, Tuple
+
+from src.infra.metrics.app_metrics import detached_runs
+
+logger = logging.getLogger(__name__)
+
+RunState = Literal["running", "completed", "failed", "cancelled"]
+
+
+class RunEventLog:
+    """
+    Bounded log of SSE chunks with absolute offsets.
+
+    When the log is full the oldest chunks are dropped; readers asking for a
+    dropped offset continue from the oldest one still kept.
+    """
+
+    def __init__(self, max_events: int) -> None:
+        self._events: Deque[str] = deque(maxlen=max_events)
+        # offset of self._events[0]
+        self._first_offset = 0
+        self._closed = False
+        self._changed = asyncio.Event()
+
+    @property
+    def first_offset(self) -> int:
+        return self._first_offset
+
+    @property
+    def next_offset(self) -> int:
+        return self._first_offset + len(self._events)
+
+    def append(self, chunk: str) -> None:
+        if len(self._events) == self._events.maxlen:
+            self._first_offset += 1
+        self._events.append(chunk)
+        self._notify()
+
+    def close(self) -> None:
+        self._closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def read(self, offset: int) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (offset, chunk) from offset on, waiting for new chunks until the log is closed."""
+        while True:
+            offset = max(offset, self._first_offset)
+            while offset < self.next_offset:
+                yield offset, self._events[offset - self._first_offset]
+                offset += 1
+            if self._closed:
+                return
+            await self._changed.wait()
+
+
+class DetachedRun:
+    def __init__(self, run_id: str, owner_id: str, max_events: int) -> None:
+        self.id = run_id
+        self.owner_id = owner_id
+        self.log = RunEventLog(max_events)
+        self.state: RunState = "running"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_requested = False
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.id,
+            "owner_id": self.owner_id,
+            "state": self.state,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "first_offset": self.log.first_offset,
+            "next_offset": self.log.next_offset,
+        }
+
+
+class RunManager:
+    """
+    Runs chat event streams as background tasks that outlive the HTTP request.
+
+    Events are kept in a bounded per-run log so clients can attach, detach and
+    resume from an offset. Finished runs are kept for retention_seconds.
+    """
+
+    def __init__(self, *, max_events_per_run: int, retention_seconds: float) -> None:
+        self._max_events_per_run = max_events_per_run
+        self._retention_seconds = retention_seconds
+        self._runs: Dict[str, DetachedRun] = {}
+        detached_runs.labels("running").set_function(lambda: self._count("running"))
+        detached_runs.labels("finished").set_function(lambda: len(self._runs) - self._count("running"))
+
+    def _count(self, state: RunState) -> int:
+        return sum(1 for run in self._runs.values() if run.state == state)
+
+    @property
+    def running(self) -> int:
+        return self._count("running")
+
+    def start(
+        self,
+        owner_id: str,
+        events: AsyncIterator[str],
+        *,
+        finished_event: Optional[Callable[[DetachedRun], str]] = None,
+    ) -> DetachedRun:
+        """Consume events in a background task. finished_event builds the last chunk of the log."""
+        self._evict_expired()
+        run = DetachedRun(str(uuid.uuid4()), owner_id, self._max_events_per_run)
+        self._runs[run.id] = run
+        run.task = asyncio.create_task(self._consume(run, events, finished_event))
+        return run
+
+    async def _consume(
+        self,
+        run: DetachedRun,
+        events: AsyncIterator[str],
+        finished_event: Optional[Callable[[DetachedRun], str]],
+    ) -> None:
+        try:
+            async for chunk in events:
+                run.log.append(chunk)
+            # イベント側がキャンセルを握りつぶして正常終了することがあるため、要求の有無で判定する
+            run.state = "cancelled" if run.cancel_requested else "completed"
+        except asyncio.CancelledError:
+            run.state = "cancelled"
+        except Exception:
+            logger.exception("detached run %s failed", run.id)
+            run.state = "failed"
+        finally:
+            run.finished_at = time.time()
+            if finished_event is not None:
+                run.log.append(finished_event(run))
+            run.log.close()
+
+    def get(self, run_id: str) -> Optional[DetachedRun]:
+        return self._runs.get(run_id)
+
+    def cancel(self, run_id: str) -> bool:
+        run = self._runs.get(run_id)
+        if run is None or run.task is None or run.task.done():
+            return False
+        run.cancel_requested = True
+        run.task.cancel()
+        return True
+
+    def _evict_expired(self) -> None:
+        deadline = time.time() - self._retention_seconds
+        for run_id, run in list(self._runs.items()):
+            if run.finished_at is not None and run.finished_at < deadline:
+                del self._runs[run_id]
+
+    async def shutdown(self) -> None:
+        """Cancel runs that are still going (on application shutdown)."""
+        tasks = []
+        for run_id in list(self._runs):
+            if self.cancel(run_id):
+                tasks.append(self._runs[run_id].task)
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from src.core.v1.agents.engine_loader import prepare_chat_run
+from src.core.v1.models.owner_agent_request_model import OwnerAgentRequest
+from src.infra.logging import bind_request_id
+from src.infra.repositories.run_jobs.interface import RunJobRepositoryInterface
+from src.infra.repositories.run_jobs.types import RunJob, RunJobStatus
+
+logger = logging.getLogger(__name__)
+
+# 期限切れジョブの回収と古いジョブの削除を行う間隔
+_SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class _JobEventWriter:
+    """
+    Appends a job's SSE chunks to the repository in the background.
+
+    The first chunk is written right away (time to first byte); chunks that
+    arrive while a write is in flight or within flush_interval after it are
+    batched into the next write, so token deltas do not cost one INSERT each.
+    """
+
+    def __init__(self, repository: RunJobRepositoryInterface, job_id: str, flush_interval: float) -> None:
+        self._repository = repository
+        self._job_id = job_id
+        self._flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._next_seq = 0
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def add(self, chunk: str) -> None:
+        if self._task.done():
+            # 書き込みに失敗していれば実行を止める
+            self._task.result()
+        self._buffer.append(chunk)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self._buffer:
+                chunks, self._buffer = self._buffer, []
+                await self._repository.append_events(self._job_id, self._next_seq, chunks)
+                self._next_seq += len(chunks)
+            if self._closed and not self._buffer:
+                return
+            if not self._closed:
+                await asyncio.sleep(self._flush_interval)
+
+    async def close(self) -> None:
+        """Flush what is buffered; raises if a write failed."""
+        self._closed = True
+        self._wakeup.set()
+        await self._task
+
+
+class RunWorker:
+    """
+    Executes queued run jobs (RUN_EXECUTION_MODE=worker).
+
+    Up to `concurrency` jobs run at once on this process's event loop. Each
+    running job is heartbeated to keep its lease; a job whose lease expires
+    (worker crashed) is marked failed rather than re-run, because agent runs
+    have side effects such as sent mail. Cancel requests from the API stop
+    the run like a client disconnect does in inline mode.
+    """
+
+    def __init__(
+        self,
+        repository: RunJobRepositoryInterface,
+        *,
+        concurrency: int,
+        lease_seconds: float,
+        flush_interval: float,
+        retention_seconds: float,
+        poll_seconds: float = 5.0,
+        shutdown_grace_seconds: float = 30.0,
+    ) -> None:
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._repository = repository
+        self._concurrency = concurrency
+        self._lease_seconds = lease_seconds
+        self._flush_interval = flush_interval
+        self._retention_seconds = retention_seconds
+        self._poll_seconds = poll_seconds
+        self._shutdown_grace_seconds = shutdown_grace_seconds
+        self._stopping = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        # job_id -> the task running the agent, cancelled on a cancel request or shutdown
+        self._runs: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+
+    def stop(self) -> None:
+        """Stop claiming jobs; run() returns after the running ones finish (or the grace period)."""
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info("run worker %s started (concurrency=%d)", self.id, self._concurrency)
+        next_sweep = 0.0
+        while not self._stopping.is_set():
+            if len(self._tasks) >= self._concurrency:
+                # 空きが出るか停止要求が来るまで待つ
+                stopping = asyncio.create_task(self._stopping.wait())
+                await asyncio.wait({*self._tasks, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                stopping.cancel()
+                continue
+            if time.monotonic() >= next_sweep:
+                await self._sweep()
+                next_sweep = time.monotonic() + _SWEEP_INTERVAL_SECONDS
+            try:
+                job = await self._repository.claim(
+                    self.id, lease_seconds=self._lease_seconds, wait_seconds=self._poll_seconds
+                )
+            except Exception:
+                logger.exception("run worker %s failed to claim a job", self.id)
+                await asyncio.sleep(self._poll_seconds)
+                continue
+            if job is None:
+                continue
+            task = asyncio.create_task(self._execute(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=self._shutdown_grace_seconds)
+            if pending:
+                logger.warning("run worker %s cancelling %d running jobs", self.id, len(pending))
+                for job_id in list(self._runs):
+                    self._cancel_run(job_id)
+                await asyncio.gather(*pending, return_exceptions=True)
+        logger.info("run worker %s stopped", self.id)
+
+    async def _sweep(self) -> None:
+        try:
+            expired = await self._repository.fail_expired()
+            if expired:
+                logger.warning("marked %d run jobs with expired leases as failed", expired)
+            await self._repository.delete_finished_before(
+                datetime.utcnow() - timedelta(seconds=self._retention_seconds)
+            )
+        except Exception:
+            logger.exception("run worker %s failed to sweep run jobs", self.id)
+
+    def _cancel_run(self, job_id: str) -> None:
+        task = self._runs.get(job_id)
+        if task is not None and not task.done():
+            self._cancelled.add(job_id)
+            task.cancel()
+
+    async def _execute(self, job: RunJob) -> None:
+        # API 側のリクエストと同じ相関 ID でログを出す（このタスクのコンテキストにだけ設定される）
+        bind_request_id(job.payload.get("request_id") or job.id)
+        writer = _JobEventWriter(self._repository, job.id, self._flush_interval)
+        run_task = asyncio.create_task(self._run_job(job, writer))
+        self._runs[job.id] = run_task
+        watcher = asyncio.create_task(self._watch(job.id, run_task))
+        status: RunJobStatus = "completed"
+        error: Optional[str] = None
+        try:
+            await run_task
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except Exception as exc:
+            logger.exception("run job %s failed", job.id)
+            status, error = "failed", repr(exc)
+        finally:
+            watcher.cancel()
+            # heartbeat の途中で終わらせ、下の finish と競合しないようにする
+            await asyncio.gather(watcher, return_exceptions=True)
+            self._runs.pop(job.id, None)
+        # チャットの実行はキャンセルを握りつぶして正常終了することがあるため、要求の有無で判定する
+        if job.id in self._cancelled:
+            self._cancelled.discard(job.id)
+            status = "cancelled"
+        try:
+            await writer.close()
+        except Exception as exc:
+            logger.exception("failed to write events of run job %s", job.id)
+            if status == "completed":
+                status, error = "failed", repr(exc)
+        try:
+            await self._repository.finish(job.id, self.id, status, error=error)
+        except Exception:
+            logger.exception("failed to record the result of run job %s", job.id)
+
+    async def _run_job(self, job: RunJob, writer: _JobEventWriter) -> None:
+        if job.kind != "chat":
+            raise ValueError(f"Unknown run job kind: {job.kind}")
+        chat_run = await prepare_chat_run(job.payload["agent_id"], OwnerAgentRequest(**job.payload["request"]))
+        async for chunk in chat_run.events():
+            writer.add(chunk)
+
+    async def _watch(self, job_id: str, run_task: asyncio.Task) -> None:
+        """Heartbeat the lease and cancel the run when the API asks for it."""
+        interval = self._lease_seconds / 3
+        next_heartbeat = time.monotonic() + interval
+        while not run_task.done():
+            try:
+                if await self._repository.wait_for_cancel(
+                    job_id, timeout=max(0.0, next_heartbeat - time.monotonic())
+                ):
+                    self._cancel_run(job_id)
+                    return
+                # 待機が早く戻っても、リースの延長は interval 毎にだけ行う
+                if time.monotonic() < next_heartbeat:
+                    continue
+                next_heartbeat = time.monotonic() + interval
+                if not await self._repository.heartbeat(job_id, self.id, lease_seconds=self._lease_seconds):
+                    # リースを失った（期限切れで failed にされた）ジョブは続けても結果を残せない
+                    logger.warning("run job %s lost its lease; cancelling", job_id)
+                    self._cancel_run(job_id)
+                    return
+            except Exception:
+                # 一時的な DB エラーはリース期限内に次の heartbeat で取り戻せる
+                logger.exception("failed to heartbeat run job %s", job_id)
+                await asyncio.sleep(interval)
@@ -1,5 +1,8 @@
-
+import asyncio
+import contextvars
+import logging
 import time
+from typing import List, Optional
 
 from agents import (
     Agent,
@@ -10,17 +13,34 @@ from agents import (
     function_tool,
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
+from agents.models.openai_provider import DEFAULT_MODEL
 from openai.types.responses import ResponseTextDeltaEvent
 from typing_extensions import TypedDict
 
+from src.core.v1.admission.controller import AdmissionRejected
+from src.core.v1.admission.di import child_run_admission
+from src.core.v1.agents.cancellation import current_cancellation_scope
+from src.core.v1.agents.response_cache import CachedResponse
+from src.core.v1.agents.run_config import agent_run_config, child_response_cache
 from src.core.v1.instructions.owner_agent_instruction import owner_agent_instruction
+from src.core.v1.memory.di import semantic_memory
 from src.core.v1.tools.send_mail_tools import send_gmail_tool
+from src.infra.logging import bind_agent_id
+from src.infra.metrics.app_metrics import (
+    agent_run_duration_seconds,
+    agent_time_to_first_token_seconds,
+    agent_tool_invocations_total,
+)
 from src.infra.repositories.generated_agent import di as generated_agent_di
 from src.infra.repositories.generated_agent.types import (
+    AgentRunStatus,
     CreateGeneratedAgentDto,
 )
 from src.infra.repositories.generated_agent_messages import di as message_di
 from src.infra.repositories.generated_agent_messages.types import CreateMessageDto
+from src.infra.tracing import get_current_span, tracer
+
+logger = logging.getLogger(__name__)
 
 
 class AgentBuildConfig(TypedDict, total=False):
@@ -32,18 +52,19 @@ class AgentBuildConfig(TypedDict, total=False):
     owner_agent_id: str
 
 
-# エージェント実行結果を保存するグローバル変数（SSEで中間結果を送信するため）
-_agent_execution_stream = None
+# エージェント実行結果を送るキュー（SSEで中間結果を送信するため）
+# 同じプロセスで複数のチャットが同時に動くため、実行（Runner のタスク）毎に ContextVar で持つ
+_agent_execution_stream: contextvars.ContextVar[Optional[asyncio.Queue]] = contextvars.ContextVar(
+    "agent_execution_stream", default=None
+)
 
 def set_agent_execution_stream(stream):
-    """SSEストリームを設定する（ルートから呼び出される）"""
-    global _agent_execution_stream
-    _agent_execution_stream = stream
+    """SSEストリームを設定する（Runner 実行前にチャットの実行から呼び出される）"""
+    _agent_execution_stream.set(stream)
 
 def clear_agent_execution_stream():
     """SSEストリームをクリアする"""
-    global _agent_execution_stream
-    _agent_execution_stream = None
+    _agent_execution_stream.set(None)
 
 # シンプルにエージェントを生成するツール
 @function_tool()
@@ -68,6 +89,29 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
 
     Returns a string (child agent response) or raises RuntimeError on failure.
     """
+    tool_name = config.get("tool") if isinstance(config, dict) else getattr(config, "tool", None)
+    agent_name = (
+        config.get("name", "ChildAgent") if isinstance(config, dict) else
+        getattr(config, "name", "ChildAgent")
+    )
+    owner_id = config.get("owner_id", "") if isinstance(config, dict) else getattr(config, "owner_id", "")
+    # 1 オーナーが同時に起動できる子エージェント数を制限する
+    try:
+        slot = await child_run_admission.acquire(owner_id or "anonymous")
+    except AdmissionRejected as exc:
+        raise RuntimeError(
+            f"Too many child agents are running for this owner; retry after {exc.retry_after}s"
+        ) from exc
+    # 子エージェントの実行を親リクエストのトレース配下のスパンとして記録する
+    async with slot:
+        with tracer.start_as_current_span(
+            "agent.child_run",
+            {"agent.name": agent_name, "tool.name": tool_name or "none"},
+        ):
+            return await _run_child_agent(config)
+
+
+async def _run_child_agent(config: AgentBuildConfig) -> str:
     tool = None
 
     is_dict = isinstance(config, dict)
@@ -95,8 +139,8 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
     unique_tool_id = f"{agent_name}-{int(time.time() * 1000)}"
     
     # ストリームに通知: エージェント作成開始
-    if _agent_execution_stream:
-        await _agent_execution_stream.put({
+    if _agent_execution_stream.get() is not None:
+        await _agent_execution_stream.get().put({
             "type": "agent_creating",
             "data": {
                 "id": unique_tool_id,
@@ -113,10 +157,14 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
         owner_id=owner_id,
         owner_agent_id=owner_agent_id,
     )
+    get_current_span().set_attribute("agent.id", agent_id)
+    bind_agent_id(agent_id)
+    # 同じ定義の子エージェントは同時に複数実行されることがあるため、状態は実行毎に記録する
+    run_id = await _create_run(agent_id)
     
     # ストリームに通知: エージェント作成完了
-    if _agent_execution_stream:
-        await _agent_execution_stream.put({
+    if _agent_execution_stream.get() is not None:
+        await _agent_execution_stream.get().put({
             "type": "agent_created",
             "data": {
                 "id": unique_tool_id,
@@ -126,6 +174,32 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
                 "status": "created"
             }
         })
+    user_input = (
+        config.get("user_input") if isinstance(config, dict) else
+        getattr(config, "user_input", "")
+    )
+
+    # 同じ指示・ツール・入力への応答が残っていれば、モデルを呼ばずにその出力をストリームで再生する
+    # （意味記憶は実行の度に増えて毎回変わるため、キーには含めない）
+    cache_key = None
+    if child_response_cache is not None:
+        cache_key = child_response_cache.key_for(
+            owner_id=owner_id,
+            instruction=str(instruction or ""),
+            tool_name=tool_name,
+            user_input=str(user_input or ""),
+            model_settings=_model_settings_key(),
+        )
+        cached = child_response_cache.get(cache_key) if cache_key is not None else None
+        get_current_span().set_attribute("cache.hit", cached is not None)
+        if cached is not None:
+            await _replay_cached_response(agent_id, run_id, agent_name, cached)
+            await _complete_child_run(config, agent_id, agent_name, owner_id, user_input, cached.final_text)
+            return cached.final_text
+
+    # 過去の全履歴を渡す代わりに、意味的に近い過去メッセージ上位k件のみを指示に含める
+    memory_context = await _build_memory_context(owner_id, str(user_input or ""))
+
     # join で non-str が混入すると "sequence item 2: expected str instance, module found" が発生する可能性があるため
     # 安全のため map(str, ...) で文字列化して結合する
     instruction = "\n".join(
@@ -135,6 +209,7 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
                 RECOMMENDED_PROMPT_PREFIX,
                 instruction,
                 owner_agent_instruction,
+                memory_context,
             ),
         ),
     )
@@ -144,13 +219,9 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
         instructions=instruction,
         tools=[tool],
     )
-    user_input = (
-        config.get("user_input") if isinstance(config, dict) else
-        getattr(config, "user_input", "")
-    )
     # ストリームに通知: エージェント実行開始
-    if _agent_execution_stream:
-        await _agent_execution_stream.put({
+    if _agent_execution_stream.get() is not None:
+        await _agent_execution_stream.get().put({
             "type": "agent_executing",
             "data": {
                 "id": agent_id,
@@ -158,52 +229,124 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
                 "status": "executing"
             }
         })
+    await _update_run_status(run_id, "executing")
+    tool_label = tool_name or "none"
+    agent_tool_invocations_total.labels(tool_label).inc()
+    run_started = time.perf_counter()
+
+    result = Runner.run_streamed(agent, user_input, run_config=agent_run_config)
+    # 親のチャットが切断されたら子エージェントの実行も止める
+    cancellation = current_cancellation_scope()
+    if cancellation is not None:
+        cancellation.register(result)
     
-    result = Runner.run_streamed(agent, user_input)
-    
-    # エージェントの応答を蓄積
+    # エージェントの応答を蓄積（差分はキャッシュからの再生用に分けて持つ）
     agent_response = ""
+    deltas: List[str] = []
     
-    async for event in result.stream_events():
-        if (
-            event.type == "raw_response_event"
-            and isinstance(event.data, ResponseTextDeltaEvent)
-        ):
-            delta = event.data.delta
-            agent_response += delta
-            print(delta, end="", flush=True)
-            
-            # ストリームに通知: エージェントの中間応答
-            if _agent_execution_stream:
-                await _agent_execution_stream.put({
-                    "type": "agent_thinking",
-                    "data": {
-                        "id": agent_id,
-                        "name": agent_name,
-                        "delta": delta,
-                        "status": "thinking"
-                    }
-                })
-        elif event.type == "agent_updated_stream_event":
-            print(f"{agent.name} の応答を待っています...")
-            # ストリームに通知: エージェント更新
-            if _agent_execution_stream:
-                await _agent_execution_stream.put({
-                    "type": "agent_updated",
-                    "data": {
-                        "id": agent_id,
-                        "name": agent.name,
-                        "status": "waiting"
-                    }
-                })
-
-    # 終了した時
-    print(f"\n{agent.name} の実行が完了しました。")
-    final_text = result.final_output_as(str)
-    
+    try:
+        async for event in result.stream_events():
+            if (
+                event.type == "raw_response_event"
+                and isinstance(event.data, ResponseTextDeltaEvent)
+            ):
+                delta = event.data.delta
+                if not agent_response:
+                    agent_time_to_first_token_seconds.labels("child", tool_label).observe(
+                        time.perf_counter() - run_started
+                    )
+                    # DB 更新はトークン毎ではなく最初の差分で 1 回だけ行う
+                    await _update_run_status(run_id, "thinking")
+                agent_response += delta
+                deltas.append(delta)
+                # トークン毎のログは量が多いためサンプリングする（LOG_SAMPLE_EVERY）
+                logger.debug("child agent delta", extra={"agent_id": agent_id, "delta": delta, "sample": "child_agent_delta"})
+
+                # ストリームに通知: エージェントの中間応答
+                if _agent_execution_stream.get() is not None:
+                    await _agent_execution_stream.get().put({
+                        "type": "agent_thinking",
+                        "data": {
+                            "id": agent_id,
+                            "name": agent_name,
+                            "delta": delta,
+                            "status": "thinking"
+                        }
+                    })
+            elif event.type == "agent_updated_stream_event":
+                logger.info("waiting for child agent %s", agent.name, extra={"agent_id": agent_id})
+                # ストリームに通知: エージェント更新
+                if _agent_execution_stream.get() is not None:
+                    await _agent_execution_stream.get().put({
+                        "type": "agent_updated",
+                        "data": {
+                            "id": agent_id,
+                            "name": agent.name,
+                            "status": "waiting"
+                        }
+                    })
+
+        # stream_events はキャンセルを握りつぶして終了するため、未完了ならキャンセルとして扱う
+        if not result.is_complete or (cancellation is not None and cancellation.cancelled):
+            raise asyncio.CancelledError()
+
+        # 終了した時
+        logger.info("child agent %s completed", agent.name, extra={"agent_id": agent_id})
+        final_text = result.final_output_as(str)
+    except asyncio.CancelledError:
+        result.cancel()
+        agent_run_duration_seconds.labels("child", tool_label, "cancelled").observe(time.perf_counter() - run_started)
+        await _update_run_status(run_id, "cancelled", **_usage_of(result))
+        raise
+    except Exception:
+        agent_run_duration_seconds.labels("child", tool_label, "failed").observe(time.perf_counter() - run_started)
+        await _update_run_status(run_id, "failed", **_usage_of(result))
+        raise
+    finally:
+        if cancellation is not None:
+            cancellation.unregister(result)
+    agent_run_duration_seconds.labels("child", tool_label, "completed").observe(time.perf_counter() - run_started)
+    await _update_run_status(run_id, "completed", **_usage_of(result))
+    if cache_key is not None:
+        child_response_cache.put(cache_key, deltas, final_text)
+
+    await _complete_child_run(config, agent_id, agent_name, owner_id, user_input, final_text)
+    return final_text
+
+
+async def _replay_cached_response(agent_id: str, run_id: Optional[str], agent_name: str, cached: CachedResponse) -> None:
+    """キャッシュした応答を、モデル実行時と同じイベントの並びでストリームに流す"""
+    stream = _agent_execution_stream.get()
+    if stream is not None:
+        await stream.put({
+            "type": "agent_executing",
+            "data": {
+                "id": agent_id,
+                "name": agent_name,
+                "status": "executing"
+            }
+        })
+    await _update_run_status(run_id, "executing")
+    if stream is not None:
+        for delta in cached.deltas:
+            await stream.put({
+                "type": "agent_thinking",
+                "data": {
+                    "id": agent_id,
+                    "name": agent_name,
+                    "delta": delta,
+                    "status": "thinking"
+                }
+            })
+    # モデルを呼んでいないためトークン使用量は 0 として記録する
+    await _update_run_status(run_id, "completed", input_tokens=0, output_tokens=0)
+
+
+async def _complete_child_run(config: AgentBuildConfig, agent_id: str, agent_name: str, owner_id: str, user_input, final_text: str) -> None:
+    """完了をストリームに通知し、入力と応答をメッセージとして保存する"""
     # ストリームに通知: エージェント実行完了
-    if _agent_execution_stream:
-        await _agent_execution_stream.put({
+    if _agent_execution_stream.get() is not None:
+        await _agent_execution_stream.get().put({
             "type": "agent_completed",
             "data": {
                 "id": agent_id,
@@ -222,7 +365,7 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
         else:
             session_id = str(getattr(config, "session_id", "") or "")
 
-        await message_di.message_repository.create(
+        user_message = await message_di.message_repository.create(
             CreateMessageDto(
                 agent_id=agent_id,
                 session_id=session_id,
@@ -231,7 +374,7 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
             )
         )
 
-        await message_di.message_repository.create(
+        assistant_message = await message_di.message_repository.create(
             CreateMessageDto(
                 agent_id=agent_id,
                 session_id=session_id,
@@ -239,16 +382,69 @@ async def run_agent_tool(config: AgentBuildConfig) -> str:
                 content=str(final_text),
             )
         )
+
+        # ベクトル化はバックグラウンドでバッチ処理される
+        if semantic_memory is not None:
+            semantic_memory.enqueue(user_message, owner_id)
+            semantic_memory.enqueue(assistant_message, owner_id)
     except Exception:
         # 保存失敗はログに出すが処理は継続
         pass
 
-    return final_text
+
+async def _create_run(agent_id: str) -> Optional[str]:
+    """実行の記録を作成する（作成に失敗した場合は None を返し、ステータスを保存せずに実行を続ける）"""
+    try:
+        return await generated_agent_di.generated_agent_repository.create_run(agent_id)
+    except Exception:
+        logger.exception("failed to create a run of agent %s", agent_id)
+        return None
+
+
+async def _update_run_status(run_id: Optional[str], status: AgentRunStatus, **usage) -> None:
+    """実行ステータスを保存する（保存に失敗してもエージェントの実行は継続する）"""
+    if run_id is None:
+        return
+    repository = generated_agent_di.generated_agent_repository
+    try:
+        if status == "executing":
+            await repository.start_run(run_id)
+        elif status in ("completed", "failed", "cancelled"):
+            await repository.finish_run(run_id, status, **usage)
+        else:
+            await repository.set_run_status(run_id, status)
+    except Exception:
+        logger.exception("failed to update status of run %s to %s", run_id, status)
+
+
+def _model_settings_key() -> dict:
+    model = agent_run_config.model
+    model_name = model if isinstance(model, str) else getattr(model, "model", None) or DEFAULT_MODEL
+    settings = agent_run_config.model_settings
+    return {"model": str(model_name), "settings": settings.to_json_dict() if settings is not None else None}
+
+
+def _usage_of(result) -> dict:
+    usage = result.context_wrapper.usage
+    return {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens}
+
+
+async def _build_memory_context(owner_id: str, user_input: str) -> str:
+    if semantic_memory is None:
+        return ""
+    try:
+        hits = await semantic_memory.retrieve(owner_id, user_input)
+    except Exception:
+        # 記憶の取得に失敗してもエージェントの実行は継続する
+        logger.exception("failed to retrieve semantic memory for owner %s", owner_id)
+        return ""
+    return semantic_memory.format_context(hits)
 
 
 async def save_db(name, tool_name, instruction, owner_id, owner_agent_id) -> str:
+    # 同じオーナーで name/instruction/tool が同一のエージェントは再利用し、メッセージを追記する
     try:
-        agent = await generated_agent_di.generated_agent_repository.create(
+        agent = await generated_agent_di.generated_agent_repository.get_or_create(
             CreateGeneratedAgentDto(
                 owner_id=owner_id,
                 parent_id=owner_agent_id,
@@ -257,9 +453,10 @@ async def save_db(name, tool_name, instruction, owner_id, owner_agent_id) -> str
                 tool=tool_name,
         )
         )
-    except Exception as e:
-        print("Error occurred while saving to DB:", e)
-    print(agent)
+    except Exception:
+        logger.exception("failed to save generated agent %s", name)
+        raise
+    logger.debug("saved generated agent %s", agent.id, extra={"agent_id": agent.id})
     return agent.id
 
 
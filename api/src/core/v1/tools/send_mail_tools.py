@@ -7,6 +7,8 @@ from typing import Optional
 
 from agents import function_tool
 
+from src.infra.tracing import tracer
+
 
 @function_tool()
 async def send_gmail_tool(
@@ -73,10 +75,11 @@ async def send_gmail_tool(
         
         # SMTP接続とメール送信
         context = ssl.create_default_context()
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls(context=context)
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, all_recipients, message.as_string())
+        with tracer.start_as_current_span("smtp.send", {"smtp.recipients": len(all_recipients)}):
+            with smtplib.SMTP(smtp_server, smtp_port) as server:
+                server.starttls(context=context)
+                server.login(sender_email, sender_password)
+                server.sendmail(sender_email, all_recipients, message.as_string())
         
         result = {
             "status": "success",
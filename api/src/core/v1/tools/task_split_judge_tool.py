@@ -2,6 +2,8 @@ from typing import TypedDict
 
 from agents import function_tool
 
+from src.infra.tracing import tracer
+
 
 class TaskSplitJudgeResult(TypedDict):
     should_split: bool
@@ -16,7 +18,8 @@ async def task_split_judge_tool(user_request: str) -> TaskSplitJudgeResult:
     LLM判定ロジックをラップして呼び出します。
     """
     # LLM判定ロジックをラップ
-    result = await llm_judge(user_request)
+    with tracer.start_as_current_span("tool.task_split_judge"):
+        result = await llm_judge(user_request)
     return result
 
 # LLM判定ロジック（実装はRunner/LLM API等に依存、ここはラッパー）
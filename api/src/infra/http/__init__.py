@@ -0,0 +1,8 @@
+from .compression import CompressionMiddleware
+from .conditional import etag_matches, make_etag
+
+__all__ = [
+    "CompressionMiddleware",
+    "etag_matches",
+    "make_etag",
+]
@@ -0,0 +1,23 @@
+"""ETag / If-None-Match handling for routes that can tell cheaply whether their response changed."""
+
+import hashlib
+from typing import Optional
+
+
+def make_etag(version: str, *parts: object) -> str:
+    """
+    Weak ETag from a repository version token and the request parameters that
+    shape the response (weak because compression may change the bytes).
+    """
+    digest = hashlib.blake2b(repr((version, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
@@ -0,0 +1,25 @@
+from .context import (
+    bind_agent_id,
+    bind_request_id,
+    describe_context,
+    get_agent_id,
+    get_request_id,
+    reset_request_id,
+)
+from .di import setup_logging
+from .middleware import RequestIdMiddleware
+from .setup import JsonFormatter, configure_logging, shutdown_logging
+
+__all__ = [
+    "JsonFormatter",
+    "RequestIdMiddleware",
+    "bind_agent_id",
+    "bind_request_id",
+    "configure_logging",
+    "describe_context",
+    "get_agent_id",
+    "get_request_id",
+    "reset_request_id",
+    "setup_logging",
+    "shutdown_logging",
+]
@@ -0,0 +1,51 @@
+import contextvars
+import uuid
+from typing import Any, Dict, Optional
+
+# リクエスト（またはワーカーのジョブ）毎の相関 ID。タスクは生成時のコンテキストを引き継ぐため、
+# リクエストから起動した実行・子エージェントのログにも同じ ID が付く
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+# リクエストの ASGI scope（ルーティング後は scope["route"] からルートのパスを取れる）
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_scope", default=None)
+# 実行中のエージェント（オーナーのチャット・子エージェント）の ID
+_agent_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("agent_id", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def bind_request_id(request_id: Optional[str] = None) -> "contextvars.Token[Any]":
+    """Set the correlation id of the current context (a new one if none is given)."""
+    return _request_id.set(request_id or uuid.uuid4().hex)
+
+
+def reset_request_id(token: "contextvars.Token[Any]") -> None:
+    _request_id.reset(token)
+
+
+def bind_request_scope(scope: dict) -> "contextvars.Token[Any]":
+    return _request_scope.set(scope)
+
+
+def reset_request_scope(token: "contextvars.Token[Any]") -> None:
+    _request_scope.reset(token)
+
+
+def get_agent_id() -> Optional[str]:
+    return _agent_id.get()
+
+
+def bind_agent_id(agent_id: str) -> "contextvars.Token[Any]":
+    return _agent_id.set(agent_id)
+
+
+def describe_context(context: contextvars.Context) -> Dict[str, Optional[str]]:
+    """request_id, route (the path template once routed), path and agent_id bound in context."""
+    scope = context.get(_request_scope) or {}
+    return {
+        "request_id": context.get(_request_id),
+        "route": getattr(scope.get("route"), "path", None),
+        "path": scope.get("path"),
+        "agent_id": context.get(_agent_id),
+    }
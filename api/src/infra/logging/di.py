@@ -0,0 +1,13 @@
+from src.config import get_env_variable
+
+from .setup import configure_logging
+
+
+def setup_logging() -> None:
+    """Configure logging from LOG_LEVEL / LOG_FORMAT / LOG_QUEUE_SIZE / LOG_SAMPLE_EVERY."""
+    configure_logging(
+        level=get_env_variable("LOG_LEVEL", "INFO"),
+        fmt=get_env_variable("LOG_FORMAT", "json"),
+        queue_size=int(get_env_variable("LOG_QUEUE_SIZE", "10000")),
+        sample_every=int(get_env_variable("LOG_SAMPLE_EVERY", "100")),
+    )
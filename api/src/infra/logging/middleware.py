@@ -0,0 +1,43 @@
+from .context import bind_request_id, bind_request_scope, reset_request_id, reset_request_scope
+
+REQUEST_ID_HEADER = b"x-request-id"
+# クライアントから渡された ID をそのままログに出すため、長すぎるものは使わない
+_MAX_REQUEST_ID_LENGTH = 128
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware binding a correlation id to each HTTP request and
+    WebSocket connection. The id is taken from the X-Request-ID header when
+    the client sends one and is echoed back on HTTP responses.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER:
+                incoming = value.decode("latin-1").strip()[:_MAX_REQUEST_ID_LENGTH] or None
+                break
+        token = bind_request_id(incoming)
+        scope_token = bind_request_scope(scope)
+        request_id = token.var.get()
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_scope(scope_token)
+            reset_request_id(token)
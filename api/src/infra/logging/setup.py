@@ -0,0 +1,149 @@
+"""
+Logging setup for the API and the run worker.
+
+Records are put on a bounded in-memory queue by the calling thread and
+formatted and written to stdout by a background thread (QueueListener), so a
+slow log collector never blocks the event loop; when the queue is full the
+record is dropped and counted instead. Records logged with
+extra={"sample": "<category>"} (e.g. per-token events) are sampled: only one
+in every LOG_SAMPLE_EVERY records of each category is kept.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
+
+from src.infra.metrics.app_metrics import log_records_dropped_total
+
+from .context import get_agent_id, get_request_id
+
+# LogRecord の標準属性（これ以外の属性は extra として JSON に出力する）
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "request_id", "agent_id", "sample"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "agent_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Attaches the correlation id (and the running agent's id) of the logging context to the record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # ContextVar はログを出したスレッドでしか読めないため、キューに入れる前に付ける
+        if not hasattr(record, "request_id"):
+            record.request_id = get_request_id()
+        if not hasattr(record, "agent_id"):
+            record.agent_id = get_agent_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in every `every` records per sample category (0 drops them all)."""
+
+    def __init__(self, every: int) -> None:
+        super().__init__()
+        self._every = every
+        self._counters: Dict[str, Iterator[int]] = defaultdict(itertools.count)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        category = getattr(record, "sample", None)
+        if category is None:
+            return True
+        if self._every <= 0:
+            return False
+        return next(self._counters[category]) % self._every == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of waiting when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数は後から変更されうるためメッセージだけここで確定させ、整形は出力スレッドで行う
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.inc()
+
+
+def configure_logging(
+    *,
+    level: str = "INFO",
+    fmt: str = "json",
+    queue_size: int = 10000,
+    sample_every: int = 100,
+) -> None:
+    """Route the root logger through the queue handler (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    elif fmt == "text":
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s"))
+    else:
+        raise RuntimeError("LOG_FORMAT must be 'json' or 'text'.")
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(sample_every))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    # uvicorn は自前のハンドラで直接書き出すため、ルートロガー（キュー）経由に切り替える
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # 終了時にキューに残ったログを書き出す
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
@@ -0,0 +1,13 @@
+from .registry import Counter, Gauge, Histogram, MetricsRegistry
+from .app_metrics import registry, track_pool
+from .event_loop import EventLoopLagMonitor
+
+__all__ = [
+    "Counter",
+    "EventLoopLagMonitor",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "registry",
+    "track_pool",
+]
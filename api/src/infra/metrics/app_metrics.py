@@ -0,0 +1,201 @@
+"""Application metrics exposed at /metrics."""
+
+from typing import Any, Callable, Optional
+
+from .registry import MetricsRegistry
+
+registry = MetricsRegistry()
+
+# エージェント実行（agent は "owner" / "child"。エージェント名はカーディナリティが高いためラベルにしない）
+agent_time_to_first_token_seconds = registry.histogram(
+    "agent_time_to_first_token_seconds",
+    "Time from run start to the first streamed text delta.",
+    ["agent", "tool"],
+)
+agent_run_duration_seconds = registry.histogram(
+    "agent_run_duration_seconds",
+    "Total agent run time.",
+    ["agent", "tool", "status"],
+)
+agent_tool_invocations_total = registry.counter(
+    "agent_tool_invocations_total",
+    "Tool invocations requested by agents.",
+    ["tool"],
+)
+child_response_cache_requests_total = registry.counter(
+    "child_response_cache_requests_total",
+    "Child-agent response cache lookups (hit, miss, expired, bypass).",
+    ["result"],
+)
+child_response_cache_size = registry.gauge(
+    "child_response_cache_size",
+    "Child-agent response cache usage (unit is entries / chars).",
+    ["unit"],
+)
+
+# モデル呼び出し（model はモデル名）
+model_call_retries_total = registry.counter(
+    "model_call_retries_total",
+    "Model calls retried after a retryable error (rate_limit, server_error).",
+    ["model", "reason"],
+)
+model_rate_limit_wait_seconds = registry.histogram(
+    "model_rate_limit_wait_seconds",
+    "Time a model call waited for the client-side rate limiter.",
+    ["model"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+model_circuit_state = registry.gauge(
+    "model_circuit_state",
+    "Circuit breaker state per model (0=closed, 1=open, 2=half-open).",
+    ["model"],
+)
+
+# ストリーミング
+sse_connections_open = registry.gauge(
+    "sse_connections_open",
+    "Currently open SSE streams.",
+    ["stream"],
+)
+websocket_connections_open = registry.gauge(
+    "websocket_connections_open",
+    "Currently open WebSocket connections.",
+    ["endpoint"],
+)
+tool_event_queue_depth = registry.histogram(
+    "tool_event_queue_depth",
+    "Pending tool events observed each time the chat stream drains the queue.",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250),
+)
+queue_depth = registry.gauge(
+    "queue_depth",
+    "Items waiting in background queues.",
+    ["queue"],
+)
+
+# 実行枠の制御（controller は "chat" / "child_run"）
+admission_queue_wait_seconds = registry.histogram(
+    "admission_queue_wait_seconds",
+    "Time a run waited for a slot, by outcome (admitted, rejected).",
+    ["controller", "outcome"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+admission_rejections_total = registry.counter(
+    "admission_rejections_total",
+    "Runs rejected by admission control (queue_full, owner_queue_full, timeout).",
+    ["controller", "reason"],
+)
+admission_in_flight = registry.gauge(
+    "admission_in_flight",
+    "Runs currently holding a slot.",
+    ["controller"],
+)
+admission_queued = registry.gauge(
+    "admission_queued",
+    "Runs waiting for a slot.",
+    ["controller"],
+)
+detached_runs = registry.gauge(
+    "detached_runs",
+    "Detached chat runs kept by the run manager (state is running / finished).",
+    ["state"],
+)
+
+# Realtime のクライアントシークレット（variant はセッション設定の名前）
+realtime_secret_pool_size = registry.gauge(
+    "realtime_secret_pool_size",
+    "Pre-minted realtime client secrets ready to hand out.",
+    ["variant"],
+)
+realtime_secret_requests_total = registry.counter(
+    "realtime_secret_requests_total",
+    "Realtime token requests by how they were served (pooled, minted).",
+    ["variant", "source"],
+)
+realtime_secrets_discarded_total = registry.counter(
+    "realtime_secrets_discarded_total",
+    "Pre-minted client secrets dropped unused because they were about to expire.",
+    ["variant"],
+)
+realtime_secret_mint_duration_seconds = registry.histogram(
+    "realtime_secret_mint_duration_seconds",
+    "Time to mint a realtime client secret, by outcome (ok, error).",
+    ["outcome"],
+)
+
+# HTTP
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request handling time until the response starts.",
+    ["method", "route", "status"],
+)
+
+# DB
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds",
+    "Repository method latency including pool acquisition.",
+    ["repository", "method", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+db_reads_total = registry.counter(
+    "db_reads_total",
+    "Repository reads by where they ran: replica, primary (read-your-writes) or fallback (no usable replica).",
+    ["repository", "target"],
+)
+db_pool_connections = registry.gauge(
+    "db_pool_connections",
+    "asyncpg pool connections by state (size, idle, max).",
+    ["repository", "state"],
+)
+
+# セマンティック記憶の検索（method は exact / index / index_fallback）
+memory_searches_total = registry.counter(
+    "memory_searches_total",
+    "Semantic memory searches by how the owner's rows were found.",
+    ["method"],
+)
+
+# メッセージのパーティション
+message_partitions_archived_total = registry.counter(
+    "message_partitions_archived_total",
+    "Monthly message partitions archived to files and dropped by the retention policy.",
+)
+
+# イベントループ
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop lag sampler's wake-ups beyond their scheduled time.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+event_loop_blocks_total = registry.counter(
+    "event_loop_blocks_total",
+    "Callbacks that held the event loop longer than the watchdog threshold, by route.",
+    ["route"],
+)
+event_loop_block_seconds = registry.histogram(
+    "event_loop_block_seconds",
+    "How long the event loop was held by callbacks caught by the watchdog, by route.",
+    ["route"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# ログ
+log_records_dropped_total = registry.counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full (the output could not keep up).",
+)
+
+def track_pool(repository: str, get_pool: Callable[[], Optional[Any]]) -> None:
+    """Report asyncpg pool usage at scrape time (0 while the pool is not created)."""
+
+    def reader(method: str) -> Callable[[], float]:
+        def read() -> float:
+            pool = get_pool()
+            return float(getattr(pool, method)()) if pool is not None else 0.0
+
+        return read
+
+    db_pool_connections.labels(repository, "size").set_function(reader("get_size"))
+    db_pool_connections.labels(repository, "idle").set_function(reader("get_idle_size"))
+    db_pool_connections.labels(repository, "max").set_function(reader("get_max_size"))
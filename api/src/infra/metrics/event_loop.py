@@ -0,0 +1,70 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from .app_metrics import event_loop_lag_seconds
+
+
+class EventLoopLagMonitor:
+    """
+    Background task sleeping interval_seconds at a time and recording how late
+    each wake-up is. A blocked loop shows up as lag: a callback that holds the
+    loop for 300 ms delays the next wake-up by about 300 ms. The largest lag
+    of the last window_seconds is kept for health checks.
+    """
+
+    def __init__(self, *, interval_seconds: float = 0.5, window_seconds: float = 30.0) -> None:
+        self._interval = interval_seconds
+        self._window = window_seconds
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def window_seconds(self) -> float:
+        return self._window
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def lag(self) -> float:
+        """Lag of the most recent sample."""
+        return self._last_lag
+
+    @property
+    def max_lag(self) -> float:
+        """Largest lag within the window."""
+        self._trim(time.monotonic())
+        return max((lag for _, lag in self._samples), default=0.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _trim(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > self._window:
+            self._samples.popleft()
+
+    async def _run(self) -> None:
+        while True:
+            scheduled = time.monotonic() + self._interval
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            lag = max(0.0, now - scheduled)
+            self._last_lag = lag
+            self._samples.append((now, lag))
+            self._trim(now)
+            event_loop_lag_seconds.observe(lag)
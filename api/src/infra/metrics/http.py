@@ -0,0 +1,34 @@
+import time
+
+from .app_metrics import http_request_duration_seconds
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency until the response starts.
+    (BaseHTTPMiddleware is avoided because it buffers streaming responses.)
+    Streaming responses such as SSE are therefore measured to their first byte.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                route = getattr(scope.get("route"), "path", "unmatched")
+                http_request_duration_seconds.labels(scope["method"], route, status).observe(
+                    time.perf_counter() - start
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,144 @@
+"""
+Event-loop blocking detector.
+
+A heartbeat task on the loop records when it last ran; a watchdog thread
+checks it every few milliseconds. When the heartbeat is late by more than
+the threshold, some callback is holding the loop, so the thread captures
+the loop thread's current stack and the request id, route and agent id of
+the task being run, and logs them once per stall. The stall's total length
+is recorded when the loop gets going again.
+
+The running task's context is found through a task factory that keeps the
+Context of every task, so the detector works with uvloop as well.
+"""
+
+import asyncio
+import contextvars
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from typing import Any, Dict, Optional
+
+from src.infra.logging.context import describe_context
+
+from .app_metrics import event_loop_block_seconds, event_loop_blocks_total
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopWatchdog:
+    def __init__(
+        self,
+        *,
+        threshold_seconds: float = 0.1,
+        heartbeat_seconds: float = 0.05,
+        stack_limit: int = 40,
+    ) -> None:
+        self._threshold = threshold_seconds
+        self._heartbeat = heartbeat_seconds
+        self._stack_limit = stack_limit
+        self._beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._contexts: "weakref.WeakKeyDictionary[asyncio.Task, contextvars.Context]" = weakref.WeakKeyDictionary()
+        # 報告済みの停止（開始時のハートビート時刻と報告内容）
+        self._stall_beat: Optional[float] = None
+        self._stall_route = "none"
+
+    def start(self) -> None:
+        """Start watching the running loop (call from the loop)."""
+        if self._thread is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        # 既にタスクファクトリが設定されている場合は上書きしない（タスクの属性は出せなくなる）
+        if loop.get_task_factory() is None:
+            loop.set_task_factory(self._task_factory)
+        self._beat = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._run_heartbeat())
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._loop is not None and self._loop.get_task_factory() == self._task_factory:
+            self._loop.set_task_factory(None)
+
+    def _task_factory(self, loop: asyncio.AbstractEventLoop, coro, context: Optional[contextvars.Context] = None) -> asyncio.Task:
+        # タスクが実行するコンテキストを保持し、停止時にリクエスト ID・ルート・エージェント ID を読む
+        if context is None:
+            context = contextvars.copy_context()
+        if sys.version_info >= (3, 11):
+            task = asyncio.Task(coro, loop=loop, context=context)
+        else:
+            # 3.10 の Task は context を受け取れず自分でコピーするため、作成時点の値の写しを保持する
+            # （タスク内で後から設定した値は読めない）
+            task = asyncio.Task(coro, loop=loop)
+        self._contexts[task] = context
+        return task
+
+    async def _run_heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self._heartbeat)
+
+    def _watch(self) -> None:
+        interval = max(0.005, self._threshold / 4)
+        while not self._stopping.wait(interval):
+            beat = self._beat
+            if self._stall_beat is not None and beat != self._stall_beat:
+                # ループが再開した: 停止の長さを記録する
+                event_loop_block_seconds.labels(self._stall_route).observe(max(0.0, beat - self._stall_beat - self._heartbeat))
+                self._stall_beat = None
+            stalled = time.monotonic() - beat - self._heartbeat
+            if stalled > self._threshold and self._stall_beat is None:
+                self._stall_beat = beat
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        info: Dict[str, Any] = {"request_id": None, "route": None, "path": None, "agent_id": None, "task": None}
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        if task is not None:
+            info["task"] = task.get_name()
+            coro = task.get_coro()
+            info["coroutine"] = getattr(coro, "__qualname__", repr(coro))
+            context = self._contexts.get(task)
+            if context is not None:
+                info.update(describe_context(context))
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id is not None else None
+        stack = "".join(traceback.format_stack(frame, limit=self._stack_limit)) if frame is not None else ""
+        self._stall_route = info["route"] or "none"
+        event_loop_blocks_total.labels(self._stall_route).inc()
+        logger.warning(
+            "event loop blocked for more than %.3fs",
+            stalled,
+            extra={
+                "blocked_seconds": round(stalled, 3),
+                "route": info["route"],
+                "path": info["path"],
+                "task": info["task"],
+                "coroutine": info.get("coroutine"),
+                "request_id": info["request_id"],
+                "agent_id": info["agent_id"],
+                "stack": stack,
+            },
+        )
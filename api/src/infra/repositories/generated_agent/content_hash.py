@@ -0,0 +1,9 @@
+import hashlib
+import json
+from typing import Optional
+
+
+def compute_content_hash(owner_id: str, name: str, instruction: str, tool: Optional[str]) -> str:
+    """Stable identity of a generated agent definition for one owner."""
+    payload = json.dumps([owner_id, name, instruction, tool or ""], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
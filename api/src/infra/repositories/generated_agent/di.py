@@ -1,5 +1,6 @@
 from src.config import get_env_variable
 
+from ..read_replicas import get_read_replicas
 from .in_memory_repository import InMemoryGeneratedAgentRepository
 from .interface import GeneratedAgentRepositoryInterface
 from .postgres_repository import PostgresGeneratedAgentRepository
@@ -15,7 +16,7 @@ def get_generated_agent_repository() -> GeneratedAgentRepositoryInterface:
         raise RuntimeError(
             "DATABASE_URL environment variable is required when USE_IN_MEMORY is not '1'."
         )
-    return PostgresGeneratedAgentRepository(dsn)
+    return PostgresGeneratedAgentRepository(dsn, replicas=get_read_replicas("generated_agent"))
 
 
 generated_agent_repository = get_generated_agent_repository()
@@ -1,15 +1,23 @@
 import asyncio
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
+from ..exceptions import RepositoryError
+from .content_hash import compute_content_hash
 from .interface import GeneratedAgentRepositoryInterface
 from .types import (
+    ACTIVE_RUN_STATUSES,
+    AgentRunStatus,
     CreateGeneratedAgentDto,
     GeneratedAgentEntity,
+    GeneratedAgentRunEntity,
     UpdateGeneratedAgentDto,
 )
 
+# Columns of the latest run that are copied onto the agent
+_RUN_FIELDS = ("status", "started_at", "finished_at", "duration_ms", "input_tokens", "output_tokens")
+
 
 class InMemoryGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
     """
@@ -20,25 +28,54 @@ class InMemoryGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
 
     def __init__(self) -> None:
         self._store: Dict[str, GeneratedAgentEntity] = {}
+        # content_hash -> id
+        self._hash_index: Dict[str, str] = {}
+        # run id -> run; only unfinished runs and each agent's latest run are kept
+        self._runs: Dict[str, GeneratedAgentRunEntity] = {}
+        # ids of the unfinished runs (list_active)
+        self._active_run_ids: Set[str] = set()
         # simple lock to avoid race conditions in async contexts
         self._lock = asyncio.Lock()
+        # owner_id -> number of changes (list_version); the instance id keeps tokens unique across restarts
+        self._versions: Dict[str, int] = {}
+        self._instance = uuid.uuid4().hex[:8]
+
+    def _touch(self, owner_id: str) -> None:
+        self._versions[owner_id] = self._versions.get(owner_id, 0) + 1
 
     async def create(self, dto: CreateGeneratedAgentDto) -> GeneratedAgentEntity:
         async with self._lock:
-            new_id = str(uuid.uuid4())
-            now = datetime.utcnow()
-            record = GeneratedAgentEntity(
-                id=new_id,
-                owner_id=dto.owner_id,
-                name=dto.name,
-                parent_id=dto.parent_id,
-                instruction=dto.instruction,
-                tool=dto.tool,
-                created_at=now,
-                updated_at=now,
-            )
-            self._store[new_id] = record
-            return record
+            return self._insert(dto)
+
+    async def get_or_create(self, dto: CreateGeneratedAgentDto) -> GeneratedAgentEntity:
+        content_hash = compute_content_hash(dto.owner_id, dto.name, dto.instruction, dto.tool)
+        async with self._lock:
+            existing_id = self._hash_index.get(content_hash)
+            if existing_id is not None:
+                return self._store[existing_id]
+            return self._insert(dto)
+
+    def _insert(self, dto: CreateGeneratedAgentDto) -> GeneratedAgentEntity:
+        content_hash = compute_content_hash(dto.owner_id, dto.name, dto.instruction, dto.tool)
+        if content_hash in self._hash_index:
+            raise RepositoryError("Generated agent with the same content already exists")
+        new_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        record = GeneratedAgentEntity(
+            id=new_id,
+            owner_id=dto.owner_id,
+            name=dto.name,
+            parent_id=dto.parent_id,
+            instruction=dto.instruction,
+            tool=dto.tool,
+            content_hash=content_hash,
+            created_at=now,
+            updated_at=now,
+        )
+        self._store[new_id] = record
+        self._hash_index[content_hash] = new_id
+        self._touch(record.owner_id)
+        return record
 
     async def get_by_id(self, id: str) -> Optional[GeneratedAgentEntity]:
         async with self._lock:
@@ -48,12 +85,32 @@ class InMemoryGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
         self, *, owner_id: Optional[str] = None, limit: int = 100, offset: int = 0
     ) -> List[GeneratedAgentEntity]:
         async with self._lock:
-            items = list(self._store.values())
-            if owner_id is not None:
-                items = [i for i in items if i.owner_id == owner_id]
-            # simple deterministic ordering by created_at
-            items.sort(key=lambda r: r.created_at)
-            return items[offset : offset + limit]
+            return self._list(owner_id, limit, offset)
+
+    def _list(self, owner_id: Optional[str], limit: int, offset: int) -> List[GeneratedAgentEntity]:
+        items = list(self._store.values())
+        if owner_id is not None:
+            items = [i for i in items if i.owner_id == owner_id]
+        # simple deterministic ordering by created_at
+        items.sort(key=lambda r: r.created_at)
+        return items[offset : offset + limit]
+
+    async def list_with_version(
+        self,
+        *,
+        owner_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        unchanged: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, Optional[List[GeneratedAgentEntity]]]:
+        async with self._lock:
+            if owner_id is None:
+                version = f"{self._instance}.{sum(self._versions.values())}"
+            else:
+                version = f"{self._instance}.{self._versions.get(owner_id, 0)}"
+            if unchanged is not None and unchanged(version):
+                return version, None
+            return version, self._list(owner_id, limit, offset)
 
     async def update(
         self, id: str, dto: UpdateGeneratedAgentDto
@@ -62,23 +119,150 @@ class InMemoryGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
             existing = self._store.get(id)
             if not existing:
                 return None
-            updated = GeneratedAgentEntity(
-                id=existing.id,
-                owner_id=existing.owner_id,
-                name=dto.name if dto.name is not None else existing.name,
-                instruction=dto.instruction
-                if dto.instruction is not None
-                else existing.instruction,
-                tool=dto.tool if dto.tool is not None else existing.tool,
-                created_at=existing.created_at,
-                updated_at=datetime.utcnow(),
+            name = dto.name if dto.name is not None else existing.name
+            instruction = (
+                dto.instruction if dto.instruction is not None else existing.instruction
             )
+            tool = dto.tool if dto.tool is not None else existing.tool
+            content_hash = compute_content_hash(existing.owner_id, name, instruction, tool)
+            if self._hash_index.get(content_hash, id) != id:
+                raise RepositoryError("Generated agent with the same content already exists")
+            updated = existing.model_copy(
+                update={
+                    "name": name,
+                    "instruction": instruction,
+                    "tool": tool,
+                    "parent_id": dto.parent_id
+                    if dto.parent_id is not None
+                    else existing.parent_id,
+                    "last_updated": dto.last_updated
+                    if dto.last_updated is not None
+                    else existing.last_updated,
+                    "content_hash": content_hash,
+                    "updated_at": datetime.utcnow(),
+                }
+            )
+            if existing.content_hash is not None:
+                self._hash_index.pop(existing.content_hash, None)
+            self._hash_index[content_hash] = id
             self._store[id] = updated
+            self._touch(updated.owner_id)
             return updated
 
     async def delete(self, id: str) -> bool:
         async with self._lock:
             if id in self._store:
-                del self._store[id]
+                removed = self._store.pop(id)
+                self._runs = {run_id: run for run_id, run in self._runs.items() if run.agent_id != id}
+                self._active_run_ids &= self._runs.keys()
+                if removed.content_hash is not None:
+                    self._hash_index.pop(removed.content_hash, None)
+                self._touch(removed.owner_id)
                 return True
             return False
+
+    async def create_run(self, agent_id: str) -> Optional[str]:
+        async with self._lock:
+            agent = self._store.get(agent_id)
+            if not agent:
+                return None
+            now = datetime.utcnow()
+            run = GeneratedAgentRunEntity(
+                id=str(uuid.uuid4()),
+                agent_id=agent_id,
+                owner_id=agent.owner_id,
+                status="creating",
+                created_at=now,
+                updated_at=now,
+            )
+            self._store[agent_id] = agent.model_copy(update={"run_id": run.id, "last_updated": now})
+            previous = self._runs.get(agent.run_id) if agent.run_id else None
+            if previous is not None and previous.status not in ACTIVE_RUN_STATUSES:
+                # 最新でなくなった終了済みの実行は保持しない
+                self._runs.pop(previous.id)
+            self._save_run(run)
+            return run.id
+
+    async def start_run(self, run_id: str) -> bool:
+        now = datetime.utcnow()
+        return await self._patch_run(run_id, status="executing", started_at=now, updated_at=now)
+
+    async def set_run_status(self, run_id: str, status: AgentRunStatus) -> bool:
+        return await self._patch_run(run_id, status=status, updated_at=datetime.utcnow())
+
+    async def finish_run(
+        self,
+        run_id: str,
+        status: AgentRunStatus,
+        *,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+    ) -> bool:
+        async with self._lock:
+            run = self._runs.get(run_id)
+            if not run:
+                return False
+            now = datetime.utcnow()
+            duration_ms = None
+            if run.started_at is not None:
+                duration_ms = int((now - run.started_at).total_seconds() * 1000)
+            self._save_run(
+                run.model_copy(
+                    update={
+                        "status": status,
+                        "finished_at": now,
+                        "duration_ms": duration_ms,
+                        "input_tokens": input_tokens,
+                        "output_tokens": output_tokens,
+                        "updated_at": now,
+                    }
+                )
+            )
+            return True
+
+    async def list_active(
+        self, *, owner_id: Optional[str] = None, limit: int = 100
+    ) -> List[GeneratedAgentEntity]:
+        async with self._lock:
+            runs = [
+                r
+                for r in (self._runs[run_id] for run_id in self._active_run_ids)
+                if r.agent_id in self._store and (owner_id is None or r.owner_id == owner_id)
+            ]
+            # Postgres の ORDER BY started_at ASC NULLS LAST, created_at ASC に合わせる
+            runs.sort(key=lambda r: (r.started_at is None, r.started_at or r.created_at, r.created_at))
+            return [
+                self._store[r.agent_id].model_copy(
+                    update={"run_id": r.id, **{field: getattr(r, field) for field in _RUN_FIELDS}}
+                )
+                for r in runs[:limit]
+            ]
+
+    async def _patch_run(self, run_id: str, **fields) -> bool:
+        async with self._lock:
+            run = self._runs.get(run_id)
+            if not run:
+                return False
+            self._save_run(run.model_copy(update=fields))
+            return True
+
+    def _save_run(self, run: GeneratedAgentRunEntity) -> None:
+        agent = self._store.get(run.agent_id)
+        latest = agent is not None and agent.run_id == run.id
+        if run.status in ACTIVE_RUN_STATUSES:
+            self._runs[run.id] = run
+            self._active_run_ids.add(run.id)
+        else:
+            self._active_run_ids.discard(run.id)
+            # 終了した実行はエージェントの最新の実行だけを残し、履歴を溜め続けない
+            if latest:
+                self._runs[run.id] = run
+            else:
+                self._runs.pop(run.id, None)
+        # エージェントには最新の実行の状態だけを写す（古い実行が後から終わっても上書きしない）
+        if not latest:
+            return
+        self._store[run.agent_id] = agent.model_copy(
+            update={**{field: getattr(run, field) for field in _RUN_FIELDS}, "last_updated": run.updated_at}
+        )
+        self._touch(agent.owner_id)
@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 
-from .types import CreateGeneratedAgentDto, GeneratedAgentEntity, UpdateGeneratedAgentDto
+from .types import (
+    AgentRunStatus,
+    CreateGeneratedAgentDto,
+    GeneratedAgentEntity,
+    UpdateGeneratedAgentDto,
+)
 
 
 class GeneratedAgentRepositoryInterface(ABC):
@@ -10,6 +15,16 @@ class GeneratedAgentRepositoryInterface(ABC):
         """Create a new generated_agent document and return the created DTO."""
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_or_create(self, dto: CreateGeneratedAgentDto) -> GeneratedAgentEntity:
+        """
+        Return the owner's existing agent with the same name, instruction and tool,
+        or create it. Identity is the content hash of (owner_id, name, instruction, tool).
+        An existing agent is returned unchanged: it keeps the parent_id of the call
+        that created it and its updated_at is not touched.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def get_by_id(self, id: str) -> Optional[GeneratedAgentEntity]:
         """Return a GeneratedAgent for the given id, or None if not found."""
@@ -22,6 +37,23 @@ class GeneratedAgentRepositoryInterface(ABC):
         """List documents, optionally filtered by owner_id, with pagination."""
         raise NotImplementedError
 
+    @abstractmethod
+    async def list_with_version(
+        self,
+        *,
+        owner_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        unchanged: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, Optional[List[GeneratedAgentEntity]]]:
+        """
+        list() together with its version, an opaque token that changes whenever
+        list(owner_id=...) may return something different; both come from one
+        snapshot. When unchanged(version) is True (e.g. the client's ETag still
+        matches) the rows are not read and None is returned for them.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def update(self, id: str, dto: UpdateGeneratedAgentDto) -> Optional[GeneratedAgentEntity]:
         """Update an existing document and return the updated DTO, or None if not found."""
@@ -31,3 +63,44 @@ class GeneratedAgentRepositoryInterface(ABC):
     async def delete(self, id: str) -> bool:
         """Delete a document by id. Return True if deleted, False if not found."""
         raise NotImplementedError
+
+    @abstractmethod
+    async def create_run(self, agent_id: str) -> Optional[str]:
+        """
+        Record a new run of the agent in status "creating" and make it the agent's
+        latest run. Return the run id, or None if the agent is not found.
+        Concurrent runs of the same agent each get their own record.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def start_run(self, run_id: str) -> bool:
+        """Mark a run as executing and set its started_at. Return False if not found."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_run_status(self, run_id: str, status: AgentRunStatus) -> bool:
+        """Change the status of a run. Return False if not found."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def finish_run(
+        self,
+        run_id: str,
+        status: AgentRunStatus,
+        *,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+    ) -> bool:
+        """Record the final status, finished_at, duration_ms and token usage of a run. Return False if not found."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_active(
+        self, *, owner_id: Optional[str] = None, limit: int = 100
+    ) -> List[GeneratedAgentEntity]:
+        """
+        List runs that are still active, oldest start first, as their agents
+        with run_id and the run's status / timing (an agent appears once per active run).
+        """
+        raise NotImplementedError
@@ -1,29 +1,86 @@
 import asyncio
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
 
 import asyncpg
-from asyncpg import Pool, Record
+from asyncpg import Connection, Pool, Record
+
+from src.infra.metrics import track_pool
 
 from ..exceptions import RepositoryError, raise_repository_error
+from ..instrumentation import observe_db
+from ..list_versions import ensure_list_versions, read_scope_version, read_versions
+from ..pool_health import register_pool
+from ..read_replicas import ReadReplicas
+from .content_hash import compute_content_hash
 from .interface import GeneratedAgentRepositoryInterface
 from .types import (
+    AgentRunStatus,
     CreateGeneratedAgentDto,
     GeneratedAgentEntity,
     UpdateGeneratedAgentDto,
 )
 
+_COLUMNS = (
+    "id, owner_id, name, instruction, tool, parent_id, last_updated, content_hash, "
+    "run_id, status, started_at, finished_at, duration_ms, input_tokens, output_tokens, created_at, updated_at"
+)
+# An agent with the status / timing of one of its runs (list_active)
+_ACTIVE_RUN_COLUMNS = (
+    "a.id, a.owner_id, a.name, a.instruction, a.tool, a.parent_id, a.last_updated, a.content_hash, "
+    "r.id AS run_id, r.status, r.started_at, r.finished_at, r.duration_ms, r.input_tokens, r.output_tokens, "
+    "a.created_at, a.updated_at"
+)
+
+# Updates one run and copies it onto the agent only while it is the agent's latest run,
+# so a run that started earlier cannot overwrite a newer one. Returns the run's agent / owner.
+_RUN_UPDATE = """
+    WITH run AS (
+        UPDATE generated_agent_runs
+        SET {assignments}
+        WHERE id = $1
+        RETURNING id, agent_id, owner_id, status, started_at, finished_at, duration_ms,
+                  input_tokens, output_tokens, updated_at
+    ), latest AS (
+        UPDATE generated_agents AS a
+        SET status = run.status,
+            started_at = run.started_at,
+            finished_at = run.finished_at,
+            duration_ms = run.duration_ms,
+            input_tokens = run.input_tokens,
+            output_tokens = run.output_tokens,
+            last_updated = run.updated_at
+        FROM run
+        WHERE a.id = run.agent_id AND a.run_id = run.id
+    )
+    SELECT agent_id, owner_id FROM run
+"""
+
+T = TypeVar("T")
+
 
 class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
-    """Postgres implementation for GeneratedAgentRepositoryInterface."""
+    """
+    Postgres implementation for GeneratedAgentRepositoryInterface.
+
+    With replicas, get_by_id(), list() and list_active() read from them,
+    except for agents / owners this process wrote a moment ago.
+
+    Each run is a generated_agent_runs row keyed by run id. The agent row
+    carries a copy of its latest run (run_id, status, timing, tokens) for
+    list() / get_by_id(); list_active() reads the runs themselves.
+    """
 
-    def __init__(self, dsn: str) -> None:
+    def __init__(self, dsn: str, *, replicas: Optional[ReadReplicas] = None) -> None:
         self._dsn = dsn
+        self._replicas = replicas
         self._initialized = False
         self._init_lock = asyncio.Lock()
         self._pool: Optional[Pool] = None
         self._pool_lock = asyncio.Lock()
+        track_pool("generated_agent", lambda: self._pool)
+        register_pool("generated_agent", lambda: self._pool, self._ensure_pool)
 
     async def _ensure_pool(self) -> Pool:
         if self._pool is not None:
@@ -62,6 +119,8 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
                         exc,
                     )
                 self._pool = None
+        if self._replicas is not None:
+            await self._replicas.close()
         self._initialized = False
 
     async def _ensure_initialized(self) -> None:
@@ -94,6 +153,97 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
                         ON generated_agents(owner_id)
                         """
                     )
+                    # Rows created before content hashing keep NULL and are never reused.
+                    await conn.execute(
+                        """
+                        ALTER TABLE generated_agents
+                        ADD COLUMN IF NOT EXISTS content_hash TEXT
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE UNIQUE INDEX IF NOT EXISTS uq_generated_agents_content_hash
+                        ON generated_agents(content_hash)
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        ALTER TABLE generated_agents
+                        ADD COLUMN IF NOT EXISTS status TEXT,
+                        ADD COLUMN IF NOT EXISTS started_at TIMESTAMP NULL,
+                        ADD COLUMN IF NOT EXISTS finished_at TIMESTAMP NULL,
+                        ADD COLUMN IF NOT EXISTS duration_ms BIGINT NULL,
+                        ADD COLUMN IF NOT EXISTS input_tokens INTEGER NULL,
+                        ADD COLUMN IF NOT EXISTS output_tokens INTEGER NULL
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        ALTER TABLE generated_agents
+                        ADD COLUMN IF NOT EXISTS run_id TEXT NULL
+                        """
+                    )
+                    # Identical agents are reused, so runs of one agent can overlap; each run
+                    # keeps its own status and timing.
+                    await conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS generated_agent_runs (
+                            id TEXT PRIMARY KEY,
+                            agent_id TEXT NOT NULL REFERENCES generated_agents(id) ON DELETE CASCADE,
+                            owner_id TEXT NOT NULL,
+                            status TEXT NOT NULL,
+                            started_at TIMESTAMP NULL,
+                            finished_at TIMESTAMP NULL,
+                            duration_ms BIGINT NULL,
+                            input_tokens INTEGER NULL,
+                            output_tokens INTEGER NULL,
+                            created_at TIMESTAMP NOT NULL,
+                            updated_at TIMESTAMP NOT NULL
+                        )
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_generated_agent_runs_agent
+                        ON generated_agent_runs(agent_id)
+                        """
+                    )
+                    # Only unfinished runs are indexed, so "what is running now" stays cheap
+                    # regardless of how many historical runs exist.
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_generated_agent_runs_active
+                        ON generated_agent_runs(owner_id, started_at)
+                        WHERE status IN ('creating', 'executing', 'thinking')
+                        """
+                    )
+                    # list_active() no longer reads the agent's copy of its latest run
+                    await conn.execute("DROP INDEX IF EXISTS idx_generated_agents_active_runs")
+                    # 一覧の ETag 用に、オーナー毎の変更回数を書き込みと同じトランザクションで数える
+                    async with conn.transaction():
+                        await conn.execute("SELECT pg_advisory_xact_lock(hashtext('list_versions'))")
+                        await ensure_list_versions(conn)
+                        await conn.execute(
+                            """
+                            CREATE OR REPLACE FUNCTION generated_agents_bump_list_version() RETURNS trigger AS $$
+                            BEGIN
+                                IF TG_OP = 'DELETE' THEN
+                                    PERFORM bump_list_version('owner', OLD.owner_id);
+                                    RETURN OLD;
+                                END IF;
+                                PERFORM bump_list_version('owner', NEW.owner_id);
+                                RETURN NEW;
+                            END
+                            $$ LANGUAGE plpgsql
+                            """
+                        )
+                        await conn.execute(
+                            """
+                            CREATE OR REPLACE TRIGGER trg_generated_agents_list_version
+                            AFTER INSERT OR UPDATE OR DELETE ON generated_agents
+                            FOR EACH ROW EXECUTE FUNCTION generated_agents_bump_list_version()
+                            """
+                        )
             except RepositoryError:
                 raise
             except Exception as exc:
@@ -103,6 +253,20 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
                 )
             self._initialized = True
 
+    async def _read(self, keys: Sequence[str], query: Callable[[Connection], Awaitable[T]]) -> T:
+        if self._replicas is None:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                return await query(conn)
+        return await self._replicas.fetch(keys, self._ensure_pool, query)
+
+    def _record_write(self, id: str, owner_id: Optional[str]) -> None:
+        if self._replicas is not None:
+            keys = [f"agent:{id}", "all"]
+            if owner_id is not None:
+                keys.append(f"owner:{owner_id}")
+            self._replicas.record_write(*keys)
+
     def _row_to_entity(self, row: Record) -> GeneratedAgentEntity:
         return GeneratedAgentEntity(
             id=row["id"],
@@ -112,14 +276,24 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
             tool=row["tool"],
             parent_id=row["parent_id"],
             last_updated=row["last_updated"],
+            content_hash=row["content_hash"],
+            run_id=row["run_id"],
+            status=row["status"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            duration_ms=row["duration_ms"],
+            input_tokens=row["input_tokens"],
+            output_tokens=row["output_tokens"],
             created_at=row["created_at"],
             updated_at=row["updated_at"],
         )
 
+    @observe_db("generated_agent")
     async def create(self, dto: CreateGeneratedAgentDto) -> GeneratedAgentEntity:
         await self._ensure_initialized()
         new_id = str(uuid.uuid4())
         now = datetime.utcnow()
+        content_hash = compute_content_hash(dto.owner_id, dto.name, dto.instruction, dto.tool)
         try:
             pool = await self._ensure_pool()
             async with pool.acquire() as conn:
@@ -133,9 +307,10 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
                         tool,
                         parent_id,
                         last_updated,
+                        content_hash,
                         created_at,
                         updated_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
                     """,
                     new_id,
                     dto.owner_id,
@@ -144,6 +319,7 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
                     dto.tool,
                     dto.parent_id,
                     None,
+                    content_hash,
                     now,
                     now,
                 )
@@ -151,6 +327,7 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
             raise
         except Exception as exc:
             raise_repository_error("Failed to create generated agent", exc)
+        self._record_write(new_id, dto.owner_id)
         return GeneratedAgentEntity(
             id=new_id,
             owner_id=dto.owner_id,
@@ -159,23 +336,82 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
             tool=dto.tool,
             parent_id=dto.parent_id,
             last_updated=None,
+            content_hash=content_hash,
             created_at=now,
             updated_at=now,
         )
 
-    async def get_by_id(self, id: str) -> Optional[GeneratedAgentEntity]:
+    @observe_db("generated_agent")
+    async def get_or_create(self, dto: CreateGeneratedAgentDto) -> GeneratedAgentEntity:
         await self._ensure_initialized()
+        now = datetime.utcnow()
+        content_hash = compute_content_hash(dto.owner_id, dto.name, dto.instruction, dto.tool)
         try:
             pool = await self._ensure_pool()
             async with pool.acquire() as conn:
+                # 既存行は書き換えずに返す（updated_at や一覧のバージョンを変えない）。1 往復で再利用と新規作成を行う
                 row = await conn.fetchrow(
-                    """
-                    SELECT id, owner_id, name, instruction, tool, parent_id, last_updated, created_at, updated_at
+                    f"""
+                    WITH inserted AS (
+                        INSERT INTO generated_agents (
+                            id,
+                            owner_id,
+                            name,
+                            instruction,
+                            tool,
+                            parent_id,
+                            last_updated,
+                            content_hash,
+                            created_at,
+                            updated_at
+                        ) VALUES ($1, $2, $3, $4, $5, $6, NULL, $7, $8, $8)
+                        ON CONFLICT (content_hash) DO NOTHING
+                        RETURNING {_COLUMNS}
+                    )
+                    SELECT {_COLUMNS} FROM inserted
+                    UNION ALL
+                    SELECT {_COLUMNS} FROM generated_agents WHERE content_hash = $7
+                    LIMIT 1
+                    """,
+                    str(uuid.uuid4()),
+                    dto.owner_id,
+                    dto.name,
+                    dto.instruction,
+                    dto.tool,
+                    dto.parent_id,
+                    content_hash,
+                    now,
+                )
+                if row is None:
+                    # 同時に作成された行は文のスナップショットに含まれないので、読み直す
+                    row = await conn.fetchrow(
+                        f"SELECT {_COLUMNS} FROM generated_agents WHERE content_hash = $1",
+                        content_hash,
+                    )
+                if row is None:
+                    raise RepositoryError("Generated agent was deleted while being reused")
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to get or create generated agent", exc)
+        self._record_write(row["id"], row["owner_id"])
+        return self._row_to_entity(row)
+
+    @observe_db("generated_agent")
+    async def get_by_id(self, id: str) -> Optional[GeneratedAgentEntity]:
+        await self._ensure_initialized()
+        try:
+            row = await self._read(
+                [f"agent:{id}"],
+                lambda conn: conn.fetchrow(
+                    f"""
+                    SELECT {_COLUMNS}
                     FROM generated_agents
                     WHERE id = $1
                     """,
                     id,
-                )
+                ),
+            )
         except RepositoryError:
             raise
         except Exception as exc:
@@ -184,6 +420,7 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
             return None
         return self._row_to_entity(row)
 
+    @observe_db("generated_agent")
     async def list(
         self,
         *,
@@ -193,38 +430,80 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
     ) -> List[GeneratedAgentEntity]:
         await self._ensure_initialized()
         try:
-            pool = await self._ensure_pool()
-            async with pool.acquire() as conn:
+            rows = await self._read(
+                self._list_keys(owner_id),
+                lambda conn: self._fetch_list(conn, owner_id, limit, offset),
+            )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to list generated agents", exc)
+        return [self._row_to_entity(row) for row in rows]
+
+    @observe_db("generated_agent")
+    async def list_with_version(
+        self,
+        *,
+        owner_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        unchanged: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, Optional[List[GeneratedAgentEntity]]]:
+        await self._ensure_initialized()
+
+        async def query(conn: Connection) -> Tuple[str, Optional[List[Record]]]:
+            # バージョンと一覧を 1 つの接続・スナップショットで読む（別々に読むと、レプリカ毎の遅れの差で
+            # 新しいバージョンに古い一覧が対応付けられ、次の書き込みまで 304 が返り続けることがある）
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
                 if owner_id is None:
-                    rows = await conn.fetch(
-                        """
-                        SELECT id, owner_id, name, instruction, tool, parent_id, last_updated, created_at, updated_at
-                        FROM generated_agents
-                        ORDER BY created_at ASC
-                        OFFSET $1 LIMIT $2
-                        """,
-                        offset,
-                        limit,
-                    )
+                    version = await read_scope_version(conn, "owner")
                 else:
-                    rows = await conn.fetch(
-                        """
-                        SELECT id, owner_id, name, instruction, tool, parent_id, last_updated, created_at, updated_at
-                        FROM generated_agents
-                        WHERE owner_id = $1
-                        ORDER BY created_at ASC
-                        OFFSET $2 LIMIT $3
-                        """,
-                        owner_id,
-                        offset,
-                        limit,
-                    )
+                    version = await read_versions(conn, [("owner", owner_id)])
+                if unchanged is not None and unchanged(version):
+                    return version, None
+                return version, await self._fetch_list(conn, owner_id, limit, offset)
+
+        try:
+            version, rows = await self._read(self._list_keys(owner_id), query)
         except RepositoryError:
             raise
         except Exception as exc:
             raise_repository_error("Failed to list generated agents", exc)
-        return [self._row_to_entity(row) for row in rows]
+        if rows is None:
+            return version, None
+        return version, [self._row_to_entity(row) for row in rows]
 
+    def _list_keys(self, owner_id: Optional[str]) -> List[str]:
+        return ["all"] if owner_id is None else [f"owner:{owner_id}"]
+
+    async def _fetch_list(
+        self, conn: Connection, owner_id: Optional[str], limit: int, offset: int
+    ) -> List[Record]:
+        if owner_id is None:
+            return await conn.fetch(
+                f"""
+                SELECT {_COLUMNS}
+                FROM generated_agents
+                ORDER BY created_at ASC
+                OFFSET $1 LIMIT $2
+                """,
+                offset,
+                limit,
+            )
+        return await conn.fetch(
+            f"""
+            SELECT {_COLUMNS}
+            FROM generated_agents
+            WHERE owner_id = $1
+            ORDER BY created_at ASC
+            OFFSET $2 LIMIT $3
+            """,
+            owner_id,
+            offset,
+            limit,
+        )
+
+    @observe_db("generated_agent")
     async def update(
         self,
         id: str,
@@ -235,8 +514,8 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
             pool = await self._ensure_pool()
             async with pool.acquire() as conn:
                 existing = await conn.fetchrow(
-                    """
-                    SELECT id, owner_id, name, instruction, tool, parent_id, last_updated, created_at, updated_at
+                    f"""
+                    SELECT {_COLUMNS}
                     FROM generated_agents
                     WHERE id = $1
                     """,
@@ -256,55 +535,210 @@ class PostgresGeneratedAgentRepository(GeneratedAgentRepositoryInterface):
                 updated_last_updated = (
                     dto.last_updated if dto.last_updated is not None else existing["last_updated"]
                 )
+                updated_content_hash = compute_content_hash(
+                    existing["owner_id"], updated_name, updated_instruction, updated_tool
+                )
                 now = datetime.utcnow()
 
-                await conn.execute(
-                    """
+                row = await conn.fetchrow(
+                    f"""
                     UPDATE generated_agents
                     SET name = $1,
                         instruction = $2,
                         tool = $3,
                         parent_id = $4,
                         last_updated = $5,
-                        updated_at = $6
-                    WHERE id = $7
+                        content_hash = $6,
+                        updated_at = $7
+                    WHERE id = $8
+                    RETURNING {_COLUMNS}
                     """,
                     updated_name,
                     updated_instruction,
                     updated_tool,
                     updated_parent_id,
                     updated_last_updated,
+                    updated_content_hash,
                     now,
                     id,
                 )
 
-                return GeneratedAgentEntity(
-                    id=existing["id"],
-                    owner_id=existing["owner_id"],
-                    name=updated_name,
-                    instruction=updated_instruction,
-                    tool=updated_tool,
-                    parent_id=updated_parent_id,
-                    last_updated=updated_last_updated,
-                    created_at=existing["created_at"],
-                    updated_at=now,
-                )
+                if row is None:
+                    return None
         except RepositoryError:
             raise
         except Exception as exc:
             raise_repository_error("Failed to update generated agent", exc)
+        self._record_write(id, row["owner_id"])
+        return self._row_to_entity(row)
 
+    @observe_db("generated_agent")
     async def delete(self, id: str) -> bool:
         await self._ensure_initialized()
         try:
             pool = await self._ensure_pool()
             async with pool.acquire() as conn:
-                deleted_id = await conn.fetchval(
-                    "DELETE FROM generated_agents WHERE id = $1 RETURNING id",
+                deleted = await conn.fetchrow(
+                    "DELETE FROM generated_agents WHERE id = $1 RETURNING owner_id",
                     id,
                 )
         except RepositoryError:
             raise
         except Exception as exc:
             raise_repository_error("Failed to delete generated agent", exc)
-        return deleted_id is not None
+        if deleted is None:
+            return False
+        self._record_write(id, deleted["owner_id"])
+        return True
+
+    @observe_db("generated_agent")
+    async def create_run(self, agent_id: str) -> Optional[str]:
+        await self._ensure_initialized()
+        run_id = str(uuid.uuid4())
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow(
+                    """
+                    WITH run AS (
+                        INSERT INTO generated_agent_runs (id, agent_id, owner_id, status, created_at, updated_at)
+                        SELECT $1, id, owner_id, 'creating', $3, $3
+                        FROM generated_agents
+                        WHERE id = $2
+                        RETURNING agent_id, owner_id
+                    ), latest AS (
+                        UPDATE generated_agents AS a
+                        SET run_id = $1,
+                            status = 'creating',
+                            started_at = NULL,
+                            finished_at = NULL,
+                            duration_ms = NULL,
+                            input_tokens = NULL,
+                            output_tokens = NULL,
+                            last_updated = $3
+                        FROM run
+                        WHERE a.id = run.agent_id
+                    )
+                    SELECT agent_id, owner_id FROM run
+                    """,
+                    run_id,
+                    agent_id,
+                    datetime.utcnow(),
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to create generated agent run", exc)
+        if row is None:
+            return None
+        self._record_write(agent_id, row["owner_id"])
+        return run_id
+
+    @observe_db("generated_agent")
+    async def start_run(self, run_id: str) -> bool:
+        return await self._update_run(
+            """
+            status = 'executing',
+            started_at = $2,
+            updated_at = $2
+            """,
+            run_id,
+            datetime.utcnow(),
+        )
+
+    @observe_db("generated_agent")
+    async def set_run_status(self, run_id: str, status: AgentRunStatus) -> bool:
+        return await self._update_run(
+            """
+            status = $2,
+            updated_at = $3
+            """,
+            run_id,
+            status,
+            datetime.utcnow(),
+        )
+
+    @observe_db("generated_agent")
+    async def finish_run(
+        self,
+        run_id: str,
+        status: AgentRunStatus,
+        *,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+    ) -> bool:
+        return await self._update_run(
+            """
+            status = $2,
+            finished_at = $3,
+            duration_ms = (EXTRACT(EPOCH FROM ($3 - started_at)) * 1000)::BIGINT,
+            input_tokens = $4,
+            output_tokens = $5,
+            updated_at = $3
+            """,
+            run_id,
+            status,
+            datetime.utcnow(),
+            input_tokens,
+            output_tokens,
+        )
+
+    async def _update_run(self, assignments: str, *args) -> bool:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                # 更新した実行のエージェントとオーナー（実行が無ければ None）
+                row = await conn.fetchrow(_RUN_UPDATE.format(assignments=assignments), *args)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to update generated agent run status", exc)
+        if row is None:
+            return False
+        self._record_write(row["agent_id"], row["owner_id"])
+        return True
+
+    @observe_db("generated_agent")
+    async def list_active(
+        self, *, owner_id: Optional[str] = None, limit: int = 100
+    ) -> List[GeneratedAgentEntity]:
+        await self._ensure_initialized()
+        try:
+            if owner_id is None:
+                rows = await self._read(
+                    ["all"],
+                    lambda conn: conn.fetch(
+                        f"""
+                        SELECT {_ACTIVE_RUN_COLUMNS}
+                        FROM generated_agent_runs AS r
+                        JOIN generated_agents AS a ON a.id = r.agent_id
+                        WHERE r.status IN ('creating', 'executing', 'thinking')
+                        ORDER BY r.started_at ASC NULLS LAST, r.created_at ASC
+                        LIMIT $1
+                        """,
+                        limit,
+                    ),
+                )
+            else:
+                rows = await self._read(
+                    [f"owner:{owner_id}"],
+                    lambda conn: conn.fetch(
+                        f"""
+                        SELECT {_ACTIVE_RUN_COLUMNS}
+                        FROM generated_agent_runs AS r
+                        JOIN generated_agents AS a ON a.id = r.agent_id
+                        WHERE r.owner_id = $1
+                          AND r.status IN ('creating', 'executing', 'thinking')
+                        ORDER BY r.started_at ASC NULLS LAST, r.created_at ASC
+                        LIMIT $2
+                        """,
+                        owner_id,
+                        limit,
+                    ),
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to list active generated agents", exc)
+        return [self._row_to_entity(row) for row in rows]
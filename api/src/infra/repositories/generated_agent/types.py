@@ -1,8 +1,12 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel
 
+AgentRunStatus = Literal["creating", "executing", "thinking", "completed", "failed", "cancelled"]
+# Statuses of a run that has not finished yet (covered by a partial index in Postgres)
+ACTIVE_RUN_STATUSES = ("creating", "executing", "thinking")
+
 
 class GeneratedAgentEntity(BaseModel):
     id: str
@@ -13,6 +17,16 @@ class GeneratedAgentEntity(BaseModel):
     # UI / runtime metadata
     parent_id: Optional[str] = None
     last_updated: Optional[datetime] = None
+    # sha256 of (owner_id, name, instruction, tool); used to reuse identical agents
+    content_hash: Optional[str] = None
+    # latest run lifecycle (from list_active: the active run's)
+    run_id: Optional[str] = None
+    status: Optional[AgentRunStatus] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -21,6 +35,22 @@ class GeneratedAgentEntity(BaseModel):
     }
 
 
+class GeneratedAgentRunEntity(BaseModel):
+    """One run of a generated agent; identical agents are reused, so runs of the same agent may overlap."""
+
+    id: str
+    agent_id: str
+    owner_id: str
+    status: AgentRunStatus
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class CreateGeneratedAgentDto(BaseModel):
     owner_id: str
     name: str
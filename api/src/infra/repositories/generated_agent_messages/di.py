@@ -1,7 +1,12 @@
+from pathlib import Path
+from typing import Optional
+
 from src.config import get_env_variable
 
+from ..read_replicas import get_read_replicas
 from .in_memory_repository import InMemoryMessageRepository
 from .interface import MessageRepositoryInterface
+from .maintenance import MessagePartitionMaintainer
 from .postgres_repository import PostgresMessageRepository
 
 
@@ -15,7 +20,37 @@ def get_message_repository() -> MessageRepositoryInterface:
         raise RuntimeError(
             "DATABASE_URL environment variable is required when USE_IN_MEMORY is not '1'."
         )
-    return PostgresMessageRepository(dsn)
+    search_mode = get_env_variable("MESSAGE_SEARCH_MODE", "fulltext")
+    if search_mode not in ("fulltext", "trigram"):
+        raise RuntimeError(
+            "MESSAGE_SEARCH_MODE must be 'fulltext' or 'trigram'."
+        )
+    return PostgresMessageRepository(
+        dsn,
+        search_mode=search_mode,  # type: ignore[arg-type]
+        months_ahead=int(get_env_variable("MESSAGE_PARTITION_MONTHS_AHEAD", "2")),
+        replicas=get_read_replicas("generated_agent_message"),
+    )
+
+
+def get_message_partition_maintainer(
+    repository: MessageRepositoryInterface,
+) -> Optional[MessagePartitionMaintainer]:
+    if not isinstance(repository, PostgresMessageRepository):
+        return None
+    retention_months = int(get_env_variable("MESSAGE_RETENTION_MONTHS", "0"))
+    archive_dir = get_env_variable("MESSAGE_ARCHIVE_DIR", "")
+    if retention_months > 0 and not archive_dir:
+        raise RuntimeError(
+            "MESSAGE_ARCHIVE_DIR is required when MESSAGE_RETENTION_MONTHS is set."
+        )
+    return MessagePartitionMaintainer(
+        repository,
+        interval_seconds=float(get_env_variable("MESSAGE_PARTITION_MAINTENANCE_INTERVAL_SECONDS", "3600")),
+        retention_months=retention_months,
+        archive_dir=Path(archive_dir) if archive_dir else None,
+    )
 
 
 message_repository = get_message_repository()
+message_partition_maintainer = get_message_partition_maintainer(message_repository)
@@ -1,21 +1,27 @@
 import asyncio
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from .interface import MessageRepositoryInterface
-from .types import CreateMessageDto, MessageEntity
+from .search import build_snippet, has_cjk, split_terms, tokenize
+from .types import CreateMessageDto, MessageEntity, MessageSearchHit
 
 
 class InMemoryMessageRepository(MessageRepositoryInterface):
     """
     In-memory implementation to store chat messages for generated agents.
     Thread-safe for async contexts via a simple asyncio.Lock.
+    Keeps an inverted index (token -> message ids) for search.
     """
 
     def __init__(self) -> None:
         self._store: Dict[str, MessageEntity] = {}
+        self._index: Dict[str, Set[str]] = {}
         self._lock = asyncio.Lock()
+        # agent_id / (agent_id, session_id) -> number of messages added (list_version)
+        self._versions: Dict[object, int] = {}
+        self._instance = uuid.uuid4().hex[:8]
 
     async def create(self, dto: CreateMessageDto) -> MessageEntity:
         async with self._lock:
@@ -30,6 +36,10 @@ class InMemoryMessageRepository(MessageRepositoryInterface):
                 created_at=now,
             )
             self._store[mid] = item
+            for token in tokenize(item.content):
+                self._index.setdefault(token, set()).add(mid)
+            for key in (dto.agent_id, (dto.agent_id, dto.session_id)):
+                self._versions[key] = self._versions.get(key, 0) + 1
             return item
 
     async def list_by_agent(
@@ -39,10 +49,83 @@ class InMemoryMessageRepository(MessageRepositoryInterface):
         session_id: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        since: Optional[datetime] = None,
     ) -> List[MessageEntity]:
         async with self._lock:
-            items = [m for m in self._store.values() if m.agent_id == agent_id]
-            if session_id is not None:
-                items = [m for m in items if m.session_id == session_id]
-            items.sort(key=lambda m: m.created_at)
-            return items[offset:offset + limit]
+            return self._list_by_agent(agent_id, session_id, limit, offset, since)
+
+    def _list_by_agent(
+        self, agent_id: str, session_id: Optional[str], limit: int, offset: int, since: Optional[datetime]
+    ) -> List[MessageEntity]:
+        items = [m for m in self._store.values() if m.agent_id == agent_id]
+        if session_id is not None:
+            items = [m for m in items if m.session_id == session_id]
+        if since is not None:
+            items = [m for m in items if m.created_at >= since]
+        items.sort(key=lambda m: m.created_at)
+        return items[offset:offset + limit]
+
+    async def list_by_agent_with_version(
+        self,
+        *,
+        agent_id: str,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+        unchanged: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, Optional[List[MessageEntity]]]:
+        key = agent_id if session_id is None else (agent_id, session_id)
+        async with self._lock:
+            version = f"{self._instance}.{self._versions.get(key, 0)}"
+            if unchanged is not None and unchanged(version):
+                return version, None
+            return version, self._list_by_agent(agent_id, session_id, limit, offset, since)
+
+    async def search(
+        self,
+        *,
+        query: str,
+        agent_id: str,
+        session_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+    ) -> List[MessageSearchHit]:
+        terms = split_terms(query)
+        if not terms:
+            return []
+        async with self._lock:
+            candidate_ids: Optional[Set[str]] = None
+            for term in terms:
+                tokens = tokenize(term)
+                # 1文字の日本語などインデックスに載らない語は後段の部分一致で判定する
+                if not tokens or (has_cjk(term) and len(term) == 1):
+                    continue
+                for token in tokens:
+                    postings = self._index.get(token, set())
+                    candidate_ids = set(postings) if candidate_ids is None else candidate_ids & postings
+                    if not candidate_ids:
+                        return []
+            if candidate_ids is None:
+                candidate_ids = set(self._store.keys())
+
+            items = []
+            for mid in candidate_ids:
+                m = self._store[mid]
+                if m.agent_id != agent_id:
+                    continue
+                if session_id is not None and m.session_id != session_id:
+                    continue
+                if since is not None and m.created_at < since:
+                    continue
+                # bigram の偽陽性を除外するため部分一致で最終確認
+                lowered = m.content.lower()
+                if not all(t in lowered for t in terms):
+                    continue
+                items.append(m)
+            items.sort(key=lambda m: m.created_at, reverse=True)
+            return [
+                MessageSearchHit(message=m, snippet=build_snippet(m.content, terms))
+                for m in items[offset : offset + limit]
+            ]
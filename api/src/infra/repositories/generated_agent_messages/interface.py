@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
 
-from .types import CreateMessageDto, MessageEntity
+from .types import CreateMessageDto, MessageEntity, MessageSearchHit
 
 
 class MessageRepositoryInterface(ABC):
@@ -17,5 +18,40 @@ class MessageRepositoryInterface(ABC):
         session_id: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        since: Optional[datetime] = None,
     ) -> List[MessageEntity]:
+        """Messages of the agent, oldest first; since skips messages created before it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_by_agent_with_version(
+        self,
+        *,
+        agent_id: str,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+        unchanged: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, Optional[List[MessageEntity]]]:
+        """
+        list_by_agent() together with its version, an opaque token that changes
+        whenever list_by_agent() for the agent (and session) may return something
+        different; both come from one snapshot. When unchanged(version) is True the
+        messages are not read and None is returned for them.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search(
+        self,
+        *,
+        query: str,
+        agent_id: str,
+        session_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+    ) -> List[MessageSearchHit]:
+        """Full-text search over one agent's message content, newest first, with highlighted snippets."""
         raise NotImplementedError
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+
+from .postgres_repository import PostgresMessageRepository
+
+logger = logging.getLogger(__name__)
+
+
+class MessagePartitionMaintainer:
+    """
+    Periodically creates the upcoming monthly message partitions and applies
+    the retention policy (see PostgresMessageRepository.maintain_partitions).
+    Every API instance may run one; an advisory lock lets one work at a time.
+    """
+
+    def __init__(
+        self,
+        repository: PostgresMessageRepository,
+        *,
+        interval_seconds: float = 3600.0,
+        retention_months: int = 0,
+        archive_dir: Optional[Path] = None,
+    ) -> None:
+        self._repository = repository
+        self._interval = interval_seconds
+        self._retention_months = retention_months
+        self._archive_dir = archive_dir
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._repository.maintain_partitions(
+                    retention_months=self._retention_months,
+                    archive_dir=self._archive_dir,
+                )
+            except Exception:
+                # DB に接続できない間も次の周期でやり直す
+                logger.exception("message partition maintenance failed")
+            await asyncio.sleep(self._interval)
@@ -0,0 +1,47 @@
+"""
+Explicit migration of generated_agent_messages to monthly partitions.
+
+A table created before partitioning is large, so the API does not migrate it
+on startup (it refuses to start until this has run). Run once per database,
+before deploying the partitioned version:
+
+    python -m src.infra.repositories.generated_agent_messages.migrate
+
+Reads and writes continue while the indexes are built and the partition
+bound is validated; only the final swap takes short ACCESS EXCLUSIVE locks,
+and it gives up after MESSAGE_MIGRATION_LOCK_TIMEOUT_SECONDS (default 10)
+so it can be retried instead of queueing every query behind it.
+"""
+
+import asyncio
+
+from src.config import get_env_variable
+from src.infra.logging import setup_logging
+
+from .di import message_repository
+from .partitions import LEGACY_PARTITION, TABLE
+from .postgres_repository import PostgresMessageRepository
+
+
+async def _migrate() -> None:
+    if not isinstance(message_repository, PostgresMessageRepository):
+        raise RuntimeError("The message partition migration needs Postgres (DATABASE_URL).")
+    try:
+        migrated = await message_repository.migrate_legacy_table(
+            lock_timeout_seconds=float(get_env_variable("MESSAGE_MIGRATION_LOCK_TIMEOUT_SECONDS", "10")),
+        )
+    finally:
+        await message_repository.close()
+    if migrated:
+        print(f"{TABLE} is partitioned; existing rows are in {LEGACY_PARTITION}")
+    else:
+        print(f"{TABLE} needs no migration")
+
+
+def main() -> None:
+    setup_logging()
+    asyncio.run(_migrate())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Monthly range partitions of generated_agent_messages (Postgres).
+
+Each month of created_at lives in its own partition named
+generated_agent_messages_pYYYYMM, so indexes and vacuum stay per month and
+old months can be detached, archived and dropped as a whole. A table created
+before partitioning is kept as generated_agent_messages_legacy, covering
+everything up to the first month the partitions take over.
+"""
+
+import gzip
+import re
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+TABLE = "generated_agent_messages"
+LEGACY_PARTITION = f"{TABLE}_legacy"
+PARTITION_PATTERN = re.compile(rf"^{TABLE}_(p\d{{6}}|legacy)$")
+
+_BOUND_PATTERN = re.compile(r"FROM \((?:MINVALUE|'([^']+)')\) TO \('([^']+)'\)")
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+@dataclass(frozen=True)
+class PartitionRange:
+    name: str
+    # None for the legacy partition (MINVALUE)
+    lower: Optional[datetime]
+    upper: datetime
+
+    def covers(self, value: datetime) -> bool:
+        return (self.lower is None or self.lower <= value) and value < self.upper
+
+
+def parse_partition_bound(name: str, bound: str) -> PartitionRange:
+    """PartitionRange from pg_get_expr(relpartbound) of a range partition."""
+    match = _BOUND_PATTERN.search(bound)
+    if match is None:
+        raise ValueError(f"unexpected partition bound for {name}: {bound}")
+    lower, upper = match.groups()
+    return PartitionRange(
+        name=name,
+        lower=datetime.fromisoformat(lower) if lower else None,
+        upper=datetime.fromisoformat(upper),
+    )
+
+
+def compress_file(source: Path, destination: Path) -> None:
+    """gzip source into destination (written under a temporary name first), then remove source."""
+    partial = destination.with_name(destination.name + ".partial")
+    with source.open("rb") as src, gzip.open(partial, "wb") as dst:
+        shutil.copyfileobj(src, dst, length=1024 * 1024)
+    partial.replace(destination)
+    source.unlink()
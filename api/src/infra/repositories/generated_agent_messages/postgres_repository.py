@@ -1,25 +1,80 @@
 import asyncio
+import logging
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from pathlib import Path
+from typing import Awaitable, Callable, List, Literal, Optional, Sequence, Tuple, TypeVar
 
 import asyncpg
-from asyncpg import Pool, Record
+from asyncpg import Connection, Pool, Record
+
+from src.infra.metrics import track_pool
+from src.infra.metrics.app_metrics import message_partitions_archived_total
 
 from ..exceptions import RepositoryError, raise_repository_error
+from ..instrumentation import observe_db
+from ..list_versions import ensure_list_versions, read_versions
+from ..pool_health import register_pool
+from ..read_replicas import ReadReplicas
 from .interface import MessageRepositoryInterface
-from .types import CreateMessageDto, MessageEntity
+from .partitions import (
+    LEGACY_PARTITION,
+    PARTITION_PATTERN,
+    TABLE,
+    PartitionRange,
+    add_months,
+    compress_file,
+    month_start,
+    parse_partition_bound,
+    partition_name,
+)
+from .search import HIGHLIGHT_END, HIGHLIGHT_START, TRIGRAM_MIN_TERM_LENGTH, build_snippet, split_terms
+from .types import CreateMessageDto, MessageEntity, MessageSearchHit
+
+logger = logging.getLogger(__name__)
+
+SearchMode = Literal["fulltext", "trigram"]
+T = TypeVar("T")
 
 
 class PostgresMessageRepository(MessageRepositoryInterface):
-    """Postgres-backed repository for generated agent messages."""
+    """
+    Postgres-backed repository for generated agent messages.
+
+    search_mode selects the index used by search():
+    - "fulltext": GIN index on to_tsvector('simple', content), word based.
+    - "trigram": pg_trgm GIN index, substring based; suited to Japanese text
+      which has no word separators. Terms shorter than three characters have
+      no trigrams, so they are matched only within the agent's rows.
 
-    def __init__(self, dsn: str) -> None:
+    The table is range partitioned by month of created_at (see partitions.py);
+    months_ahead partitions past the current month are created in advance.
+    Passing since to list_by_agent() / search() lets Postgres skip the
+    partitions of older months.
+
+    With replicas, list_by_agent() and search() read from them, except for
+    agents this process added a message to a moment ago.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        search_mode: SearchMode = "fulltext",
+        months_ahead: int = 2,
+        replicas: Optional[ReadReplicas] = None,
+    ) -> None:
         self._dsn = dsn
+        self._replicas = replicas
+        self._search_mode = search_mode
+        self._months_ahead = months_ahead
+        self._partitions: List[PartitionRange] = []
         self._initialized = False
         self._init_lock = asyncio.Lock()
         self._pool: Optional[Pool] = None
         self._pool_lock = asyncio.Lock()
+        track_pool("generated_agent_message", lambda: self._pool)
+        register_pool("generated_agent_message", lambda: self._pool, self._ensure_pool)
 
     async def _ensure_pool(self) -> Pool:
         if self._pool is not None:
@@ -58,6 +113,8 @@ class PostgresMessageRepository(MessageRepositoryInterface):
                         exc,
                     )
                 self._pool = None
+        if self._replicas is not None:
+            await self._replicas.close()
         self._initialized = False
 
     async def _ensure_initialized(self) -> None:
@@ -69,24 +126,13 @@ class PostgresMessageRepository(MessageRepositoryInterface):
             try:
                 pool = await self._ensure_pool()
                 async with pool.acquire() as conn:
-                    await conn.execute(
-                        """
-                        CREATE TABLE IF NOT EXISTS generated_agent_messages (
-                            id TEXT PRIMARY KEY,
-                            agent_id TEXT NOT NULL,
-                            session_id TEXT NOT NULL,
-                            role TEXT NOT NULL,
-                            content TEXT NOT NULL,
-                            created_at TIMESTAMP NOT NULL
-                        )
-                        """
-                    )
-                    await conn.execute(
-                        """
-                        CREATE INDEX IF NOT EXISTS idx_generated_agent_messages_agent_session
-                        ON generated_agent_messages(agent_id, session_id)
-                        """
-                    )
+                    async with conn.transaction():
+                        # 複数プロセスが同時に起動しても作成・移行は 1 つずつ行う
+                        await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"{TABLE}:migrate")
+                        await self._create_table(conn)
+                        current = month_start(datetime.utcnow())
+                        await self._ensure_partitions(conn, add_months(current, -1), add_months(current, self._months_ahead))
+                        await self._create_version_trigger(conn)
             except RepositoryError:
                 raise
             except Exception as exc:
@@ -96,6 +142,247 @@ class PostgresMessageRepository(MessageRepositoryInterface):
                 )
             self._initialized = True
 
+    async def _create_table(self, conn: asyncpg.Connection) -> None:
+        relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", TABLE)
+        if relkind == "p":
+            return
+        if relkind is not None:
+            # 行数の多いテーブルを起動時にロックしたまま移行しないよう、移行は明示的に実行する
+            raise RepositoryError(
+                f"{TABLE} is not partitioned yet; run "
+                "`python -m src.infra.repositories.generated_agent_messages.migrate` before starting the API"
+            )
+        await self._create_partitioned_table(conn)
+
+    async def _create_partitioned_table(self, conn: asyncpg.Connection) -> None:
+        # 主キーにはパーティションキー（created_at）を含める必要がある
+        await conn.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id TEXT NOT NULL,
+                agent_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+        await conn.execute(
+            f"""
+            CREATE INDEX idx_generated_agent_messages_agent_session_created
+            ON {TABLE}(agent_id, session_id, created_at)
+            """
+        )
+        if self._search_mode == "trigram":
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            await conn.execute(
+                f"""
+                CREATE INDEX idx_generated_agent_messages_content_trgm_part
+                ON {TABLE} USING GIN (content gin_trgm_ops)
+                """
+            )
+        else:
+            await conn.execute(
+                f"""
+                CREATE INDEX idx_generated_agent_messages_content_fts_part
+                ON {TABLE} USING GIN (to_tsvector('simple', content))
+                """
+            )
+
+    async def migrate_legacy_table(self, *, lock_timeout_seconds: float = 10.0, now: Optional[datetime] = None) -> bool:
+        """
+        Turn a table created before partitioning into the partitioned table,
+        keeping its rows in place as the generated_agent_messages_legacy
+        partition. Returns False when there is nothing to migrate.
+
+        Everything that reads the whole table runs without blocking reads and
+        writes: the (id, created_at) unique index and the list index are built
+        CONCURRENTLY, and the partition bound is added as a NOT VALID CHECK
+        constraint that is then validated. The final swap (rename, create the
+        parent, attach) only touches the catalog; it runs in one short
+        transaction that gives up after lock_timeout_seconds.
+
+        The legacy partition covers everything before the month after next,
+        so rows written while this runs still fit in it.
+        """
+        pool = await self._ensure_pool()
+        async with pool.acquire() as conn:
+            relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", TABLE)
+            if relkind != "r":
+                return False
+            upper = add_months(month_start(now or datetime.utcnow()), 2)
+            unique_index = f"{LEGACY_PARTITION}_id_created_at_key"
+            bound = f"{LEGACY_PARTITION}_bound"
+            # CONCURRENTLY はトランザクション外で実行する（中断して無効なまま残った索引は作り直す）
+            await self._create_index_concurrently(
+                conn,
+                unique_index,
+                f"CREATE UNIQUE INDEX CONCURRENTLY {unique_index} ON {TABLE} (id, created_at)",
+            )
+            await self._create_index_concurrently(
+                conn,
+                f"{LEGACY_PARTITION}_agent_session_created_idx",
+                f"CREATE INDEX CONCURRENTLY {LEGACY_PARTITION}_agent_session_created_idx ON {TABLE} (agent_id, session_id, created_at)",
+            )
+            # 検索用の索引は移行前と同じ名前なので、既にあればそのまま使う
+            if self._search_mode == "trigram":
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                await self._create_index_concurrently(
+                    conn,
+                    "idx_generated_agent_messages_content_trgm",
+                    f"CREATE INDEX CONCURRENTLY idx_generated_agent_messages_content_trgm "
+                    f"ON {TABLE} USING GIN (content gin_trgm_ops)",
+                )
+            else:
+                await self._create_index_concurrently(
+                    conn,
+                    "idx_generated_agent_messages_content_fts",
+                    f"CREATE INDEX CONCURRENTLY idx_generated_agent_messages_content_fts "
+                    f"ON {TABLE} USING GIN (to_tsvector('simple', content))",
+                )
+            # NOT VALID の追加は既存の行を読まず、VALIDATE は読み書きを止めずに検証する
+            has_bound = await conn.fetchval(
+                "SELECT count(*) FROM pg_constraint WHERE conrelid = to_regclass($1) AND conname = $2",
+                TABLE,
+                bound,
+            )
+            if has_bound:
+                await conn.execute(f"ALTER TABLE {TABLE} DROP CONSTRAINT {bound}")
+            await conn.execute(
+                f"ALTER TABLE {TABLE} ADD CONSTRAINT {bound} CHECK (created_at < '{upper.isoformat()}') NOT VALID"
+            )
+            await conn.execute(f"ALTER TABLE {TABLE} VALIDATE CONSTRAINT {bound}")
+
+            async with conn.transaction():
+                await conn.execute(f"SET LOCAL lock_timeout = '{int(lock_timeout_seconds * 1000)}ms'")
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"{TABLE}:migrate")
+                primary_key = await conn.fetchval(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass($1) AND contype = 'p'",
+                    TABLE,
+                )
+                # パーティションの主キーは親と同じ (id, created_at) でなければならない（作成済みの索引を使う）
+                drop_primary_key = f"DROP CONSTRAINT {primary_key}, " if primary_key else ""
+                await conn.execute(
+                    f"ALTER TABLE {TABLE} {drop_primary_key}"
+                    f"ADD CONSTRAINT {LEGACY_PARTITION}_pkey PRIMARY KEY USING INDEX {unique_index}"
+                )
+                await conn.execute(f"DROP TRIGGER IF EXISTS trg_generated_agent_messages_list_version ON {TABLE}")
+                await conn.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_PARTITION}")
+                await self._create_partitioned_table(conn)
+                # 検証済みの CHECK 制約があるため範囲の確認で全件を読まず、同じ定義の索引は作り直さずに流用される
+                await conn.execute(
+                    f"ALTER TABLE {TABLE} ATTACH PARTITION {LEGACY_PARTITION} "
+                    f"FOR VALUES FROM (MINVALUE) TO ('{upper.isoformat()}')"
+                )
+                await conn.execute(f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {bound}")
+            # (agent_id, session_id) の索引は (agent_id, session_id, created_at) で置き換わった
+            await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_generated_agent_messages_agent_session")
+        self._initialized = False
+        await self._ensure_initialized()
+        logger.info("migrated %s to monthly partitions; existing rows are in %s", TABLE, LEGACY_PARTITION)
+        return True
+
+    async def _create_index_concurrently(self, conn: asyncpg.Connection, name: str, statement: str) -> None:
+        valid = await conn.fetchval("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)", name)
+        if valid:
+            return
+        if valid is not None:
+            await conn.execute(f"DROP INDEX CONCURRENTLY {name}")
+        await conn.execute(statement)
+
+    async def _create_version_trigger(self, conn: asyncpg.Connection) -> None:
+        # 一覧の ETag 用に、エージェント・セッション毎の変更回数を書き込みと同じトランザクションで数える
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext('list_versions'))")
+        await ensure_list_versions(conn)
+        await conn.execute(
+            """
+            CREATE OR REPLACE FUNCTION generated_agent_messages_bump_list_version() RETURNS trigger AS $$
+            DECLARE
+                changed RECORD;
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    changed := OLD;
+                ELSE
+                    changed := NEW;
+                END IF;
+                PERFORM bump_list_version('agent', changed.agent_id);
+                PERFORM bump_list_version('session', changed.agent_id || '/' || changed.session_id);
+                RETURN changed;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+        await conn.execute(
+            f"""
+            CREATE OR REPLACE TRIGGER trg_generated_agent_messages_list_version
+            AFTER INSERT OR UPDATE OR DELETE ON {TABLE}
+            FOR EACH ROW EXECUTE FUNCTION generated_agent_messages_bump_list_version()
+            """
+        )
+
+    async def _load_partitions(self, conn: asyncpg.Connection) -> List[PartitionRange]:
+        rows = await conn.fetch(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass($1)
+            """,
+            TABLE,
+        )
+        partitions = sorted(
+            (parse_partition_bound(row["relname"], row["bound"]) for row in rows),
+            key=lambda partition: partition.upper,
+        )
+        self._partitions = partitions
+        return partitions
+
+    async def _ensure_partitions(self, conn: asyncpg.Connection, first: datetime, last: datetime) -> None:
+        """Create the monthly partitions from first to last (inclusive) that do not exist yet."""
+        partitions = await self._load_partitions(conn)
+        month = first
+        created = False
+        while month <= last:
+            upper = add_months(month, 1)
+            overlaps = any(
+                (partition.lower is None or partition.lower < upper) and month < partition.upper
+                for partition in partitions
+            )
+            if not overlaps:
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {partition_name(month)}
+                    PARTITION OF {TABLE} FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')
+                    """
+                )
+                created = True
+            month = upper
+        if created:
+            await self._load_partitions(conn)
+
+    async def _ensure_partition_for(self, created_at: datetime) -> None:
+        if any(partition.covers(created_at) for partition in self._partitions):
+            return
+        # 月が替わった直後など、メンテナンスより先に新しい月の行が来た場合はここで作る
+        async with self._init_lock:
+            if any(partition.covers(created_at) for partition in self._partitions):
+                return
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"{TABLE}:migrate")
+                    month = month_start(created_at)
+                    await self._ensure_partitions(conn, month, month)
+
+    async def _read(self, keys: Sequence[str], query: Callable[[Connection], Awaitable[T]]) -> T:
+        if self._replicas is None:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                return await query(conn)
+        return await self._replicas.fetch(keys, self._ensure_pool, query)
+
     def _row_to_entity(self, row: Record) -> MessageEntity:
         return MessageEntity(
             id=row["id"],
@@ -106,11 +393,13 @@ class PostgresMessageRepository(MessageRepositoryInterface):
             created_at=row["created_at"],
         )
 
+    @observe_db("generated_agent_message")
     async def create(self, dto: CreateMessageDto) -> MessageEntity:
         await self._ensure_initialized()
         new_id = str(uuid.uuid4())
         now = datetime.utcnow()
         try:
+            await self._ensure_partition_for(now)
             pool = await self._ensure_pool()
             async with pool.acquire() as conn:
                 await conn.execute(
@@ -135,6 +424,8 @@ class PostgresMessageRepository(MessageRepositoryInterface):
             raise
         except Exception as exc:
             raise_repository_error("Failed to create generated agent message", exc)
+        if self._replicas is not None:
+            self._replicas.record_write(f"agent:{dto.agent_id}", "all")
         return MessageEntity(
             id=new_id,
             agent_id=dto.agent_id,
@@ -144,6 +435,7 @@ class PostgresMessageRepository(MessageRepositoryInterface):
             created_at=now,
         )
 
+    @observe_db("generated_agent_message")
     async def list_by_agent(
         self,
         *,
@@ -151,40 +443,254 @@ class PostgresMessageRepository(MessageRepositoryInterface):
         session_id: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        since: Optional[datetime] = None,
     ) -> List[MessageEntity]:
         await self._ensure_initialized()
         try:
-            pool = await self._ensure_pool()
-            async with pool.acquire() as conn:
-                if session_id is None:
-                    rows = await conn.fetch(
-                        """
-                        SELECT id, agent_id, session_id, role, content, created_at
-                        FROM generated_agent_messages
-                        WHERE agent_id = $1
-                        ORDER BY created_at ASC
-                        OFFSET $2 LIMIT $3
-                        """,
-                        agent_id,
-                        offset,
-                        limit,
-                    )
-                else:
-                    rows = await conn.fetch(
-                        """
-                        SELECT id, agent_id, session_id, role, content, created_at
-                        FROM generated_agent_messages
-                        WHERE agent_id = $1 AND session_id = $2
-                        ORDER BY created_at ASC
-                        OFFSET $3 LIMIT $4
-                        """,
-                        agent_id,
-                        session_id,
-                        offset,
-                        limit,
-                    )
+            rows = await self._read(
+                [f"agent:{agent_id}"],
+                lambda conn: self._fetch_by_agent(conn, agent_id, session_id, limit, offset, since),
+            )
         except RepositoryError:
             raise
         except Exception as exc:
             raise_repository_error("Failed to list generated agent messages", exc)
         return [self._row_to_entity(row) for row in rows]
+
+    @observe_db("generated_agent_message")
+    async def list_by_agent_with_version(
+        self,
+        *,
+        agent_id: str,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+        unchanged: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[str, Optional[List[MessageEntity]]]:
+        await self._ensure_initialized()
+        scope = ("agent", agent_id) if session_id is None else ("session", f"{agent_id}/{session_id}")
+
+        async def query(conn: Connection) -> Tuple[str, Optional[List[Record]]]:
+            # バージョンと一覧を 1 つの接続・スナップショットで読む（古い一覧に新しい ETag を付けない）
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                version = await read_versions(conn, [scope, ("retention", TABLE)])
+                if unchanged is not None and unchanged(version):
+                    return version, None
+                return version, await self._fetch_by_agent(conn, agent_id, session_id, limit, offset, since)
+
+        try:
+            version, rows = await self._read([f"agent:{agent_id}"], query)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to list generated agent messages", exc)
+        if rows is None:
+            return version, None
+        return version, [self._row_to_entity(row) for row in rows]
+
+    async def _fetch_by_agent(
+        self,
+        conn: Connection,
+        agent_id: str,
+        session_id: Optional[str],
+        limit: int,
+        offset: int,
+        since: Optional[datetime],
+    ) -> List[Record]:
+        conditions = ["agent_id = $1"]
+        args: List[object] = [agent_id]
+        if session_id is not None:
+            args.append(session_id)
+            conditions.append(f"session_id = ${len(args)}")
+        if since is not None:
+            # created_at の下限があれば、それより前の月のパーティションは読まない
+            args.append(since)
+            conditions.append(f"created_at >= ${len(args)}")
+        args.extend([offset, limit])
+        return await conn.fetch(
+            f"""
+            SELECT id, agent_id, session_id, role, content, created_at
+            FROM generated_agent_messages
+            WHERE {" AND ".join(conditions)}
+            ORDER BY created_at ASC
+            OFFSET ${len(args) - 1} LIMIT ${len(args)}
+            """,
+            *args,
+        )
+
+    @observe_db("generated_agent_message")
+    async def search(
+        self,
+        *,
+        query: str,
+        agent_id: str,
+        session_id: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+    ) -> List[MessageSearchHit]:
+        terms = split_terms(query)
+        if not terms:
+            return []
+        await self._ensure_initialized()
+
+        conditions: List[str] = []
+        args: List[object] = []
+        if self._search_mode == "trigram":
+            for term in terms:
+                if len(term) < TRIGRAM_MIN_TERM_LENGTH:
+                    # 2 文字以下の語（「会議」など）は trigram を作れず GIN インデックスの全件走査になるため、
+                    # インデックスの使えない strpos にして (agent_id, session_id, created_at) の範囲内だけで照合する
+                    args.append(term)
+                    conditions.append(f"strpos(lower(content), ${len(args)}) > 0")
+                else:
+                    args.append("%" + _escape_like(term) + "%")
+                    conditions.append(f"content ILIKE ${len(args)}")
+        else:
+            args.append(query)
+            conditions.append(f"to_tsvector('simple', content) @@ websearch_to_tsquery('simple', ${len(args)})")
+        args.append(agent_id)
+        conditions.append(f"agent_id = ${len(args)}")
+        if session_id is not None:
+            args.append(session_id)
+            conditions.append(f"session_id = ${len(args)}")
+        if since is not None:
+            args.append(since)
+            conditions.append(f"created_at >= ${len(args)}")
+        args.extend([offset, limit])
+        where_sql = " AND ".join(conditions)
+        page_sql = f"""
+            SELECT id, agent_id, session_id, role, content, created_at
+            FROM generated_agent_messages
+            WHERE {where_sql}
+            ORDER BY created_at DESC
+            OFFSET ${len(args) - 1} LIMIT ${len(args)}
+        """
+        if self._search_mode != "trigram":
+            # ts_headline は重いので、ページングで絞り込んだ行に対してのみ実行する
+            page_sql = f"""
+                SELECT page.*,
+                       ts_headline(
+                           'simple', page.content, websearch_to_tsquery('simple', $1),
+                           'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=35, MinWords=15, MaxFragments=2'
+                       ) AS snippet
+                FROM ({page_sql}) AS page
+                ORDER BY page.created_at DESC
+            """
+        try:
+            rows = await self._read(
+                [f"agent:{agent_id}"],
+                lambda conn: conn.fetch(page_sql, *args),
+            )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to search generated agent messages", exc)
+        return [
+            MessageSearchHit(
+                message=self._row_to_entity(row),
+                snippet=row["snippet"] if self._search_mode != "trigram" else build_snippet(row["content"], terms),
+            )
+            for row in rows
+        ]
+
+
+    async def maintain_partitions(
+        self,
+        *,
+        retention_months: int = 0,
+        archive_dir: Optional[Path] = None,
+        now: Optional[datetime] = None,
+    ) -> List[Path]:
+        """
+        Create the partitions of the coming months and, when retention_months
+        is set, retire the partitions that ended more than retention_months
+        months before the current one: detach them, archive their rows as
+        gzipped CSV files in archive_dir and drop them.
+
+        Only one instance runs this at a time; the others return right away.
+        Returns the archive files written.
+        """
+        if retention_months > 0 and archive_dir is None:
+            raise ValueError("archive_dir is required when retention_months is set")
+        await self._ensure_initialized()
+        current = month_start(now or datetime.utcnow())
+        archived: List[Path] = []
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                if not await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", f"{TABLE}:maintenance"):
+                    return archived
+                try:
+                    async with conn.transaction():
+                        await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", f"{TABLE}:migrate")
+                        await self._ensure_partitions(conn, current, add_months(current, self._months_ahead))
+                    if retention_months > 0 and archive_dir is not None:
+                        cutoff = add_months(current, -retention_months)
+                        await self._detach_partitions(conn, cutoff)
+                        # 前回アーカイブの途中で止まったものも含め、切り離し済みのパーティションを書き出して削除する
+                        for name in await self._detached_partitions(conn):
+                            archived.append(await self._archive_partition(conn, name, archive_dir))
+                        if archived:
+                            # 行ごとのトリガーは DROP では動かないため、全エージェントの一覧の ETag をまとめて変える
+                            await conn.execute("SELECT bump_list_version('retention', $1)", TABLE)
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", f"{TABLE}:maintenance")
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to maintain generated agent message partitions", exc)
+        return archived
+
+    async def _detach_partitions(self, conn: asyncpg.Connection, cutoff: datetime) -> None:
+        pending = {
+            row["relname"]
+            for row in await conn.fetch(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass($1) AND i.inhdetachpending
+                """,
+                TABLE,
+            )
+        }
+        for partition in await self._load_partitions(conn):
+            if partition.name in pending:
+                # 前回の CONCURRENTLY での切り離しが中断されている
+                await conn.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {partition.name} FINALIZE")
+            elif partition.upper <= cutoff:
+                # CONCURRENTLY なら切り離しの間も親テーブルへの読み書きを止めない（トランザクション外で実行する）
+                await conn.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {partition.name} CONCURRENTLY")
+        await self._load_partitions(conn)
+
+    async def _detached_partitions(self, conn: asyncpg.Connection) -> List[str]:
+        rows = await conn.fetch(
+            """
+            SELECT relname
+            FROM pg_class
+            WHERE relnamespace = current_schema()::regnamespace
+              AND relkind = 'r'
+              AND NOT relispartition
+              AND relname LIKE $1
+            """,
+            f"{TABLE}\\_%",
+        )
+        return sorted(row["relname"] for row in rows if PARTITION_PATTERN.match(row["relname"]))
+
+    async def _archive_partition(self, conn: asyncpg.Connection, name: str, archive_dir: Path) -> Path:
+        await asyncio.to_thread(archive_dir.mkdir, parents=True, exist_ok=True)
+        raw = archive_dir / f"{name}.csv"
+        destination = archive_dir / f"{name}.csv.gz"
+        await conn.copy_from_table(name, output=str(raw), format="csv", header=True)
+        await asyncio.to_thread(compress_file, raw, destination)
+        # 書き出しが終わってから削除する（途中で失敗した場合は次回やり直す）
+        await conn.execute(f"DROP TABLE {name}")
+        message_partitions_archived_total.inc()
+        logger.info("archived message partition %s to %s", name, destination)
+        return destination
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -0,0 +1,62 @@
+"""Helpers shared by the message search implementations."""
+
+import re
+from typing import Iterable, List, Set
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# 日本語（ひらがな・カタカナ・漢字）など空白で区切られない文字
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f]+")
+_WORD_PATTERN = re.compile(r"[0-9a-z_\u00c0-\u024f]+")
+# pg_trgm が trigram を作れる最短の語長。これより短い語は trigram インデックスで絞り込めない
+TRIGRAM_MIN_TERM_LENGTH = 3
+
+
+def split_terms(query: str) -> List[str]:
+    """Split a user query into non-empty, lower-cased terms separated by whitespace."""
+    return [t for t in query.lower().split() if t]
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    Tokenize text for the in-memory inverted index.
+    Latin words are indexed as whole lower-cased words, CJK runs are indexed as
+    character bigrams so that Japanese text without spaces can still be looked
+    up by substring.
+    """
+    lowered = text.lower()
+    tokens: Set[str] = set(_WORD_PATTERN.findall(lowered))
+    for run in _CJK_PATTERN.findall(lowered):
+        if len(run) == 1:
+            tokens.add(run)
+            continue
+        tokens.update(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def build_snippet(content: str, terms: Iterable[str], *, radius: int = 40) -> str:
+    """
+    Build a short highlighted excerpt around the first matching term.
+    Matching is case-insensitive; every occurrence inside the excerpt is wrapped
+    with HIGHLIGHT_START / HIGHLIGHT_END.
+    """
+    terms = [t for t in terms if t]
+    if not terms:
+        return content[: radius * 2]
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(content)
+    if first is None:
+        return content[: radius * 2]
+    start = max(0, first.start() - radius)
+    end = min(len(content), first.end() + radius)
+    excerpt = pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}", content[start:end])
+    if start > 0:
+        excerpt = "…" + excerpt
+    if end < len(content):
+        excerpt = excerpt + "…"
+    return excerpt
+
+
+def has_cjk(term: str) -> bool:
+    return _CJK_PATTERN.search(term) is not None
@@ -20,3 +20,9 @@ class CreateMessageDto(BaseModel):
     session_id: str
     role: Literal["user", "assistant"]
     content: str
+
+
+class MessageSearchHit(BaseModel):
+    message: MessageEntity
+    # 検索語を <mark>...</mark> で囲んだ抜粋
+    snippet: str
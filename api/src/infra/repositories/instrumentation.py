@@ -0,0 +1,62 @@
+"""Latency metrics and trace spans for repository methods."""
+
+import functools
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from src.infra.metrics.app_metrics import db_query_duration_seconds
+from src.infra.tracing import tracer
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+@dataclass(frozen=True)
+class QuerySample:
+    method: str
+    seconds: float
+    ok: bool
+    # time.monotonic() when the query finished
+    finished_at: float
+
+
+_last_queries: Dict[str, QuerySample] = {}
+
+
+def last_query(repository: str) -> Optional[QuerySample]:
+    """The most recent query of the repository (for health checks)."""
+    return _last_queries.get(repository)
+
+
+def observe_db(repository: str) -> Callable[[F], F]:
+    """
+    Decorator for async repository methods: records db_query_duration_seconds,
+    the repository's last query and, when tracing is enabled, a
+    "db.<repository>.<method>" span.
+    """
+
+    def decorator(func: F) -> F:
+        ok = db_query_duration_seconds.labels(repository, func.__name__, "ok")
+        error = db_query_duration_seconds.labels(repository, func.__name__, "error")
+        span_name = f"db.{repository}.{func.__name__}"
+        span_attributes = {"db.system": "postgresql", "db.repository": repository}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with tracer.start_as_current_span(span_name, span_attributes):
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    elapsed = time.perf_counter() - start
+                    error.observe(elapsed)
+                    _last_queries[repository] = QuerySample(func.__name__, elapsed, False, time.monotonic())
+                    raise
+            elapsed = time.perf_counter() - start
+            ok.observe(elapsed)
+            _last_queries[repository] = QuerySample(func.__name__, elapsed, True, time.monotonic())
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,74 @@
+"""
+Change counters of list scopes, for conditional GETs (ETag) of list routes.
+
+Row triggers on generated_agents and generated_agent_messages bump a
+(scope, key) counter in list_versions in the same transaction as the write,
+so a route can tell whether a list changed by reading one row instead of the
+list itself. Scopes:
+
+- owner   (owner_id): agents of an owner
+- agent   (agent_id): messages of an agent
+- session (agent_id/session_id): messages of an agent's session
+- retention (messages): bumped when the retention policy drops a month
+"""
+
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from asyncpg import Connection
+
+CREATE_LIST_VERSIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS list_versions (
+        scope TEXT NOT NULL,
+        key TEXT NOT NULL,
+        version BIGINT NOT NULL,
+        updated_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (scope, key)
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bump_list_version(p_scope TEXT, p_key TEXT) RETURNS void AS $$
+        INSERT INTO list_versions (scope, key, version, updated_at)
+        VALUES (p_scope, p_key, 1, clock_timestamp() AT TIME ZONE 'UTC')
+        ON CONFLICT (scope, key) DO UPDATE
+        SET version = list_versions.version + 1,
+            updated_at = EXCLUDED.updated_at
+    $$ LANGUAGE sql
+    """,
+]
+
+
+async def ensure_list_versions(conn: Connection) -> None:
+    for statement in CREATE_LIST_VERSIONS:
+        await conn.execute(statement)
+
+
+def format_version(version: Optional[int], updated_at: Optional[datetime]) -> str:
+    if version is None or updated_at is None:
+        return "0"
+    return f"{version}.{int(updated_at.timestamp() * 1_000_000)}"
+
+
+async def read_versions(conn: Connection, keys: Sequence[Tuple[str, str]]) -> str:
+    """Token of the given (scope, key) counters (a counter that was never bumped reads as 0)."""
+    rows = await conn.fetch(
+        """
+        SELECT k.scope, k.key, v.version, v.updated_at
+        FROM unnest($1::text[], $2::text[]) AS k(scope, key)
+        LEFT JOIN list_versions v ON v.scope = k.scope AND v.key = k.key
+        """,
+        [scope for scope, _ in keys],
+        [key for _, key in keys],
+    )
+    by_key = {(row["scope"], row["key"]): format_version(row["version"], row["updated_at"]) for row in rows}
+    return "-".join(by_key[key] for key in keys)
+
+
+async def read_scope_version(conn: Connection, scope: str) -> str:
+    """Token covering every key of a scope (reads one row per key; for unfiltered lists)."""
+    row = await conn.fetchrow(
+        "SELECT sum(version)::BIGINT AS version, max(updated_at) AS updated_at FROM list_versions WHERE scope = $1",
+        scope,
+    )
+    return format_version(row["version"], row["updated_at"])
@@ -0,0 +1,12 @@
+from .types import CreateMessageEmbeddingDto, SimilarMessage
+from .interface import MessageEmbeddingRepositoryInterface
+from .in_memory_repository import InMemoryMessageEmbeddingRepository
+from .postgres_repository import PostgresMessageEmbeddingRepository
+
+__all__ = [
+    "CreateMessageEmbeddingDto",
+    "SimilarMessage",
+    "MessageEmbeddingRepositoryInterface",
+    "InMemoryMessageEmbeddingRepository",
+    "PostgresMessageEmbeddingRepository",
+]
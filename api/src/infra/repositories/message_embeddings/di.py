@@ -0,0 +1,26 @@
+from src.config import get_env_variable
+
+from .in_memory_repository import InMemoryMessageEmbeddingRepository
+from .interface import MessageEmbeddingRepositoryInterface
+from .postgres_repository import PostgresMessageEmbeddingRepository
+
+
+def get_message_embedding_repository() -> MessageEmbeddingRepositoryInterface:
+    use_in_memory = get_env_variable("USE_IN_MEMORY", "0") == "1"
+    if use_in_memory:
+        return InMemoryMessageEmbeddingRepository()
+
+    dsn = get_env_variable("DATABASE_URL")
+    if not dsn:
+        raise RuntimeError(
+            "DATABASE_URL environment variable is required when USE_IN_MEMORY is not '1'."
+        )
+    return PostgresMessageEmbeddingRepository(
+        dsn,
+        dimensions=int(get_env_variable("EMBEDDING_DIMENSIONS", "1536")),
+        exact_search_max_rows=int(get_env_variable("SEMANTIC_MEMORY_EXACT_SEARCH_MAX_ROWS", "5000")),
+        max_scan_tuples=int(get_env_variable("SEMANTIC_MEMORY_MAX_SCAN_TUPLES", "20000")),
+    )
+
+
+message_embedding_repository = get_message_embedding_repository()
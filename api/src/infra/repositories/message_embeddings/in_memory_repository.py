@@ -0,0 +1,65 @@
+import asyncio
+import math
+from typing import Dict, List, Sequence
+
+from .interface import MessageEmbeddingRepositoryInterface
+from .types import CreateMessageEmbeddingDto, SimilarMessage
+
+
+class InMemoryMessageEmbeddingRepository(MessageEmbeddingRepositoryInterface):
+    """
+    In-memory implementation using exact (brute-force) cosine similarity.
+    Vectors are normalized on insert so that similarity is a plain dot product.
+    """
+
+    def __init__(self) -> None:
+        self._store: Dict[str, CreateMessageEmbeddingDto] = {}
+        self._lock = asyncio.Lock()
+
+    async def upsert_many(self, dtos: Sequence[CreateMessageEmbeddingDto]) -> int:
+        async with self._lock:
+            for dto in dtos:
+                self._store[dto.message_id] = dto.model_copy(update={"embedding": _normalize(dto.embedding)})
+            return len(dtos)
+
+    async def search_similar(
+        self,
+        *,
+        owner_id: str,
+        embedding: Sequence[float],
+        limit: int = 5,
+    ) -> List[SimilarMessage]:
+        query = _normalize(embedding)
+        async with self._lock:
+            scored = [
+                (sum(a * b for a, b in zip(query, item.embedding)), item)
+                for item in self._store.values()
+                if item.owner_id == owner_id
+            ]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [
+            SimilarMessage(
+                message_id=item.message_id,
+                agent_id=item.agent_id,
+                session_id=item.session_id,
+                role=item.role,
+                content=item.content,
+                created_at=item.created_at,
+                score=score,
+            )
+            for score, item in scored[:limit]
+        ]
+
+    async def delete_by_owner(self, owner_id: str) -> int:
+        async with self._lock:
+            ids = [mid for mid, item in self._store.items() if item.owner_id == owner_id]
+            for mid in ids:
+                del self._store[mid]
+            return len(ids)
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        return list(vector)
+    return [v / norm for v in vector]
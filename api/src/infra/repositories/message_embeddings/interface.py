@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+from .types import CreateMessageEmbeddingDto, SimilarMessage
+
+
+class MessageEmbeddingRepositoryInterface(ABC):
+    @abstractmethod
+    async def upsert_many(self, dtos: Sequence[CreateMessageEmbeddingDto]) -> int:
+        """Insert or replace embeddings keyed by message_id. Return the number of rows written."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_similar(
+        self,
+        *,
+        owner_id: str,
+        embedding: Sequence[float],
+        limit: int = 5,
+    ) -> List[SimilarMessage]:
+        """Return the owner's messages nearest to embedding by cosine distance."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_by_owner(self, owner_id: str) -> int:
+        """Delete every embedding of the owner. Return the number of rows deleted."""
+        raise NotImplementedError
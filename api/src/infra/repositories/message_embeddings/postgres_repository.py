@@ -0,0 +1,317 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+import asyncpg
+from asyncpg import Pool, Record
+
+from src.infra.metrics import track_pool
+from src.infra.metrics.app_metrics import memory_searches_total
+
+from ..exceptions import RepositoryError, raise_repository_error
+from ..instrumentation import observe_db
+from ..pool_health import register_pool
+from .interface import MessageEmbeddingRepositoryInterface
+from .types import CreateMessageEmbeddingDto, SimilarMessage
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresMessageEmbeddingRepository(MessageEmbeddingRepositoryInterface):
+    """
+    pgvector-backed repository for message embeddings.
+
+    The HNSW index (cosine distance) is not filtered by owner: it returns the
+    nearest rows of all owners and owner_id is applied afterwards, so a plain
+    index scan can return few or no rows for an owner with a small share of
+    the table. search_similar() therefore
+    - scans an owner's rows exactly when there are at most exact_search_max_rows,
+    - otherwise uses the index with iterative scans (pgvector >= 0.8), which
+      keep walking the graph until limit rows of the owner are found (up to
+      max_scan_tuples), and falls back to the exact scan if that falls short,
+    - uses the exact scan for every owner on older pgvector.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        dimensions: int,
+        ef_search: int = 40,
+        exact_search_max_rows: int = 5000,
+        max_scan_tuples: int = 20000,
+    ) -> None:
+        self._dsn = dsn
+        self._dimensions = dimensions
+        self._ef_search = ef_search
+        self._exact_search_max_rows = exact_search_max_rows
+        self._max_scan_tuples = max_scan_tuples
+        # pgvector が iterative scan（0.8 以降）に対応しているか（初期化時に確認する）
+        self._iterative_scan = False
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._pool: Optional[Pool] = None
+        self._pool_lock = asyncio.Lock()
+        track_pool("message_embedding", lambda: self._pool)
+        register_pool("message_embedding", lambda: self._pool, self._ensure_pool)
+
+    async def _ensure_pool(self) -> Pool:
+        if self._pool is not None:
+            return self._pool
+        async with self._pool_lock:
+            if self._pool is None:
+                for attempt in range(3):
+                    try:
+                        self._pool = await asyncpg.create_pool(
+                            self._dsn,
+                            min_size=1,
+                            max_size=5,
+                        )
+                        break
+                    except Exception as exc:
+                        if attempt == 2:
+                            raise_repository_error(
+                                "Failed to create connection pool for message embedding repository",
+                                exc,
+                            )
+                        await asyncio.sleep(2 ** attempt)
+        if self._pool is None:
+            raise RepositoryError(
+                "Connection pool was not initialized for message embedding repository",
+            )
+        return self._pool
+
+    async def close(self) -> None:
+        async with self._pool_lock:
+            if self._pool is not None:
+                try:
+                    await self._pool.close()
+                except Exception as exc:
+                    raise_repository_error(
+                        "Failed to close connection pool for message embedding repository",
+                        exc,
+                    )
+                self._pool = None
+        self._initialized = False
+
+    async def _ensure_initialized(self) -> None:
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            try:
+                pool = await self._ensure_pool()
+                async with pool.acquire() as conn:
+                    await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                    await conn.execute(
+                        f"""
+                        CREATE TABLE IF NOT EXISTS message_embeddings (
+                            message_id TEXT PRIMARY KEY,
+                            owner_id TEXT NOT NULL,
+                            agent_id TEXT NOT NULL,
+                            session_id TEXT NOT NULL,
+                            role TEXT NOT NULL,
+                            content TEXT NOT NULL,
+                            created_at TIMESTAMP NOT NULL,
+                            embedding vector({int(self._dimensions)}) NOT NULL
+                        )
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_message_embeddings_owner
+                        ON message_embeddings(owner_id)
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_message_embeddings_hnsw
+                        ON message_embeddings USING hnsw (embedding vector_cosine_ops)
+                        """
+                    )
+                    version = await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+                    self._iterative_scan = _version_tuple(version) >= (0, 8)
+            except RepositoryError:
+                raise
+            except Exception as exc:
+                raise_repository_error(
+                    "Failed to initialize message embedding repository",
+                    exc,
+                )
+            self._initialized = True
+
+    def _row_to_similar(self, row: Record) -> SimilarMessage:
+        return SimilarMessage(
+            message_id=row["message_id"],
+            agent_id=row["agent_id"],
+            session_id=row["session_id"],
+            role=row["role"],
+            content=row["content"],
+            created_at=row["created_at"],
+            score=1.0 - float(row["distance"]),
+        )
+
+    @observe_db("message_embedding")
+    async def upsert_many(self, dtos: Sequence[CreateMessageEmbeddingDto]) -> int:
+        if not dtos:
+            return 0
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                await conn.executemany(
+                    """
+                    INSERT INTO message_embeddings (
+                        message_id,
+                        owner_id,
+                        agent_id,
+                        session_id,
+                        role,
+                        content,
+                        created_at,
+                        embedding
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8::vector)
+                    ON CONFLICT (message_id) DO UPDATE
+                    SET content = EXCLUDED.content,
+                        embedding = EXCLUDED.embedding
+                    """,
+                    [
+                        (
+                            dto.message_id,
+                            dto.owner_id,
+                            dto.agent_id,
+                            dto.session_id,
+                            dto.role,
+                            dto.content,
+                            dto.created_at,
+                            _to_vector_literal(dto.embedding),
+                        )
+                        for dto in dtos
+                    ],
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to upsert message embeddings", exc)
+        return len(dtos)
+
+    @observe_db("message_embedding")
+    async def search_similar(
+        self,
+        *,
+        owner_id: str,
+        embedding: Sequence[float],
+        limit: int = 5,
+    ) -> List[SimilarMessage]:
+        await self._ensure_initialized()
+        vector = _to_vector_literal(embedding)
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    owner_rows = await conn.fetchval(
+                        """
+                        SELECT count(*) FROM (
+                            SELECT 1 FROM message_embeddings WHERE owner_id = $1 LIMIT $2
+                        ) AS owned
+                        """,
+                        owner_id,
+                        self._exact_search_max_rows + 1,
+                    )
+                    if owner_rows <= self._exact_search_max_rows or not self._iterative_scan:
+                        rows = await self._exact_search(conn, owner_id, vector, limit)
+                        memory_searches_total.labels("exact").inc()
+                    else:
+                        rows = await self._index_search(conn, owner_id, vector, limit)
+                        if len(rows) < limit:
+                            # max_scan_tuples までにオーナーの行が limit 件見つからなかった
+                            logger.warning(
+                                "HNSW search found %d of %d memories for an owner with more than %d rows; using an exact scan",
+                                len(rows),
+                                limit,
+                                self._exact_search_max_rows,
+                            )
+                            rows = await self._exact_search(conn, owner_id, vector, limit)
+                            memory_searches_total.labels("index_fallback").inc()
+                        else:
+                            memory_searches_total.labels("index").inc()
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to search message embeddings", exc)
+        return [self._row_to_similar(row) for row in rows]
+
+    async def _exact_search(self, conn: asyncpg.Connection, owner_id: str, vector: str, limit: int) -> List[Record]:
+        # MATERIALIZED でオーナーの行だけを取り出してから並べる（HNSW インデックスを使わせない）
+        return await conn.fetch(
+            """
+            WITH owned AS MATERIALIZED (
+                SELECT message_id, agent_id, session_id, role, content, created_at,
+                       embedding <=> $2::vector AS distance
+                FROM message_embeddings
+                WHERE owner_id = $1
+            )
+            SELECT * FROM owned
+            ORDER BY distance
+            LIMIT $3
+            """,
+            owner_id,
+            vector,
+            limit,
+        )
+
+    async def _index_search(self, conn: asyncpg.Connection, owner_id: str, vector: str, limit: int) -> List[Record]:
+        # 他のオーナーの行で候補が埋まっても、オーナーの行が limit 件見つかるまで（最大 max_scan_tuples 行）探索を続ける
+        await conn.execute(f"SET LOCAL hnsw.ef_search = {max(int(self._ef_search), limit)}")
+        await conn.execute("SET LOCAL hnsw.iterative_scan = relaxed_order")
+        await conn.execute(f"SET LOCAL hnsw.max_scan_tuples = {int(self._max_scan_tuples)}")
+        # relaxed_order は距離順が多少前後するため、取り出した行を並べ直す
+        return await conn.fetch(
+            """
+            WITH nearest AS MATERIALIZED (
+                SELECT message_id, agent_id, session_id, role, content, created_at,
+                       embedding <=> $2::vector AS distance
+                FROM message_embeddings
+                WHERE owner_id = $1
+                ORDER BY embedding <=> $2::vector
+                LIMIT $3
+            )
+            SELECT * FROM nearest
+            ORDER BY distance
+            """,
+            owner_id,
+            vector,
+            limit,
+        )
+
+    @observe_db("message_embedding")
+    async def delete_by_owner(self, owner_id: str) -> int:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                deleted = await conn.fetchval(
+                    """
+                    WITH deleted AS (
+                        DELETE FROM message_embeddings WHERE owner_id = $1 RETURNING 1
+                    )
+                    SELECT count(*) FROM deleted
+                    """,
+                    owner_id,
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to delete message embeddings", exc)
+        return int(deleted or 0)
+
+
+def _version_tuple(version: Optional[str]) -> Tuple[int, ...]:
+    if not version:
+        return (0,)
+    return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+
+def _to_vector_literal(embedding: Sequence[float]) -> str:
+    return "[" + ",".join(repr(float(v)) for v in embedding) + "]"
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Literal
+
+from pydantic import BaseModel
+
+
+class CreateMessageEmbeddingDto(BaseModel):
+    message_id: str
+    owner_id: str
+    agent_id: str
+    session_id: str
+    role: Literal["user", "assistant"]
+    content: str
+    created_at: datetime
+    embedding: List[float]
+
+
+class SimilarMessage(BaseModel):
+    message_id: str
+    agent_id: str
+    session_id: str
+    role: Literal["user", "assistant"]
+    content: str
+    created_at: datetime
+    # cosine similarity (1.0 = identical direction)
+    score: float
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,63 @@
+"""Connection checks of the Postgres repositories' pools, for readiness probes."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .instrumentation import last_query
+
+
+@dataclass(frozen=True)
+class _TrackedPool:
+    get_pool: Callable[[], Optional[Any]]
+    ensure_pool: Callable[[], Awaitable[Any]]
+
+
+_pools: Dict[str, _TrackedPool] = {}
+
+
+def register_pool(
+    repository: str,
+    get_pool: Callable[[], Optional[Any]],
+    ensure_pool: Callable[[], Awaitable[Any]],
+) -> None:
+    """Register a repository's asyncpg pool (get_pool may return None before it is created)."""
+    _pools[repository] = _TrackedPool(get_pool, ensure_pool)
+
+
+async def _check_pool(repository: str, tracked: _TrackedPool, timeout: float) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    started = time.perf_counter()
+    try:
+        # 初回はプールを作成する（作成に失敗すればレディネスも失敗する）
+        pool = await asyncio.wait_for(tracked.ensure_pool(), timeout)
+        async with pool.acquire(timeout=timeout) as conn:
+            await conn.fetchval("SELECT 1", timeout=timeout)
+        report["ok"] = True
+    except Exception as exc:
+        report["ok"] = False
+        report["error"] = repr(exc)
+    report["ping_seconds"] = round(time.perf_counter() - started, 6)
+
+    pool = tracked.get_pool()
+    if pool is not None:
+        report["size"] = pool.get_size()
+        report["idle"] = pool.get_idle_size()
+        report["max"] = pool.get_max_size()
+    sample = last_query(repository)
+    if sample is not None:
+        report["last_query"] = {
+            "method": sample.method,
+            "seconds": round(sample.seconds, 6),
+            "ok": sample.ok,
+            "age_seconds": round(time.monotonic() - sample.finished_at, 3),
+        }
+    return report
+
+
+async def check_pools(timeout: float = 2.0) -> Dict[str, Dict[str, Any]]:
+    """Ping every registered pool concurrently; {} when no Postgres repository is in use."""
+    names = list(_pools)
+    reports = await asyncio.gather(*(_check_pool(name, _pools[name], timeout) for name in names))
+    return dict(zip(names, reports))
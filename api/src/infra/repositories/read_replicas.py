@@ -0,0 +1,199 @@
+"""
+Read routing to Postgres replicas for the repositories.
+
+Reads go round-robin to replicas that are reachable and not lagging, except
+for keys the process wrote within the last read_your_writes_seconds: those
+read from the primary so a client sees its own change right away. A replica
+that cannot be reached (or cancels a query in recovery) is skipped for
+retry_seconds and the read is retried on the primary.
+
+Writes are only known to the process that made them; another API instance or
+a run worker may still serve a replica's older rows for up to the
+replication lag.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+import asyncpg
+from asyncpg import Connection, Pool
+
+from src.config import get_env_variable
+from src.infra.metrics import track_pool
+from src.infra.metrics.app_metrics import db_reads_total
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# レプリカ側の問題として主系で読み直すエラー（SQL の誤りなどはそのまま返す）
+_REPLICA_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.InterfaceError,
+    asyncpg.CannotConnectNowError,
+    # 復旧中のレプリカで WAL の適用と競合してキャンセルされたクエリ
+    asyncpg.SerializationError,
+)
+
+_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class _Replica:
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+        self.pool: Optional[Pool] = None
+        self.lock = asyncio.Lock()
+        # time.monotonic() がこの値になるまで使わない（接続失敗・遅延の超過）
+        self.unavailable_until = 0.0
+        # 直近に確認したレプリケーション遅延（秒）
+        self.lag = 0.0
+        self.lag_checked_at = 0.0
+
+
+class ReadReplicas:
+    """
+    Replica pools of one repository. The repository calls record_write() with
+    the keys a write touched and runs reads through fetch() with the keys the
+    read depends on.
+    """
+
+    def __init__(
+        self,
+        repository: str,
+        dsns: Sequence[str],
+        *,
+        read_your_writes_seconds: float = 2.0,
+        max_lag_seconds: float = 5.0,
+        lag_check_seconds: float = 5.0,
+        retry_seconds: float = 30.0,
+        max_size: int = 10,
+    ) -> None:
+        self._repository = repository
+        self._replicas = [_Replica(dsn) for dsn in dsns]
+        self._rotation = itertools.cycle(self._replicas)
+        self._read_your_writes = read_your_writes_seconds
+        self._max_lag = max_lag_seconds
+        self._lag_check = lag_check_seconds
+        self._retry = retry_seconds
+        self._max_size = max_size
+        # key -> time.monotonic() まで主系で読む
+        self._recent_writes: Dict[str, float] = {}
+        for index, replica in enumerate(self._replicas):
+            track_pool(f"{repository}_replica{index}", lambda replica=replica: replica.pool)
+
+    def record_write(self, *keys: str) -> None:
+        """Route reads of these keys to the primary for the read-your-writes window."""
+        now = time.monotonic()
+        if len(self._recent_writes) > 10_000:
+            self._recent_writes = {key: until for key, until in self._recent_writes.items() if until > now}
+        until = now + self._read_your_writes
+        for key in keys:
+            self._recent_writes[key] = until
+
+    def _written_recently(self, keys: Iterable[str]) -> bool:
+        now = time.monotonic()
+        return any(self._recent_writes.get(key, 0.0) > now for key in keys)
+
+    async def fetch(
+        self,
+        keys: Sequence[str],
+        primary: Callable[[], Awaitable[Pool]],
+        query: Callable[[Connection], Awaitable[T]],
+    ) -> T:
+        """Run a read query on a replica, or on the primary when keys were just written or no replica is usable."""
+        if self._written_recently(keys):
+            target = "primary"
+        else:
+            target = "fallback"
+            replica = self._next_replica()
+            while replica is not None:
+                try:
+                    pool = await self._ensure_pool(replica)
+                    if pool is not None:
+                        async with pool.acquire() as conn:
+                            if await self._caught_up(replica, conn):
+                                result = await query(conn)
+                                db_reads_total.labels(self._repository, "replica").inc()
+                                return result
+                except _REPLICA_ERRORS as exc:
+                    self._mark_unavailable(replica, exc)
+                replica = self._next_replica()
+        db_reads_total.labels(self._repository, target).inc()
+        pool = await primary()
+        async with pool.acquire() as conn:
+            return await query(conn)
+
+    def _next_replica(self) -> Optional[_Replica]:
+        now = time.monotonic()
+        for _ in range(len(self._replicas)):
+            replica = next(self._rotation)
+            if replica.unavailable_until <= now:
+                return replica
+        return None
+
+    async def _ensure_pool(self, replica: _Replica) -> Optional[Pool]:
+        if replica.pool is not None:
+            return replica.pool
+        async with replica.lock:
+            if replica.pool is None and replica.unavailable_until <= time.monotonic():
+                try:
+                    replica.pool = await asyncpg.create_pool(replica.dsn, min_size=1, max_size=self._max_size)
+                except Exception as exc:
+                    self._mark_unavailable(replica, exc)
+        return replica.pool
+
+    async def _caught_up(self, replica: _Replica, conn: Connection) -> bool:
+        now = time.monotonic()
+        if now - replica.lag_checked_at < self._lag_check:
+            return True
+        replica.lag = float(await conn.fetchval(_LAG_QUERY) or 0.0)
+        replica.lag_checked_at = now
+        if replica.lag <= self._max_lag:
+            return True
+        # 次の確認までは使わない
+        replica.unavailable_until = now + self._lag_check
+        logger.warning(
+            "read replica of %s is %.1fs behind, reading from the primary",
+            self._repository,
+            replica.lag,
+        )
+        return False
+
+    def _mark_unavailable(self, replica: _Replica, exc: BaseException) -> None:
+        replica.unavailable_until = time.monotonic() + self._retry
+        logger.warning(
+            "read replica of %s failed, reading from the primary for %.0fs: %r",
+            self._repository,
+            self._retry,
+            exc,
+        )
+
+    async def close(self) -> None:
+        for replica in self._replicas:
+            if replica.pool is not None:
+                await replica.pool.close()
+                replica.pool = None
+
+
+def get_read_replicas(repository: str) -> Optional[ReadReplicas]:
+    """ReadReplicas over DATABASE_REPLICA_URLS (comma separated), or None when unset."""
+    dsns: List[str] = [dsn.strip() for dsn in get_env_variable("DATABASE_REPLICA_URLS", "").split(",") if dsn.strip()]
+    if not dsns:
+        return None
+    return ReadReplicas(
+        repository,
+        dsns,
+        read_your_writes_seconds=float(get_env_variable("REPLICA_READ_YOUR_WRITES_SECONDS", "2")),
+        max_lag_seconds=float(get_env_variable("REPLICA_MAX_LAG_SECONDS", "5")),
+        retry_seconds=float(get_env_variable("REPLICA_RETRY_SECONDS", "30")),
+    )
@@ -0,0 +1,13 @@
+from .types import CreateRunJobDto, RunJob, RunJobEvent
+from .interface import RunJobRepositoryInterface
+from .in_memory_repository import InMemoryRunJobRepository
+from .postgres_repository import PostgresRunJobRepository
+
+__all__ = [
+    "CreateRunJobDto",
+    "RunJob",
+    "RunJobEvent",
+    "RunJobRepositoryInterface",
+    "InMemoryRunJobRepository",
+    "PostgresRunJobRepository",
+]
@@ -0,0 +1,24 @@
+from src.config import get_env_variable
+
+from .in_memory_repository import InMemoryRunJobRepository
+from .interface import RunJobRepositoryInterface
+from .postgres_repository import PostgresRunJobRepository
+
+
+def get_run_job_repository() -> RunJobRepositoryInterface:
+    use_in_memory = get_env_variable("USE_IN_MEMORY", "0") == "1"
+    if use_in_memory:
+        return InMemoryRunJobRepository()
+
+    dsn = get_env_variable("DATABASE_URL")
+    if not dsn:
+        raise RuntimeError(
+            "DATABASE_URL environment variable is required when USE_IN_MEMORY is not '1'."
+        )
+    return PostgresRunJobRepository(
+        dsn,
+        poll_interval=float(get_env_variable("RUN_JOB_POLL_INTERVAL_SECONDS", "1")),
+    )
+
+
+run_job_repository = get_run_job_repository()
@@ -0,0 +1,176 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from ..exceptions import RepositoryError
+from .interface import RunJobRepositoryInterface
+from .signals import JOB_CANCEL, JOB_EVENTS, JOB_QUEUED, JobSignals, wait_event
+from .types import (
+    FINISHED_JOB_STATUSES,
+    CreateRunJobDto,
+    RunJob,
+    RunJobEvent,
+    RunJobStatus,
+)
+
+
+class InMemoryRunJobRepository(RunJobRepositoryInterface):
+    """
+    In-memory implementation of RunJobRepositoryInterface.
+    Jobs only live in this process, so the worker has to run in-process too
+    (local development stand-in for the Postgres queue).
+    """
+
+    def __init__(self) -> None:
+        self._jobs: Dict[str, RunJob] = {}
+        self._events: Dict[str, List[str]] = {}
+        self._signals = JobSignals()
+        self._lock = asyncio.Lock()
+
+    async def enqueue(self, dto: CreateRunJobDto) -> RunJob:
+        async with self._lock:
+            job = RunJob(
+                id=str(uuid.uuid4()),
+                kind=dto.kind,
+                owner_id=dto.owner_id,
+                payload=dto.payload,
+                status="queued",
+                created_at=datetime.utcnow(),
+            )
+            self._jobs[job.id] = job
+            self._events[job.id] = []
+        self._signals.notify(JOB_QUEUED)
+        return job
+
+    async def claim(self, worker_id: str, *, lease_seconds: float, wait_seconds: float = 0.0) -> Optional[RunJob]:
+        with self._signals.subscribe(JOB_QUEUED) as queued:
+            job = await self._claim(worker_id, lease_seconds)
+            if job is None and wait_seconds > 0 and await wait_event(queued, wait_seconds):
+                job = await self._claim(worker_id, lease_seconds)
+        return job
+
+    async def _claim(self, worker_id: str, lease_seconds: float) -> Optional[RunJob]:
+        async with self._lock:
+            # dict は挿入順なので最初に見つかった queued が最も古い
+            job = next((j for j in self._jobs.values() if j.status == "queued"), None)
+            if job is None:
+                return None
+            now = datetime.utcnow()
+            job = job.model_copy(
+                update={
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                }
+            )
+            self._jobs[job.id] = job
+            return job
+
+    async def get_by_id(self, id: str) -> Optional[RunJob]:
+        async with self._lock:
+            return self._jobs.get(id)
+
+    async def heartbeat(self, id: str, worker_id: str, *, lease_seconds: float) -> bool:
+        async with self._lock:
+            job = self._jobs.get(id)
+            if job is None or job.status != "running" or job.worker_id != worker_id:
+                return False
+            self._jobs[id] = job.model_copy(
+                update={"lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}
+            )
+            return True
+
+    async def finish(
+        self, id: str, worker_id: str, status: RunJobStatus, *, error: Optional[str] = None
+    ) -> bool:
+        async with self._lock:
+            job = self._jobs.get(id)
+            if job is None or job.status != "running" or job.worker_id != worker_id:
+                return False
+            self._jobs[id] = job.model_copy(
+                update={"status": status, "error": error, "finished_at": datetime.utcnow(), "lease_expires_at": None}
+            )
+        self._signals.notify(JOB_EVENTS, id)
+        return True
+
+    async def request_cancel(self, id: str) -> bool:
+        async with self._lock:
+            job = self._jobs.get(id)
+            if job is None or job.status in FINISHED_JOB_STATUSES:
+                return False
+            update = {"cancel_requested": True}
+            if job.status == "queued":
+                update.update(status="cancelled", finished_at=datetime.utcnow())
+            self._jobs[id] = job.model_copy(update=update)
+        self._signals.notify(JOB_CANCEL, id)
+        self._signals.notify(JOB_EVENTS, id)
+        return True
+
+    async def wait_for_cancel(self, id: str, *, timeout: float) -> bool:
+        with self._signals.subscribe(JOB_CANCEL, id) as cancelled:
+            job = await self.get_by_id(id)
+            if job is None or job.cancel_requested:
+                return True
+            await wait_event(cancelled, timeout)
+        job = await self.get_by_id(id)
+        return job is None or job.cancel_requested
+
+    async def append_events(self, job_id: str, first_seq: int, chunks: Sequence[str]) -> None:
+        async with self._lock:
+            events = self._events.setdefault(job_id, [])
+            if first_seq != len(events):
+                raise RepositoryError(f"Run job {job_id} events are not contiguous at seq {first_seq}")
+            events.extend(chunks)
+        self._signals.notify(JOB_EVENTS, job_id)
+
+    async def wait_for_events(
+        self, job_id: str, *, after_seq: int, timeout: float, limit: int = 500
+    ) -> List[RunJobEvent]:
+        with self._signals.subscribe(JOB_EVENTS, job_id) as appended:
+            events = await self._list_events(job_id, after_seq, limit)
+            if events or timeout <= 0 or await self._is_finished(job_id):
+                return events
+            await wait_event(appended, timeout)
+        return await self._list_events(job_id, after_seq, limit)
+
+    async def _is_finished(self, job_id: str) -> bool:
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            return job is None or job.status in FINISHED_JOB_STATUSES
+
+    async def _list_events(self, job_id: str, after_seq: int, limit: int) -> List[RunJobEvent]:
+        async with self._lock:
+            chunks = self._events.get(job_id, [])
+            start = after_seq + 1
+            return [
+                RunJobEvent(job_id=job_id, seq=seq, chunk=chunk)
+                for seq, chunk in enumerate(chunks[start:start + limit], start=start)
+            ]
+
+    async def fail_expired(self) -> int:
+        now = datetime.utcnow()
+        async with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.status == "running" and job.lease_expires_at is not None and job.lease_expires_at < now
+            ]
+            for job in expired:
+                self._jobs[job.id] = job.model_copy(
+                    update={"status": "failed", "error": "worker lost", "finished_at": now, "lease_expires_at": None}
+                )
+        for job in expired:
+            self._signals.notify(JOB_EVENTS, job.id)
+        return len(expired)
+
+    async def delete_finished_before(self, cutoff: datetime) -> int:
+        async with self._lock:
+            ids = [
+                job.id for job in self._jobs.values()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for id in ids:
+                del self._jobs[id]
+                self._events.pop(id, None)
+            return len(ids)
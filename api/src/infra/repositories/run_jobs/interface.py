@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from .types import CreateRunJobDto, RunJob, RunJobEvent, RunJobStatus
+
+
+class RunJobRepositoryInterface(ABC):
+    @abstractmethod
+    async def enqueue(self, dto: CreateRunJobDto) -> RunJob:
+        """Create a queued job and wake an idle worker."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim(self, worker_id: str, *, lease_seconds: float, wait_seconds: float = 0.0) -> Optional[RunJob]:
+        """
+        Take the oldest queued job and mark it running for worker_id.
+        Waits up to wait_seconds for a job to be enqueued; returns None if there is none.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_by_id(self, id: str) -> Optional[RunJob]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def heartbeat(self, id: str, worker_id: str, *, lease_seconds: float) -> bool:
+        """Extend the lease. Return False if the job is no longer held by worker_id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def finish(
+        self, id: str, worker_id: str, status: RunJobStatus, *, error: Optional[str] = None
+    ) -> bool:
+        """Record the final status of a job held by worker_id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def request_cancel(self, id: str) -> bool:
+        """
+        Ask the worker running the job to stop. A job still queued is cancelled
+        right away. Return False if the job is unknown or already finished.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def wait_for_cancel(self, id: str, *, timeout: float) -> bool:
+        """Wait up to timeout for a cancel request. Return whether one was made."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def append_events(self, job_id: str, first_seq: int, chunks: Sequence[str]) -> None:
+        """Store chunks as events first_seq, first_seq + 1, ... and wake readers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def wait_for_events(
+        self, job_id: str, *, after_seq: int, timeout: float, limit: int = 500
+    ) -> List[RunJobEvent]:
+        """
+        Return events with seq > after_seq, waiting up to timeout for new ones.
+        An empty list after the timeout means nothing was appended (or the job finished).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fail_expired(self) -> int:
+        """Mark running jobs whose lease has expired as failed. Return the number of jobs."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_finished_before(self, cutoff: datetime) -> int:
+        """Delete jobs (and their events) finished before cutoff. Return the number of jobs."""
+        raise NotImplementedError
@@ -0,0 +1,501 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+import asyncpg
+from asyncpg import Connection, Pool, Record
+
+from src.infra.metrics import track_pool
+
+from ..exceptions import RepositoryError, raise_repository_error
+from ..instrumentation import observe_db
+from ..pool_health import register_pool
+from .interface import RunJobRepositoryInterface
+from .signals import JOB_CANCEL, JOB_EVENTS, JOB_QUEUED, JobSignals, wait_event
+from .types import FINISHED_JOB_STATUSES, CreateRunJobDto, RunJob, RunJobEvent, RunJobStatus
+
+logger = logging.getLogger(__name__)
+
+_JOB_COLUMNS = """
+    id, kind, owner_id, payload, status, worker_id, cancel_requested, error,
+    created_at, started_at, finished_at, lease_expires_at
+"""
+
+
+class PostgresRunJobRepository(RunJobRepositoryInterface):
+    """
+    Postgres-backed run job queue.
+
+    Workers claim jobs with FOR UPDATE SKIP LOCKED, so any number of worker
+    processes can poll the same table without blocking each other. Events
+    are appended to run_job_events and readers are woken with LISTEN/NOTIFY
+    on a dedicated connection; waits are capped at poll_interval so a lost
+    listener connection only adds latency. wait_for_cancel() waits for the
+    whole timeout while the listener is up, since it runs for every job.
+    """
+
+    def __init__(self, dsn: str, *, poll_interval: float = 1.0) -> None:
+        self._dsn = dsn
+        self._poll_interval = poll_interval
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._pool: Optional[Pool] = None
+        self._pool_lock = asyncio.Lock()
+        self._signals = JobSignals()
+        self._listener: Optional[Connection] = None
+        self._listener_lock = asyncio.Lock()
+        self._listener_retry_at = 0.0
+        track_pool("run_job", lambda: self._pool)
+        register_pool("run_job", lambda: self._pool, self._ensure_pool)
+
+    async def _ensure_pool(self) -> Pool:
+        if self._pool is not None:
+            return self._pool
+        async with self._pool_lock:
+            if self._pool is None:
+                for attempt in range(3):
+                    try:
+                        self._pool = await asyncpg.create_pool(
+                            self._dsn,
+                            min_size=1,
+                            max_size=10,
+                        )
+                        break
+                    except Exception as exc:
+                        if attempt == 2:
+                            raise_repository_error(
+                                "Failed to create connection pool for run job repository",
+                                exc,
+                            )
+                        await asyncio.sleep(2 ** attempt)
+        if self._pool is None:
+            raise RepositoryError(
+                "Connection pool was not initialized for run job repository",
+            )
+        return self._pool
+
+    async def close(self) -> None:
+        async with self._listener_lock:
+            if self._listener is not None:
+                try:
+                    await self._listener.close()
+                except Exception:
+                    logger.warning("Failed to close run job listener connection", exc_info=True)
+                self._listener = None
+        async with self._pool_lock:
+            if self._pool is not None:
+                try:
+                    await self._pool.close()
+                except Exception as exc:
+                    raise_repository_error(
+                        "Failed to close connection pool for run job repository",
+                        exc,
+                    )
+                self._pool = None
+        self._initialized = False
+
+    async def _ensure_initialized(self) -> None:
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            try:
+                pool = await self._ensure_pool()
+                async with pool.acquire() as conn:
+                    await conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS run_jobs (
+                            id TEXT PRIMARY KEY,
+                            kind TEXT NOT NULL,
+                            owner_id TEXT NOT NULL,
+                            payload JSONB NOT NULL,
+                            status TEXT NOT NULL,
+                            worker_id TEXT,
+                            cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+                            error TEXT,
+                            created_at TIMESTAMP NOT NULL,
+                            started_at TIMESTAMP,
+                            finished_at TIMESTAMP,
+                            lease_expires_at TIMESTAMP
+                        )
+                        """
+                    )
+                    # claim は queued の最古の行だけを見るため部分インデックスにする
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_run_jobs_queued
+                        ON run_jobs(created_at) WHERE status = 'queued'
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_run_jobs_running_lease
+                        ON run_jobs(lease_expires_at) WHERE status = 'running'
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE INDEX IF NOT EXISTS idx_run_jobs_finished_at
+                        ON run_jobs(finished_at) WHERE finished_at IS NOT NULL
+                        """
+                    )
+                    await conn.execute(
+                        """
+                        CREATE TABLE IF NOT EXISTS run_job_events (
+                            job_id TEXT NOT NULL REFERENCES run_jobs(id) ON DELETE CASCADE,
+                            seq INTEGER NOT NULL,
+                            chunk TEXT NOT NULL,
+                            PRIMARY KEY (job_id, seq)
+                        )
+                        """
+                    )
+            except RepositoryError:
+                raise
+            except Exception as exc:
+                raise_repository_error(
+                    "Failed to initialize run job repository",
+                    exc,
+                )
+            self._initialized = True
+        await self._ensure_listener()
+
+    async def _ensure_listener(self) -> None:
+        if self._listener is not None and not self._listener.is_closed():
+            return
+        async with self._listener_lock:
+            if self._listener is not None and not self._listener.is_closed():
+                return
+            if time.monotonic() < self._listener_retry_at:
+                return
+            try:
+                listener = await asyncpg.connect(self._dsn)
+                for channel in (JOB_QUEUED, JOB_EVENTS, JOB_CANCEL):
+                    await listener.add_listener(channel, self._on_notification)
+            except Exception:
+                # 通知が受け取れなくても poll_interval 毎のポーリングで動作は続ける
+                logger.warning("Failed to start run job listener; falling back to polling", exc_info=True)
+                self._listener_retry_at = time.monotonic() + 30
+                return
+            self._listener = listener
+
+    def _is_listening(self) -> bool:
+        return self._listener is not None and not self._listener.is_closed()
+
+    def _on_notification(self, connection: Connection, pid: int, channel: str, payload: str) -> None:
+        self._signals.notify(channel, payload)
+
+    def _row_to_job(self, row: Record) -> RunJob:
+        return RunJob(
+            id=row["id"],
+            kind=row["kind"],
+            owner_id=row["owner_id"],
+            payload=json.loads(row["payload"]),
+            status=row["status"],
+            worker_id=row["worker_id"],
+            cancel_requested=row["cancel_requested"],
+            error=row["error"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            lease_expires_at=row["lease_expires_at"],
+        )
+
+    async def _wait(self, event: asyncio.Event, timeout: float) -> None:
+        await self._ensure_listener()
+        await wait_event(event, min(timeout, self._poll_interval))
+
+    @observe_db("run_job")
+    async def enqueue(self, dto: CreateRunJobDto) -> RunJob:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    row = await conn.fetchrow(
+                        f"""
+                        INSERT INTO run_jobs (id, kind, owner_id, payload, status, created_at)
+                        VALUES ($1, $2, $3, $4::jsonb, 'queued', $5)
+                        RETURNING {_JOB_COLUMNS}
+                        """,
+                        str(uuid.uuid4()),
+                        dto.kind,
+                        dto.owner_id,
+                        json.dumps(dto.payload),
+                        datetime.utcnow(),
+                    )
+                    await conn.execute("SELECT pg_notify($1, '')", JOB_QUEUED)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to enqueue run job", exc)
+        return self._row_to_job(row)
+
+    async def claim(self, worker_id: str, *, lease_seconds: float, wait_seconds: float = 0.0) -> Optional[RunJob]:
+        await self._ensure_initialized()
+        with self._signals.subscribe(JOB_QUEUED) as queued:
+            job = await self._claim(worker_id, lease_seconds)
+            if job is None and wait_seconds > 0:
+                await self._wait(queued, wait_seconds)
+                job = await self._claim(worker_id, lease_seconds)
+        return job
+
+    @observe_db("run_job")
+    async def _claim(self, worker_id: str, lease_seconds: float) -> Optional[RunJob]:
+        now = datetime.utcnow()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow(
+                    f"""
+                    UPDATE run_jobs
+                    SET status = 'running',
+                        worker_id = $1,
+                        started_at = $2,
+                        lease_expires_at = $3
+                    WHERE id = (
+                        SELECT id FROM run_jobs
+                        WHERE status = 'queued'
+                        ORDER BY created_at
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING {_JOB_COLUMNS}
+                    """,
+                    worker_id,
+                    now,
+                    now + timedelta(seconds=lease_seconds),
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to claim run job", exc)
+        return self._row_to_job(row) if row else None
+
+    @observe_db("run_job")
+    async def get_by_id(self, id: str) -> Optional[RunJob]:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow(f"SELECT {_JOB_COLUMNS} FROM run_jobs WHERE id = $1", id)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to get run job", exc)
+        return self._row_to_job(row) if row else None
+
+    @observe_db("run_job")
+    async def heartbeat(self, id: str, worker_id: str, *, lease_seconds: float) -> bool:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                result = await conn.execute(
+                    """
+                    UPDATE run_jobs SET lease_expires_at = $3
+                    WHERE id = $1 AND worker_id = $2 AND status = 'running'
+                    """,
+                    id,
+                    worker_id,
+                    datetime.utcnow() + timedelta(seconds=lease_seconds),
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to extend run job lease", exc)
+        return result.endswith(" 1")
+
+    @observe_db("run_job")
+    async def finish(
+        self, id: str, worker_id: str, status: RunJobStatus, *, error: Optional[str] = None
+    ) -> bool:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    result = await conn.execute(
+                        """
+                        UPDATE run_jobs
+                        SET status = $3, error = $4, finished_at = $5, lease_expires_at = NULL
+                        WHERE id = $1 AND worker_id = $2 AND status = 'running'
+                        """,
+                        id,
+                        worker_id,
+                        status,
+                        error,
+                        datetime.utcnow(),
+                    )
+                    await conn.execute("SELECT pg_notify($1, $2)", JOB_EVENTS, id)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to finish run job", exc)
+        return result.endswith(" 1")
+
+    @observe_db("run_job")
+    async def request_cancel(self, id: str) -> bool:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    # queued のままならその場で cancelled にし、running なら worker に停止を依頼する
+                    result = await conn.execute(
+                        """
+                        UPDATE run_jobs
+                        SET cancel_requested = TRUE,
+                            status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                            finished_at = CASE WHEN status = 'queued' THEN $2 ELSE finished_at END
+                        WHERE id = $1 AND status IN ('queued', 'running')
+                        """,
+                        id,
+                        datetime.utcnow(),
+                    )
+                    await conn.execute("SELECT pg_notify($1, $3), pg_notify($2, $3)", JOB_CANCEL, JOB_EVENTS, id)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to cancel run job", exc)
+        return result.endswith(" 1")
+
+    async def wait_for_cancel(self, id: str, *, timeout: float) -> bool:
+        await self._ensure_initialized()
+        deadline = time.monotonic() + timeout
+        with self._signals.subscribe(JOB_CANCEL, id) as cancelled:
+            while True:
+                job = await self.get_by_id(id)
+                if job is None or job.cancel_requested:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                await self._ensure_listener()
+                if self._is_listening():
+                    # 通知を受け取れる間は、通知が来たときだけ行を読み直す（heartbeat 毎の読み込みを増やさない）
+                    if not await wait_event(cancelled, remaining):
+                        return False
+                    cancelled.clear()
+                else:
+                    await wait_event(cancelled, min(remaining, self._poll_interval))
+
+    @observe_db("run_job")
+    async def append_events(self, job_id: str, first_seq: int, chunks: Sequence[str]) -> None:
+        if not chunks:
+            return
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        """
+                        INSERT INTO run_job_events (job_id, seq, chunk)
+                        SELECT $1, $2 + ordinality::int - 1, chunk
+                        FROM unnest($3::text[]) WITH ORDINALITY AS t(chunk, ordinality)
+                        """,
+                        job_id,
+                        first_seq,
+                        list(chunks),
+                    )
+                    await conn.execute("SELECT pg_notify($1, $2)", JOB_EVENTS, job_id)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to append run job events", exc)
+
+    async def wait_for_events(
+        self, job_id: str, *, after_seq: int, timeout: float, limit: int = 500
+    ) -> List[RunJobEvent]:
+        await self._ensure_initialized()
+        with self._signals.subscribe(JOB_EVENTS, job_id) as appended:
+            events = await self._list_events(job_id, after_seq, limit)
+            if events or timeout <= 0 or await self._is_finished(job_id):
+                return events
+            await self._wait(appended, timeout)
+        return await self._list_events(job_id, after_seq, limit)
+
+    @observe_db("run_job")
+    async def _is_finished(self, job_id: str) -> bool:
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                status = await conn.fetchval("SELECT status FROM run_jobs WHERE id = $1", job_id)
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to get run job status", exc)
+        return status is None or status in FINISHED_JOB_STATUSES
+
+    @observe_db("run_job")
+    async def _list_events(self, job_id: str, after_seq: int, limit: int) -> List[RunJobEvent]:
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT job_id, seq, chunk FROM run_job_events
+                    WHERE job_id = $1 AND seq > $2
+                    ORDER BY seq
+                    LIMIT $3
+                    """,
+                    job_id,
+                    after_seq,
+                    limit,
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to list run job events", exc)
+        return [RunJobEvent(job_id=row["job_id"], seq=row["seq"], chunk=row["chunk"]) for row in rows]
+
+    @observe_db("run_job")
+    async def fail_expired(self) -> int:
+        await self._ensure_initialized()
+        now = datetime.utcnow()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    rows = await conn.fetch(
+                        """
+                        UPDATE run_jobs
+                        SET status = 'failed', error = 'worker lost', finished_at = $1, lease_expires_at = NULL
+                        WHERE status = 'running' AND lease_expires_at < $1
+                        RETURNING id
+                        """,
+                        now,
+                    )
+                    for row in rows:
+                        await conn.execute("SELECT pg_notify($1, $2)", JOB_EVENTS, row["id"])
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to expire run jobs", exc)
+        return len(rows)
+
+    @observe_db("run_job")
+    async def delete_finished_before(self, cutoff: datetime) -> int:
+        await self._ensure_initialized()
+        try:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                deleted = await conn.fetchval(
+                    """
+                    WITH deleted AS (
+                        DELETE FROM run_jobs WHERE finished_at < $1 RETURNING 1
+                    )
+                    SELECT count(*) FROM deleted
+                    """,
+                    cutoff,
+                )
+        except RepositoryError:
+            raise
+        except Exception as exc:
+            raise_repository_error("Failed to delete finished run jobs", exc)
+        return int(deleted or 0)
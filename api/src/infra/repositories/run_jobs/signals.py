@@ -0,0 +1,44 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set, Tuple
+
+# notification channels (also used as Postgres LISTEN channels)
+JOB_QUEUED = "run_job_queued"
+JOB_EVENTS = "run_job_events"
+JOB_CANCEL = "run_job_cancel"
+
+
+class JobSignals:
+    """
+    Process-local wakeups keyed by (channel, key).
+
+    Register the waiter with subscribe() before checking the repository and
+    wait on it afterwards, so a notification sent in between is not lost.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: Dict[Tuple[str, str], Set[asyncio.Event]] = {}
+
+    @contextmanager
+    def subscribe(self, channel: str, key: str = "") -> Iterator[asyncio.Event]:
+        event = asyncio.Event()
+        waiters = self._waiters.setdefault((channel, key), set())
+        waiters.add(event)
+        try:
+            yield event
+        finally:
+            waiters.discard(event)
+            if not waiters:
+                self._waiters.pop((channel, key), None)
+
+    def notify(self, channel: str, key: str = "") -> None:
+        for event in self._waiters.get((channel, key), ()):
+            event.set()
+
+
+async def wait_event(event: asyncio.Event, timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    return True
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from pydantic import BaseModel
+
+RunJobKind = Literal["chat"]
+RunJobStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+FINISHED_JOB_STATUSES = ("completed", "failed", "cancelled")
+
+
+class RunJob(BaseModel):
+    id: str
+    kind: RunJobKind
+    owner_id: str
+    payload: Dict[str, Any]
+    status: RunJobStatus
+    # worker holding the job while it is running
+    worker_id: Optional[str] = None
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # the worker must heartbeat before this, otherwise the job is considered lost
+    lease_expires_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class CreateRunJobDto(BaseModel):
+    kind: RunJobKind
+    owner_id: str
+    payload: Dict[str, Any]
+
+
+class RunJobEvent(BaseModel):
+    job_id: str
+    # 0-based position of the event in the job's stream
+    seq: int
+    # SSE chunk as produced by the run ("data: {...}\n\n")
+    chunk: str
@@ -11,3 +11,8 @@ class SessionStoreInterface(abc.ABC):
     @abc.abstractmethod
     def get_or_create(self, session_id: str) -> Session:
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def count(self) -> int:
+        """保持しているセッション数"""
+        raise NotImplementedError
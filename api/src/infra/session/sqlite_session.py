@@ -20,3 +20,6 @@ class SQLiteSessionStore(SessionStoreInterface):
         if session_id not in self.session_store:
             self.session_store[session_id] = SQLiteSession(session_id)
         return self.session_store[session_id]
+
+    def count(self) -> int:
+        return len(self.session_store)
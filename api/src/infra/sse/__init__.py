@@ -0,0 +1,19 @@
+from .encoder import (
+    EncodedModelCache,
+    TextDeltaBatcher,
+    dumps,
+    sse_data,
+    sse_event,
+    sse_raw_event,
+    text_delta_event,
+)
+
+__all__ = [
+    "EncodedModelCache",
+    "TextDeltaBatcher",
+    "dumps",
+    "sse_data",
+    "sse_event",
+    "sse_raw_event",
+    "text_delta_event",
+]
@@ -0,0 +1,118 @@
+"""
+Server-sent event encoding for the chat, run and agent-list streams.
+
+Payloads are serialized with orjson when it is installed (stdlib json
+otherwise) and written as complete `data: ...\\n\\n` frames. Text deltas use
+a pre-encoded frame template so only the delta itself is serialized.
+"""
+
+import json
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+# {"type": "text", "data": {"delta": ...}} の delta 以外の部分
+_TEXT_FRAME_PREFIX = 'data: {"type":"text","data":{"delta":'
+_TEXT_FRAME_SUFFIX = "}}\n\n"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> str:
+    """Serialize payload to compact JSON (datetimes and pydantic models included)."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default).decode()
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def sse_event(payload: Any) -> str:
+    return "data: " + dumps(payload) + "\n\n"
+
+
+def sse_raw_event(payload_json: str) -> str:
+    """Frame a payload that is already JSON."""
+    return "data: " + payload_json + "\n\n"
+
+
+def text_delta_event(delta: str) -> str:
+    return _TEXT_FRAME_PREFIX + dumps(delta) + _TEXT_FRAME_SUFFIX
+
+
+def sse_data(chunk: str) -> str:
+    """The data payload of a single-event SSE chunk (the JSON, without re-encoding it)."""
+    if chunk.startswith("data: ") and chunk.endswith("\n\n") and "\n" not in chunk[6:-2]:
+        return chunk[6:-2]
+    return "\n".join(line[5:].lstrip(" ") for line in chunk.splitlines() if line.startswith("data:"))
+
+
+class EncodedModelCache:
+    """
+    JSON of pydantic entities keyed by id, re-encoded only when the entity's
+    version (e.g. its update timestamps) changes. Used by polling streams that
+    resend the same entities every tick.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Hashable, str]] = {}
+
+    def encode(self, id: str, version: Hashable, entity: BaseModel) -> str:
+        cached = self._entries.get(id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        encoded = entity.model_dump_json()
+        self._entries[id] = (version, encoded)
+        return encoded
+
+    def retain(self, ids: Iterable[str]) -> None:
+        """Drop entries of entities that are no longer listed."""
+        keep = set(ids)
+        for id in [id for id in self._entries if id not in keep]:
+            del self._entries[id]
+
+
+class TextDeltaBatcher:
+    """
+    Joins adjacent text deltas into one frame. The first delta of a stream is
+    sent right away (time to first token); later ones are held until
+    window_seconds have passed since the oldest held delta, or until the
+    caller flushes because a different event arrived or the stream ended.
+    """
+
+    def __init__(self, window_seconds: float) -> None:
+        self._window_seconds = window_seconds
+        self._parts: List[str] = []
+        self._started = 0.0
+        self._sent_first = False
+
+    def add(self, delta: str) -> Optional[str]:
+        """Buffer delta; returns the joined text when it is time to send it."""
+        if not self._sent_first or self._window_seconds <= 0:
+            self._sent_first = True
+            return delta
+        now = time.monotonic()
+        if not self._parts:
+            self._started = now
+        self._parts.append(delta)
+        if now - self._started >= self._window_seconds:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts = []
+        return text
@@ -0,0 +1,19 @@
+from .tracer import (
+    InMemorySpanExporter,
+    LoggingSpanExporter,
+    Span,
+    SpanExporterInterface,
+    Tracer,
+    get_current_span,
+)
+from .di import tracer
+
+__all__ = [
+    "InMemorySpanExporter",
+    "LoggingSpanExporter",
+    "Span",
+    "SpanExporterInterface",
+    "Tracer",
+    "get_current_span",
+    "tracer",
+]
@@ -0,0 +1,64 @@
+from typing import Any, Dict
+
+from agents.tracing import Span as SdkSpan
+from agents.tracing import Trace as SdkTrace
+from agents.tracing import TracingProcessor
+
+from .tracer import Span, Tracer
+
+
+class AgentsSdkSpanBridge(TracingProcessor):
+    """
+    Mirrors agents SDK spans (model responses, function tools, agents) into our
+    tracer so that model time shows up in the same trace as the request.
+    Bridged spans are parented to whatever span is current when the SDK starts
+    them; they do not become current themselves.
+    """
+
+    def __init__(self, tracer: Tracer) -> None:
+        self._tracer = tracer
+        self._open: Dict[str, Span] = {}
+
+    def on_trace_start(self, trace: SdkTrace) -> None:
+        pass
+
+    def on_trace_end(self, trace: SdkTrace) -> None:
+        pass
+
+    def on_span_start(self, span: SdkSpan[Any]) -> None:
+        if not self._tracer.enabled:
+            return
+        data = span.span_data
+        kind = data.type
+        if kind in ("response", "generation"):
+            name = "model.response"
+        elif kind == "function":
+            name = f"tool.{getattr(data, 'name', 'unknown')}"
+        elif kind == "agent":
+            name = f"agent.{getattr(data, 'name', 'unknown')}"
+        else:
+            return
+        self._open[span.span_id] = self._tracer.start_span(name, {"sdk.span_type": kind})
+
+    def on_span_end(self, span: SdkSpan[Any]) -> None:
+        ours = self._open.pop(span.span_id, None)
+        if ours is None:
+            return
+        data = span.span_data
+        response = getattr(data, "response", None)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            ours.set_attribute("llm.input_tokens", getattr(usage, "input_tokens", None))
+            ours.set_attribute("llm.output_tokens", getattr(usage, "output_tokens", None))
+        model = getattr(response, "model", None) or getattr(data, "model", None)
+        if model:
+            ours.set_attribute("llm.model", model)
+        if span.error:
+            ours.set_status("error", str(span.error.get("message")))
+        self._tracer.end_span(ours)
+
+    def shutdown(self) -> None:
+        self._open.clear()
+
+    def force_flush(self) -> None:
+        pass
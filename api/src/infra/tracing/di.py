@@ -0,0 +1,26 @@
+from typing import Optional
+
+from src.config import get_env_variable
+
+from .tracer import (
+    InMemorySpanExporter,
+    LoggingSpanExporter,
+    SpanExporterInterface,
+    Tracer,
+)
+
+
+def get_span_exporter() -> Optional[SpanExporterInterface]:
+    exporter = get_env_variable("TRACING_EXPORTER", "none")
+    if exporter == "none":
+        return None
+    if exporter == "memory":
+        return InMemorySpanExporter(
+            max_spans=int(get_env_variable("TRACING_MAX_SPANS", "10000")),
+        )
+    if exporter == "log":
+        return LoggingSpanExporter()
+    raise RuntimeError("TRACING_EXPORTER must be 'none', 'memory' or 'log'.")
+
+
+tracer = Tracer(get_span_exporter())
@@ -0,0 +1,221 @@
+"""
+Lightweight, OpenTelemetry-style span tracing.
+
+The current span lives in a ContextVar, so spans opened inside tasks spawned
+by the agents SDK (tool calls, child agent runs) nest under the request span
+that was current when the task was created.
+"""
+
+import abc
+import contextvars
+import json
+import logging
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AttributeValue = Any
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "events",
+        "status",
+        "status_description",
+        "start_time_ns",
+        "end_time_ns",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Optional[Dict[str, AttributeValue]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes: Dict[str, AttributeValue] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = "unset"
+        self.status_description: Optional[str] = None
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+
+    @property
+    def is_recording(self) -> bool:
+        return True
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time_ns is None:
+            return None
+        return (self.end_time_ns - self.start_time_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, AttributeValue]] = None) -> None:
+        self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": dict(attributes or {})})
+
+    def set_status(self, status: str, description: Optional[str] = None) -> None:
+        self.status = status
+        self.status_description = description
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.add_event("exception", {"type": type(exc).__name__, "message": str(exc)})
+        self.set_status("error", f"{type(exc).__name__}: {exc}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": self.status,
+            "status_description": self.status_description,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": self.duration_ms,
+        }
+
+
+class _NonRecordingSpan(Span):
+    """Returned when tracing is disabled; every call is a no-op."""
+
+    def __init__(self) -> None:
+        pass
+
+    @property
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, AttributeValue]] = None) -> None:
+        pass
+
+    def set_status(self, status: str, description: Optional[str] = None) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+class SpanExporterInterface(abc.ABC):
+    @abc.abstractmethod
+    def export(self, span: Span) -> None:
+        """Receive a finished span. Must not block or raise."""
+        raise NotImplementedError
+
+
+class InMemorySpanExporter(SpanExporterInterface):
+    """Keeps the most recent finished spans in memory (tests and the /traces debug route)."""
+
+    def __init__(self, max_spans: int = 10_000) -> None:
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        return sorted((s for s in self._spans if s.trace_id == trace_id), key=lambda s: s.start_time_ns)
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class LoggingSpanExporter(SpanExporterInterface):
+    """Writes each finished span as one JSON log line."""
+
+    def export(self, span: Span) -> None:
+        logger.info(json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def get_current_span() -> Span:
+    span = _current_span.get()
+    return span if span is not None else NON_RECORDING_SPAN
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporterInterface] = None) -> None:
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, AttributeValue]] = None,
+        *,
+        parent: Optional[Span] = None,
+    ) -> Span:
+        """Start a span without making it current; call end_span() when done."""
+        if self.exporter is None:
+            return NON_RECORDING_SPAN
+        if parent is None:
+            parent = _current_span.get()
+        if parent is not None and parent.is_recording:
+            return Span(name, trace_id=parent.trace_id, parent_id=parent.span_id, attributes=attributes)
+        return Span(name, trace_id=secrets.token_hex(16), parent_id=None, attributes=attributes)
+
+    def end_span(self, span: Span) -> None:
+        if not span.is_recording or span.end_time_ns is not None:
+            return
+        span.end_time_ns = time.time_ns()
+        if span.status == "unset":
+            span.status = "ok"
+        try:
+            self.exporter.export(span)  # type: ignore[union-attr]
+        except Exception:
+            logger.exception("span export failed")
+
+    @contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, AttributeValue]] = None,
+    ) -> Iterator[Span]:
+        if self.exporter is None:
+            yield NON_RECORDING_SPAN
+            return
+        span = self.start_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # async generator が生成時と別のコンテキストで閉じられた場合は戻す対象がない
+                pass
+            self.end_span(span)
@@ -1,17 +1,78 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.config import get_env_variable
+from src.core.v1.agents.engine_loader import preload_chat_engine
+from src.core.v1.health.di import loop_lag_monitor, loop_watchdog
+from src.core.v1.memory.di import semantic_memory
+from src.core.v1.realtime.di import client_secret_pool, realtime_http_client
+from src.core.v1.runs.di import get_run_worker, run_execution_mode, run_manager
+from src.infra.http import CompressionMiddleware
+from src.infra.logging import RequestIdMiddleware, setup_logging
+from src.infra.metrics.http import MetricsMiddleware
+from src.infra.repositories.generated_agent_messages.di import message_partition_maintainer
+from src.infra.repositories.run_jobs.di import run_job_repository
+from src.infra.repositories.run_jobs.in_memory_repository import InMemoryRunJobRepository
 from src.routes.agents.generated_agent_route import generated_agent_router
 from src.routes.health.health_route import health_router
+from src.routes.metrics.metrics_route import metrics_router
 from src.routes.realtime.realtime_route import realtime_router
+from src.routes.runs.runs_route import runs_router
+from src.routes.traces.traces_route import traces_router
 
 OPENAI_API_KEY = get_env_variable("OPENAI_API_KEY", "")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # イベントループの遅延を計測する（/health/ready の判定に使う）
+    loop_lag_monitor.start()
+    # EVENT_LOOP_WATCHDOG_ENABLED=1 のとき、ループを止めた処理のスタックをログに出す
+    if loop_watchdog is not None:
+        loop_watchdog.start()
+    # Agents SDK などチャットの実行に必要なモジュールは起動後に別スレッドで読み込む（worker モードでは API で実行しない）
+    if run_execution_mode == "inline" and get_env_variable("CHAT_ENGINE_PRELOAD", "1") == "1":
+        preload_chat_engine()
+    # バックグラウンドのメッセージベクトル化を開始・終了する
+    if semantic_memory is not None:
+        semantic_memory.start()
+    # 音声セッション用のクライアントシークレットを事前発行しておく
+    client_secret_pool.start()
+    # メッセージテーブルの翌月以降のパーティション作成と、保持期間を過ぎた月のアーカイブ
+    if message_partition_maintainer is not None:
+        message_partition_maintainer.start()
+    # インメモリのジョブキューは別プロセスから見えないため、ワーカーを API プロセス内で動かす
+    worker = None
+    worker_task = None
+    if run_execution_mode == "worker" and isinstance(run_job_repository, InMemoryRunJobRepository):
+        worker = get_run_worker()
+        worker_task = asyncio.create_task(worker.run())
+    yield
+    # 実行中の切り離し実行（?detach=true）を止める
+    await run_manager.shutdown()
+    if worker is not None:
+        worker.stop()
+        await worker_task
+    if semantic_memory is not None:
+        await semantic_memory.stop()
+    await client_secret_pool.stop()
+    if message_partition_maintainer is not None:
+        await message_partition_maintainer.stop()
+    await realtime_http_client.aclose()
+    await loop_lag_monitor.stop()
+    if loop_watchdog is not None:
+        await loop_watchdog.stop()
+
+
 def get_application() -> FastAPI:
+    # ログはキュー経由で別スレッドから書き出す（stdout の詰まりでイベントループを止めない）
+    setup_logging()
     app = FastAPI(
         prefix="/api/",
+        lifespan=lifespan,
     )
     app.add_middleware(
         CORSMiddleware,
@@ -20,8 +81,19 @@ def get_application() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # 大きな JSON 応答を圧縮する（SSE などのストリーミング応答はそのまま流す）
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(get_env_variable("RESPONSE_COMPRESSION_MIN_BYTES", "1024")),
+    )
+    app.add_middleware(MetricsMiddleware)
+    # ログの相関 ID（X-Request-ID）。他のミドルウェアのログにも付くよう最も外側に置く
+    app.add_middleware(RequestIdMiddleware)
     app.include_router(generated_agent_router)
     app.include_router(health_router)
+    app.include_router(metrics_router)
+    app.include_router(runs_router)
+    app.include_router(traces_router)
     app.include_router(realtime_router)
     return app
 
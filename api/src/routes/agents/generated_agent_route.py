@@ -1,21 +1,24 @@
 import asyncio
 import json
+import logging
+from datetime import datetime, timezone
 from typing import AsyncIterator, List, Optional
+from urllib.parse import urlencode
 
-from agents import Agent, Runner
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import StreamingResponse
-from openai.types.responses import ResponseTextDeltaEvent
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
-from src.core.v1.agents.owner_agent import OwnerAgent
+from src.core.v1.admission.controller import AdmissionRejected
 from src.core.v1.models.owner_agent_request_model import OwnerAgentRequest
-from src.core.v1.tools import task_split_judge_tool
-from src.core.v1.tools.agent_spec_tools import (
-    _fetch_tool,
-    clear_agent_execution_stream,
-    run_agent_tool,
-    set_agent_execution_stream,
+from src.core.v1.runs.chat_launcher import open_chat_events
+from src.core.v1.runs.chat_multiplexer import ChatMultiplexer
+from src.core.v1.runs.di import run_manager
+from src.core.v1.runs.run_manager import DetachedRun
+from src.infra.http import etag_matches, make_etag
+from src.infra.metrics.app_metrics import (
+    sse_connections_open,
+    websocket_connections_open,
 )
 from src.infra.repositories.generated_agent.di import (
     generated_agent_repository,
@@ -29,11 +32,31 @@ from src.infra.repositories.generated_agent_messages.di import (
 from src.infra.repositories.generated_agent_messages.types import (
     CreateMessageDto,
     MessageEntity,
+    MessageSearchHit,
 )
-from src.infra.session.sqlite_session import SQLiteSessionStore
+from src.infra.sse import EncodedModelCache, dumps, sse_event, sse_raw_event
+
+logger = logging.getLogger(__name__)
 
 generated_agent_router = APIRouter(prefix="/agents", tags=["agents"])
-session_store = SQLiteSessionStore()  # TODO: DIで注入する
+
+
+@generated_agent_router.get(
+    "/generated_agents/active",
+    response_model=List[GeneratedAgentEntity],
+)
+async def list_active_generated_agents(
+    owner_id: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """
+    実行中（creating/executing/thinking）のエージェント一覧。開始が古い順。
+    経過時間は started_at から算出する。
+    """
+    return await generated_agent_repository.list_active(
+        owner_id=owner_id,
+        limit=limit,
+    )
 
 
 @generated_agent_router.get(
@@ -55,6 +78,8 @@ async def get_generated_agent(id: str):
     response_model=List[GeneratedAgentEntity],
 )
 async def list_or_stream_generated_agents(
+    request: Request,
+    response: Response,
     owner_id: Optional[str] = Query(default=None),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
@@ -62,16 +87,33 @@ async def list_or_stream_generated_agents(
 ):
     """
     stream=true の場合は SSE で差分を配信（add/remove/update）。
-    それ以外は通常の JSON 一覧を返す。
+    それ以外は通常の JSON 一覧を返す（ETag 付き。If-None-Match が一致すれば一覧を読まずに 304）。
     """
     if not stream:
-        return await generated_agent_repository.list(
+        if_none_match = request.headers.get("if-none-match")
+        # バージョンと一覧は同じスナップショットから読み、ETag が一致すれば一覧は読まない
+        version, items = await generated_agent_repository.list_with_version(
             owner_id=owner_id,
             limit=limit,
             offset=offset,
+            unchanged=lambda version: etag_matches(if_none_match, make_etag(version, owner_id, limit, offset)),
         )
+        etag = make_etag(version, owner_id, limit, offset)
+        if items is None:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return items
 
     async def generator() -> AsyncIterator[str]:
+        sse_connections_open.labels("agent_list").inc()
+        try:
+            async for chunk in agent_list_events():
+                yield chunk
+        finally:
+            sse_connections_open.labels("agent_list").dec()
+
+    async def agent_list_events() -> AsyncIterator[str]:
         # 初期一覧を送信（op=add）およびスナップショット保存
         initial = await generated_agent_repository.list(
             owner_id=owner_id,
@@ -80,13 +122,16 @@ async def list_or_stream_generated_agents(
         )
         seen_ids = set()
         last_snapshot = {}
+        # エージェントの JSON は更新された時だけ作り直す（ステータス更新は last_updated だけを変える）
+        encoded_agents = EncodedModelCache()
+
+        def encode_agent(agent: GeneratedAgentEntity) -> str:
+            return encoded_agents.encode(agent.id, (agent.updated_at, agent.last_updated), agent)
 
         for item in initial:
             seen_ids.add(item.id)
-            payload = {"op": "add", "agent": item.model_dump()}
-            payload_json = json.dumps(jsonable_encoder(payload))
-            yield f"data: {payload_json}\n\n"
-            last_snapshot[item.id] = item.model_dump()
+            yield sse_raw_event('{"op":"add","agent":' + encode_agent(item) + "}")
+            last_snapshot[item.id] = item
 
         # 差分ポーリング（1s）:
         # - 新規 -> op=add
@@ -100,25 +145,22 @@ async def list_or_stream_generated_agents(
             )
             current_ids = {a.id for a in current}
             current_map = {
-                a.id: a.model_dump()
+                a.id: a
                 for a in current
             }
 
             # 追加分
             for aid, aobj in current_map.items():
                 if aid not in seen_ids:
-                    payload = {"op": "add", "agent": aobj}
-                    print("[SSE] add:", payload)
-                    payload_json = json.dumps(jsonable_encoder(payload))
-                    yield "data: " + payload_json + "\n\n"
+                    logger.debug("agent list stream add %s", aid)
+                    yield sse_raw_event('{"op":"add","agent":' + encode_agent(aobj) + "}")
 
             # 削除分
             removed_ids = seen_ids - current_ids
             for rid in removed_ids:
                 payload = {"op": "remove", "id": rid}
-                print("[SSE] remove:", payload)
-                payload_json = json.dumps(jsonable_encoder(payload))
-                yield f"data: {payload_json}\n\n"
+                logger.debug("agent list stream remove %s", rid)
+                yield sse_event(payload)
 
             # 更新分（差分検出）
             for aid in (seen_ids & current_ids):
@@ -136,21 +178,20 @@ async def list_or_stream_generated_agents(
                     "tool",
                 ]
                 for k in keys_to_check:
-                    pval = prev.get(k)
-                    cval = curr.get(k)
+                    pval = getattr(prev, k)
+                    cval = getattr(curr, k)
                     if pval != cval:
                         changed = True
                         break
 
                 if changed:
-                    payload = {"op": "update", "agent": curr}
-                    print("[SSE] update:", payload)
-                    payload_json = json.dumps(jsonable_encoder(payload))
-                    yield f"data: {payload_json}\n\n"
+                    logger.debug("agent list stream update %s", aid)
+                    yield sse_raw_event('{"op":"update","agent":' + encode_agent(curr) + "}")
 
             # スナップショット更新
             seen_ids = current_ids
             last_snapshot = current_map
+            encoded_agents.retain(current_ids)
 
             await asyncio.sleep(1.0)
 
@@ -166,16 +207,60 @@ async def list_or_stream_generated_agents(
     response_model=List[MessageEntity],
 )
 async def list_agent_messages(
+    request: Request,
+    response: Response,
     id: str,
     session_id: Optional[str] = Query(default=None),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    since: Optional[datetime] = Query(default=None),
 ):
-    return await message_repository.list_by_agent(
+    """
+    エージェントのメッセージ一覧（古い順）。since を指定するとそれ以降のメッセージだけを返し、
+    Postgres ではそれより前の月のパーティションを読まずに済む。
+    ETag 付きで返し、If-None-Match が一致すれば一覧を読まずに 304 を返す。
+    """
+    since = _naive_utc(since)
+    if_none_match = request.headers.get("if-none-match")
+    version, messages = await message_repository.list_by_agent_with_version(
         agent_id=id,
         session_id=session_id,
         limit=limit,
         offset=offset,
+        since=since,
+        unchanged=lambda version: etag_matches(if_none_match, make_etag(version, id, session_id, limit, offset, since)),
+    )
+    etag = make_etag(version, id, session_id, limit, offset, since)
+    if messages is None:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return messages
+
+
+@generated_agent_router.get(
+    "/messages/search",
+    response_model=List[MessageSearchHit],
+)
+async def search_agent_messages(
+    q: str = Query(min_length=1, max_length=200),
+    agent_id: str = Query(min_length=1),
+    session_id: Optional[str] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    since: Optional[datetime] = Query(default=None),
+):
+    """
+    エージェントのメッセージ本文の全文検索。新しい順に、検索語をハイライトした抜粋付きで返す。
+    全テナントを横断する検索にならないよう agent_id は必須。since を指定するとそれ以降のメッセージに絞る。
+    """
+    return await message_repository.search(
+        query=q,
+        agent_id=agent_id,
+        session_id=session_id,
+        limit=limit,
+        offset=offset,
+        since=_naive_utc(since),
     )
 
 
@@ -199,91 +284,129 @@ async def create_agent_message(
     return await message_repository.create(dto)
 
 
-owner_agent_instance = OwnerAgent()
-session_store = SQLiteSessionStore()  # TODO: DIで注入するようにする。Routerが1つしかないで一旦大丈夫
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at はタイムゾーンなしの UTC で保存している
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _run_finished_event(run: DetachedRun) -> str:
+    finished_event = {"type": "run_finished", "data": {"run_id": run.id, "state": run.state}}
+    return sse_event(finished_event)
+
 
 @generated_agent_router.post(
     "/generated_agents/{id}/chat",
 )
-async def chat_generated_agent(id: str, req: OwnerAgentRequest):
-    # 既存エージェントを取得
-    entity = await generated_agent_repository.get_by_id(id)
-    if entity is None:
-        agent = OwnerAgent()
-    else:
-        # Agent を初期化（ツール解決は存在する場合のみ）
-        tool = None
-        if entity.tool:
-            try:
-                tool = _fetch_tool(entity.tool)
-            except Exception:
-                # 不明なツール指定は無視（ツール無しで実行）
-                tool = None
-
-        agent = Agent(
-            name=entity.name,
-            instructions=entity.instruction,
-            tools=[tool, run_agent_tool, task_split_judge_tool] if tool else [run_agent_tool, task_split_judge_tool],
+async def chat_generated_agent(
+    id: str,
+    req: OwnerAgentRequest,
+    detach: bool = Query(default=False),  # ?detach=true でバックグラウンド実行し run_id を返す
+):
+    # オーナー毎・全体の同時実行数を超える場合は待たせ、待ち行列も溢れたら 429 を返す
+    try:
+        events, slot = await open_chat_events(id, req)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many concurrent chats",
+            headers={"Retry-After": str(exc.retry_after)},
         )
 
-    session = session_store.get_or_create(req.session_id)
-    prompt = f"Owner ID: {req.owner_id}, Owner Agent ID: {req.owner_agent_id}, User Input: {req.user_input}"
-
     async def event_generator():
-        # ツール実行からのイベントを受け取るためのキュー
-        tool_event_queue = asyncio.Queue()
-        set_agent_execution_stream(tool_event_queue)
-        
         try:
-            result = Runner.run_streamed(
-                agent, prompt, max_turns=10, session=session
-            )
-            
-            # メインのエージェントイベント処理
-            async for event in result.stream_events():
-                # ツールイベントをチェック
-                while not tool_event_queue.empty():
-                    tool_event = await tool_event_queue.get()
-                    tool_event_json = json.dumps(tool_event)
-                    yield f"data: {tool_event_json}\n\n"
-                
-                # テキスト差分（既存のチャンク配信）
-                if (
-                    event.type == "raw_response_event"
-                    and isinstance(event.data, ResponseTextDeltaEvent)
-                ):
-                    # テキストイベントをJSONフォーマットで送信
-                    text_event = {
-                        "type": "text",
-                        "data": {"delta": event.data.delta}
-                    }
-                    yield f"data: {json.dumps(text_event)}\n\n"
-
-                # エージェント内部の更新通知（既存）
-                elif event.type == "agent_updated_stream_event":
-                    update_event = {
-                        "type": "agent_updated",
-                        "data": {"message": f"{agent.name} の応答を待っています..."}
-                    }
-                    yield f"data: {json.dumps(update_event)}\n\n"
-                
-                # ツール呼び出しイベントの処理
-                elif event.type == "run_item_stream_event":
-                    if event.item.type == "tool_call_item":
-                        tool_event = {
-                            "type": "tool_called",
-                            "data": {"message": "ツールを実行中..."}
-                        }
-                        yield f"data: {json.dumps(tool_event)}\n\n"
-            
-            # 残りのツールイベントを処理
-            while not tool_event_queue.empty():
-                tool_event = await tool_event_queue.get()
-                tool_event_json = json.dumps(tool_event)
-                yield f"data: {tool_event_json}\n\n"
-                
+            async for chunk in events:
+                yield chunk
+        finally:
+            slot.release()
+
+    if detach:
+        # リクエストと切り離して実行し、イベントは GET /runs/{run_id}/events で後から購読する
+        run = run_manager.start(req.owner_id, event_generator(), finished_event=_run_finished_event)
+        # 開始前にキャンセルされた場合はジェネレータが実行されないため、タスク終了時にも枠を返す
+        run.task.add_done_callback(lambda _: slot.release())
+        return JSONResponse(
+            status_code=202,
+            content={
+                "run_id": run.id,
+                "events_url": f"/runs/{run.id}/events?{urlencode({'owner_id': req.owner_id})}",
+            },
+        )
+
+    async def streamed_events():
+        # 接続数はクライアントが読んでいる間だけ数える（detach 中の購読は /runs/{run_id}/events 側で数える）
+        sse_connections_open.labels("chat").inc()
+        chunks = event_generator()
+        try:
+            async for chunk in chunks:
+                yield chunk
         finally:
-            # クリーンアップ
-            clear_agent_execution_stream()
+            sse_connections_open.labels("chat").dec()
+            await chunks.aclose()
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    # ストリーム開始前に切断された場合はジェネレータが実行されないため、レスポンス終了時にも枠を返す
+    return StreamingResponse(
+        streamed_events(),
+        media_type="text/event-stream",
+        background=BackgroundTask(slot.release),
+    )
+
+
+@generated_agent_router.websocket("/generated_agents/{id}/chat/ws")
+async def chat_generated_agent_ws(
+    websocket: WebSocket,
+    id: str,
+    owner_id: str = Query(),
+    owner_agent_id: str = Query(),
+    session_id: str = Query(),
+):
+    """
+    1 接続 = 1 セッションのチャット。1 つの接続で複数の実行を並行して流せる。
+
+    クライアント → サーバー（JSON。バイナリフレームは UTF-8 として読む）:
+      {"type": "start", "run_id": 任意, "user_input": "..."}
+      {"type": "cancel", "run_id": "..."}
+      {"type": "interrupt", "run_id": "...", "user_input": "...", "new_run_id": 任意}
+    サーバー → クライアント:
+      run_started / event（SSE と同じイベントを "event" に格納）/ run_finished / error
+    """
+    await websocket.accept()
+    websocket_connections_open.labels("chat").inc()
+    send_lock = asyncio.Lock()
+
+    async def send(text: str) -> None:
+        # 複数の実行から同時に送信されるためフレーム単位で直列化する
+        async with send_lock:
+            await websocket.send_text(text)
+
+    multiplexer = ChatMultiplexer(
+        send,
+        agent_id=id,
+        owner_id=owner_id,
+        owner_agent_id=owner_agent_id,
+        session_id=session_id,
+    )
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            # バイナリフレームも UTF-8 の JSON として受け付ける（復号できなければ invalid_message）
+            data = frame.get("text")
+            if data is None:
+                data = frame.get("bytes")
+            try:
+                message = json.loads(data) if data is not None else None
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await send(dumps({"type": "error", "run_id": None, "code": "invalid_message", "detail": "expected a JSON object"}))
+                continue
+            await multiplexer.handle(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # 切断されたら実行中のランをすべて止める
+        await multiplexer.close()
+        websocket_connections_open.labels("chat").dec()
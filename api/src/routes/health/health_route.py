@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.core.v1.health.di import health_checker
 
 health_router = APIRouter(prefix="/health", tags=["health"])
 
@@ -6,3 +9,23 @@ health_router = APIRouter(prefix="/health", tags=["health"])
 @health_router.get("/")
 async def health():
     return {"status": "ok"}
+
+
+@health_router.get("/live")
+async def liveness():
+    """Liveness プローブ。イベントループが応答できれば 200"""
+    return health_checker.liveness()
+
+
+@health_router.get("/ready")
+async def readiness():
+    """Readiness プローブ。DB に接続できない・イベントループが詰まっている・チャットの待ち行列が満杯なら 503"""
+    report = await health_checker.readiness()
+    return JSONResponse(status_code=200 if report["status"] == "ok" else 503, content=report)
+
+
+@health_router.get("/deep")
+async def deep_health():
+    """Readiness の判定に加え、DB プール・実行数・ストリーム数・セッション数・イベントループの遅延を返す"""
+    report = await health_checker.readiness(deep=True)
+    return JSONResponse(status_code=200 if report["status"] == "ok" else 503, content=report)
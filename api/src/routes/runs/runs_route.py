@@ -0,0 +1,68 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.core.v1.runs.di import run_manager
+from src.infra.metrics.app_metrics import sse_connections_open
+from src.infra.sse import sse_event
+
+runs_router = APIRouter(prefix="/runs", tags=["runs"])
+
+
+def _get_run_or_404(run_id: str, owner_id: str):
+    run = run_manager.get(run_id)
+    # 他のオーナーの実行は存在を明かさないよう、見つからない場合と同じ 404 にする
+    if run is None or run.owner_id != owner_id:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+@runs_router.get("/{run_id}")
+async def get_run(run_id: str, owner_id: str = Query(min_length=1)):
+    return _get_run_or_404(run_id, owner_id).to_dict()
+
+
+@runs_router.get("/{run_id}/events")
+async def stream_run_events(
+    run_id: str,
+    owner_id: str = Query(min_length=1),
+    offset: Optional[int] = Query(default=None, ge=0),
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """
+    POST /generated_agents/{id}/chat?detach=true で開始した実行のイベントを SSE で返す。
+    各イベントの id はログ上のオフセットで、?offset= か Last-Event-ID ヘッダで途中から再開できる。
+    切断しても実行は止まらない（止める場合は DELETE /runs/{run_id}）。
+    owner_id は実行を開始したオーナーと一致する必要がある。
+    """
+    run = _get_run_or_404(run_id, owner_id)
+    if offset is None:
+        # Last-Event-ID は最後に受け取ったイベントなので、その次から返す
+        offset = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def run_events() -> AsyncIterator[str]:
+        sse_connections_open.labels("run_events").inc()
+        expected = offset
+        try:
+            async for event_offset, chunk in run.log.read(offset):
+                if event_offset > expected:
+                    # ログの上限を超えて古いイベントが捨てられていた
+                    dropped_event = {
+                        "type": "events_dropped",
+                        "data": {"from_offset": expected, "to_offset": event_offset},
+                    }
+                    yield sse_event(dropped_event)
+                yield f"id: {event_offset}\n{chunk}"
+                expected = event_offset + 1
+        finally:
+            sse_connections_open.labels("run_events").dec()
+
+    return StreamingResponse(run_events(), media_type="text/event-stream")
+
+
+@runs_router.delete("/{run_id}")
+async def cancel_run(run_id: str, owner_id: str = Query(min_length=1)):
+    run = _get_run_or_404(run_id, owner_id)
+    cancelled = run_manager.cancel(run_id)
+    return {"run_id": run.id, "cancelled": cancelled, "state": run.state}
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, HTTPException
+
+from src.infra.tracing import InMemorySpanExporter, tracer
+
+traces_router = APIRouter(tags=["traces"])
+
+
+@traces_router.get("/traces/{trace_id}", include_in_schema=False)
+async def get_trace(trace_id: str):
+    """TRACING_EXPORTER=memory のときに保持しているトレースをスパン一覧で返すデバッグ用エンドポイント"""
+    exporter = tracer.exporter
+    if not isinstance(exporter, InMemorySpanExporter):
+        raise HTTPException(status_code=404, detail="In-memory tracing is not enabled")
+    spans = exporter.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": [s.to_dict() for s in spans]}
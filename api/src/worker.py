@@ -0,0 +1,81 @@
+"""
+Run worker entry point for RUN_EXECUTION_MODE=worker.
+
+Claims chat runs queued by the API from Postgres and executes them; the API
+relays the events to its SSE clients. Start with:
+
+    python -m src.worker
+
+WORKER_PROCESSES starts that many worker processes, each running up to
+WORKER_CONCURRENCY jobs on its own event loop.
+"""
+
+import asyncio
+import multiprocessing
+import signal
+
+from src.config import get_env_variable
+from src.infra.logging import setup_logging
+
+
+async def _serve() -> None:
+    # 設定で決まるリポジトリ・モデル設定を読み込むため、ここで import する
+    from src.core.v1.agents.engine_loader import load_chat_engine
+    from src.core.v1.health.di import loop_watchdog
+    from src.core.v1.memory.di import semantic_memory
+    from src.core.v1.runs.di import get_run_worker
+
+    # ワーカーはチャットを実行するためだけのプロセスなので、最初のジョブを待たずに読み込む
+    load_chat_engine()
+    if semantic_memory is not None:
+        semantic_memory.start()
+    if loop_watchdog is not None:
+        loop_watchdog.start()
+    worker = get_run_worker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        if loop_watchdog is not None:
+            await loop_watchdog.stop()
+        if semantic_memory is not None:
+            await semantic_memory.stop()
+
+
+def _run_process() -> None:
+    setup_logging()
+    asyncio.run(_serve())
+
+
+def main() -> None:
+    if get_env_variable("USE_IN_MEMORY", "0") == "1":
+        raise RuntimeError(
+            "The run worker needs the Postgres job queue (DATABASE_URL). "
+            "With USE_IN_MEMORY=1 the API runs the worker in-process instead."
+        )
+    processes = int(get_env_variable("WORKER_PROCESSES", "1"))
+    if processes <= 1:
+        _run_process()
+        return
+
+    context = multiprocessing.get_context("spawn")
+    children = [context.Process(target=_run_process, name=f"run-worker-{i}") for i in range(processes)]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame) -> None:
+        # 子プロセスにも停止を伝え、実行中のジョブを終えてから止める
+        for child in children:
+            if child.is_alive():
+                child.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+
+
+if __name__ == "__main__":
+    main()